@@ -0,0 +1,251 @@
+import json
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+from song_function_definitions import *
+from shared_corpus import create_shared_corpus, SharedLyricCorpus
+
+# Times how long the cleanup functions take per song. Run this file and compare the output between changes, e.g.
+# python Benchmark_Analysis.py > bench_output.txt
+with open('Lyrics_Khalid_all.json') as json_file:
+    data = json.load(json_file)
+
+
+def reference_remove_headers_from_lyrics(lyrics):
+    """
+    The header removal loop remove_headers_from_lyrics used to run, kept to compare against. Every header is found
+    from the start of the lyrics again and removed with str.replace, which copies the whole string each time
+    """
+    while '[' in lyrics:
+        start_of_header = lyrics.find('[', 0, len(lyrics))
+        end_of_header = lyrics.find(']', start_of_header, len(lyrics))
+        header_to_remove = lyrics[start_of_header:end_of_header + 1]
+        lyrics = lyrics.replace(header_to_remove, '')
+    return lyrics
+
+
+def reference_remove_punctuation(string):
+    """
+    The loop remove_punctuation used to run, kept to compare against. The string is copied once for every punctuation
+    character in it
+    """
+    punc = '''!()-[]{};:"\\,<>./?@#$%^&*_~'''
+    for ele in string:
+        if ele in set(punc):
+            string = string.replace(ele, "")
+    return string
+
+
+def make_long_songs(number_of_songs, songs_per_long_song):
+    """
+    Joins songs from the Khalid json into longer songs with the Genius title header and Embed footer, so each one has
+    dozens of headers. Songs with a '[' that isn't closed before the next header are left out, since the old loop
+    removed those differently depending on which headers came later in the song
+    """
+    songs = [song['lyrics'] for song in data['songs']
+             if song['lyrics'] and len(HEADER_PATTERN.findall(song['lyrics'])) == song['lyrics'].count('[')]
+    long_songs = []
+    for i in range(number_of_songs):
+        parts = [songs[(i * songs_per_long_song + j) % len(songs)] for j in range(songs_per_long_song)]
+        long_songs.append('Long Song ' + str(i) + ' Lyrics' + '\n\n'.join(parts) + str(i) + 'Embed')
+    return long_songs
+
+
+def time_per_song(function, songs, repeats=3):
+    """
+    Returns the fewest microseconds per song function took over repeats runs through songs
+    """
+    best_seconds = None
+    for repeat in range(repeats):
+        start_time = time.perf_counter()
+        for lyrics in songs:
+            function(lyrics)
+        seconds = time.perf_counter() - start_time
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds = seconds
+    return best_seconds / len(songs) * 1000000
+
+
+def benchmark_header_removal():
+    """
+    Prints the cost per song of removing headers with the old loop and with remove_headers_from_lyrics
+    """
+    long_songs = make_long_songs(50, 8)
+    number_of_headers = sum(lyrics.count('[') for lyrics in long_songs) / len(long_songs)
+    print("Header removal (" + str(len(long_songs)), "songs,", round(number_of_headers, 1), "headers per song)")
+    for lyrics in [song['lyrics'] for song in data['songs']] + long_songs:
+        cleaned_lyrics = remove_unneeded_headers_and_footers(lyrics)
+        if reference_remove_headers_from_lyrics(cleaned_lyrics) != remove_headers_from_lyrics(lyrics):
+            print("Outputs differ for a song")
+            return
+    old_time = time_per_song(lambda lyrics: reference_remove_headers_from_lyrics(
+        remove_unneeded_headers_and_footers(lyrics)), long_songs)
+    new_time = time_per_song(remove_headers_from_lyrics, long_songs)
+    print("  old loop:", round(old_time, 1), "us/song")
+    print("  remove_headers_from_lyrics:", round(new_time, 1), "us/song")
+
+
+def benchmark_normalization():
+    """
+    Prints the cost per song of lowercasing and removing punctuation with the old loop and with normalize_lyrics
+    """
+    long_songs = [remove_headers_from_lyrics(lyrics) for lyrics in make_long_songs(50, 8)]
+    print("Normalization (" + str(len(long_songs)), "songs,", len(long_songs[0]), "characters in the first song)")
+    old_time = time_per_song(lambda lyrics: reference_remove_punctuation(lyrics).lower(), long_songs)
+    new_time = time_per_song(normalize_lyrics, long_songs)
+    print("  old loop:", round(old_time, 1), "us/song")
+    print("  normalize_lyrics:", round(new_time, 1), "us/song")
+
+
+def benchmark_loading(path='Lyrics_Khalid_all.json'):
+    """
+    Prints the time and peak memory of loading the json with json.load and with load_lyrics_file
+    """
+    def load_whole_file():
+        with open(path, encoding='utf-8') as json_file:
+            return json.load(json_file)
+
+    print("Loading", path)
+    for name, load in [("json.load", load_whole_file), ("load_lyrics_file", lambda: load_lyrics_file(path))]:
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        load()
+        seconds = time.perf_counter() - start_time
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("  " + name + ":", round(seconds * 1000, 1), "ms,", round(peak / 1000000, 2), "MB peak")
+
+
+def benchmark_binary_corpus(path='Lyrics_Khalid_all.json'):
+    """
+    Prints how long it takes to get a LyricCorpus ready to count words in from the json and from a binary corpus file
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        corpus_path = os.path.join(directory, 'corpus.lyrc')
+        convert_json_to_binary_corpus(path, corpus_path)
+        print("Binary corpus (" + str(os.path.getsize(corpus_path)), "bytes, json is", os.path.getsize(path), "bytes)")
+
+        start_time = time.perf_counter()
+        corpus = load_lyric_corpus(path)
+        corpus.get_inverted_index()
+        print("  load_lyric_corpus and index:", round((time.perf_counter() - start_time) * 1000, 1), "ms")
+
+        start_time = time.perf_counter()
+        mapped_corpus = open_binary_corpus(corpus_path)
+        print("  open_binary_corpus:", round((time.perf_counter() - start_time) * 1000, 1), "ms")
+        mapped_corpus.get_inverted_index()
+        print("  open_binary_corpus and index:", round((time.perf_counter() - start_time) * 1000, 1), "ms")
+        mapped_corpus.close()
+
+
+def benchmark_word_counts():
+    """
+    Prints how long counting every word in every song takes with a Counter of each song's words and with the corpus'
+    word ids
+    """
+    corpus = LyricCorpus(data)
+    list_of_tokens = [song.tokens for song in corpus.songs]
+    list_of_token_ids = [song.token_ids for song in corpus.songs]
+    print("Word counts (" + str(len(list_of_tokens)), "songs,", len(corpus.vocabulary), "different words)")
+    start_time = time.perf_counter()
+    counts = Counter()
+    for tokens in list_of_tokens:
+        counts = counts + Counter(tokens)
+    print("  Counter of every song:", round((time.perf_counter() - start_time) * 1000, 2), "ms")
+    start_time = time.perf_counter()
+    corpus.vocabulary.get_word_counts(list_of_token_ids)
+    print("  Vocabulary.get_word_counts:", round((time.perf_counter() - start_time) * 1000, 2), "ms")
+
+
+def benchmark_word_count_matrix():
+    """
+    Prints how long totals and top words over a subset of songs take by adding up each song's Counter and with the
+    corpus' song x word count matrix
+    """
+    corpus = LyricCorpus(data)
+    bad_songs = set(range(0, len(corpus.songs), 3))
+    print("Word count matrix (" + str(len(corpus.songs)), "songs, skipping", len(bad_songs), "of them)")
+    start_time = time.perf_counter()
+    counts = Counter()
+    for i in range(len(corpus.songs)):
+        if i not in bad_songs:
+            counts = counts + Counter(corpus.songs[i].tokens)
+    counts.most_common(20)
+    print("  Counter of every song:", round((time.perf_counter() - start_time) * 1000, 2), "ms")
+    start_time = time.perf_counter()
+    matrix = corpus.get_word_count_matrix()
+    print("  Building the matrix:", round((time.perf_counter() - start_time) * 1000, 2), "ms")
+    start_time = time.perf_counter()
+    matrix.get_top_words(20, bad_songs)
+    print("  WordCountMatrix.get_top_words:", round((time.perf_counter() - start_time) * 1000, 2), "ms")
+
+
+def benchmark_ragged_token_array():
+    """
+    Prints how long counting the words, different words and a keyword in every song takes song by song and with the
+    corpus' RaggedTokenArray, on the sample songs copied until there are about 50,000 of them
+    """
+    corpus = LyricCorpus(data)
+    songs = corpus.songs * (50000 // len(corpus.songs))
+    keyword_id = corpus.vocabulary.get_id('love')
+    print("Per-song statistics (" + str(len(songs)), "songs)")
+    start_time = time.perf_counter()
+    for song in songs:
+        tokens = song.tokens
+        len(tokens), len(set(tokens)), tokens.count('love')
+    print("  Every song's tokens:", round((time.perf_counter() - start_time) * 1000, 2), "ms")
+    start_time = time.perf_counter()
+    ragged = concatenate_token_ids(song.token_ids for song in songs)
+    print("  Building the RaggedTokenArray:", round((time.perf_counter() - start_time) * 1000, 2), "ms")
+    start_time = time.perf_counter()
+    ragged.get_song_lengths(), ragged.get_distinct_counts(), ragged.get_token_counts(keyword_id)
+    print("  RaggedTokenArray reductions:", round((time.perf_counter() - start_time) * 1000, 2), "ms")
+
+
+def benchmark_workers():
+    """
+    Prints how long counting a substring and finding the lines with a keyword in every song take with 1 process and
+    with every cpu, on the sample songs copied until there are about 5,000 of them
+    """
+    scaled_data = dict(data)
+    scaled_data['songs'] = data['songs'] * (5000 // len(data['songs']))
+    print("Process pool (" + str(len(scaled_data['songs'])), "songs,", os.cpu_count(), "cpus)")
+    for workers in (1, os.cpu_count()):
+        start_time = time.perf_counter()
+        find_substring_count_in_all_songs(scaled_data, "love", [], workers=workers)
+        get_list_of_lyric_lines_containing_keyword_in_all_songs(scaled_data, "love", [], workers=workers)
+        print("  " + str(workers), "workers:", round(time.perf_counter() - start_time, 2), "seconds")
+
+
+def benchmark_shared_corpus():
+    """
+    Prints how many bytes each worker would be sent by pickling the json and by pickling the corpus, against the size
+    of the shared memory block the workers attach to instead
+    """
+    corpus = LyricCorpus(data)
+    print("Shared corpus (" + str(len(corpus.songs)), "songs)")
+    print("  Pickled json:", len(pickle.dumps(data)) // 1024, "KB")
+    print("  Pickled corpus:", len(pickle.dumps(corpus)) // 1024, "KB")
+    start_time = time.perf_counter()
+    shared_memory = create_shared_corpus(corpus)
+    print("  Shared memory block:", shared_memory.size // 1024, "KB, written in",
+          round((time.perf_counter() - start_time) * 1000, 2), "ms")
+    start_time = time.perf_counter()
+    SharedLyricCorpus(shared_memory.name).close()
+    print("  Attaching to it:", round((time.perf_counter() - start_time) * 1000, 2), "ms")
+    shared_memory.close()
+    shared_memory.unlink()
+
+
+if __name__ == '__main__':
+    benchmark_header_removal()
+    benchmark_normalization()
+    benchmark_loading()
+    benchmark_binary_corpus()
+    benchmark_word_counts()
+    benchmark_word_count_matrix()
+    benchmark_ragged_token_array()
+    benchmark_workers()
+    benchmark_shared_corpus()
@@ -1,9 +1,11 @@
-import json
 from song_function_definitions import *
 
-# Lyrics_Khalid_all.json was created as a result of using lyricsgenius search_artist function
-with open('Lyrics_Khalid_all.json') as json_file:
-    data = json.load(json_file)
+# Lyrics_Khalid_all.json was created as a result of using lyricsgenius search_artist function. It is read a song at a
+# time, keeping only the fields the analysis uses
+data = load_lyrics_file('Lyrics_Khalid_all.json')
+
+# Keep spacy's part of speech tags in pos_tag_cache.sqlite, so running this again doesn't have to tag the song again
+use_pos_tag_cache_file()
 
 # Give the data to the analyze_Song function along with the index of the song we want to analyze,
 analyze_song(data, 1)
@@ -104,8 +104,7 @@ class StartPage(tk.Frame):
             file_path = askopenfilename()  # This gets full path
             file_name = ntpath.basename(file_path)  # This gets only the file name
             try:
-                with open(file_path) as json_file:
-                    data = json.load(json_file)
+                data = load_lyrics_file(file_path)
                 data_is_loaded = True
                 invalid_file = False
                 update_StartPage()
@@ -173,7 +172,7 @@ class StartPage(tk.Frame):
             global invalid_file
             file_path = "C:\\Users\\marinom1\\PycharmProjects\\Song-Lyric-Analyzer\\Lyrics_Khalid_all.json"
             file_name = "Lyrics_Khalid_all.json"
-            with open(file_path) as json_file: data = json.load(json_file)
+            data = load_lyrics_file(file_path)
             data_is_loaded = True
             invalid_file = False
             update_StartPage()
@@ -1,4 +1,4 @@
-from song_function_definitions import remove_headers_from_lyrics, remove_punctuation
+from song_function_definitions import remove_headers_from_lyrics, normalize_lyrics, normalize_search_term, clean_title
 from collections import Counter
 
 
@@ -20,7 +20,7 @@ def print_all_songs_in_album_from_json(data):
     list_of_songs = []
     for i in range(len(data['tracks'])):
         print(i, data['tracks'][i]['song']['title'])
-        list_of_songs.append(data['tracks'][i]['song']['title'].replace('\u200b', ''))
+        list_of_songs.append(clean_title(data['tracks'][i]['song']['title']))
     return list_of_songs
 
 
@@ -45,13 +45,11 @@ def find_keyword_count_in_song_in_album(data, keyword, song_index):
         an int with how often the keyword appears in the song
     """
     keyword_count = 0
-    keyword = keyword.lower()
+    keyword = normalize_search_term(keyword)
     lyrics = data['tracks'][song_index]['song']['lyrics']
     lyrics = remove_headers_from_lyrics(lyrics)
     if lyrics is not None:
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        lyrics = lyrics.replace('\u200b', '')  # catch weird bug where \u200b was showing up in some keywords
+        lyrics = normalize_lyrics(lyrics)
         lyrics = lyrics.split()
         for a in range(len(lyrics)):  # Loop through the current song
             if (keyword in lyrics[a]) & (keyword == lyrics[a]):
@@ -87,7 +85,7 @@ def find_keyword_count_in_all_songs_in_album(data, keyword, bad_song_indices):
                 print('[' + str(i) + ']', bad_song_indices[i])
         return 0
 
-    keyword = keyword.lower()
+    keyword = normalize_search_term(keyword)
     keyword_count = 0
     for i in range(len(data['tracks'])):  # Loop through every song in data
         # if current song is an empty string, don't bother trying to analyze the song and continue to next song
@@ -170,8 +168,7 @@ def find_all_word_counts_in_song_in_album(data, song_index, convert_to_list=Fals
     lyrics = data['tracks'][song_index]['song']['lyrics']
     lyrics = remove_headers_from_lyrics(lyrics)
     if lyrics is not None:
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
+        lyrics = normalize_lyrics(lyrics)
         lyrics = lyrics.split()
         counts = counts + Counter(lyrics)
         # print(counts)
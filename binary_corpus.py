@@ -0,0 +1,393 @@
+# Compact on-disk version of a LyricCorpus. Every song's words are stored once as uint32 ids into a vocabulary table,
+# in one flat array with per-song and per-line offsets. The file is opened with mmap, so opening it doesn't parse or
+# clean any lyrics, and every process that opens the same file shares the same pages
+import io
+import json
+import mmap
+import struct
+import sys
+from array import array
+from lyric_corpus import CorpusSong, LyricCorpus
+from lyric_loader import LyricsFileReader, get_song_record, ARTIST_FIELDS
+from ragged_tokens import RaggedTokenArray
+from vocabulary import Vocabulary
+from string_cleanup_functions import remove_headers_from_lyrics, remove_punctuation
+
+BINARY_CORPUS_MAGIC = b'LYRC'
+BINARY_CORPUS_VERSION = 2
+# Sections of the file, in the order they are written. The arrays are written in the byte order of the machine that
+# wrote the file, which is stored in the header
+BINARY_CORPUS_SECTIONS = ('lyrics', 'lyrics_offsets', 'token_ids', 'song_token_offsets', 'line_offsets',
+                          'song_line_offsets', 'vocabulary', 'metadata')
+BINARY_CORPUS_HEADER = struct.Struct('<4sII' + 'QQ' * len(BINARY_CORPUS_SECTIONS))
+BYTE_ORDER_FLAGS = {'little': 1, 'big': 2}
+
+
+def _write_section(corpus_file, data):
+    """
+    Writes data at the next multiple of 8 bytes in the file and returns the (offset, length) of what was written
+    """
+    offset = corpus_file.tell()
+    if offset % 8:
+        corpus_file.write(b'\0' * (8 - offset % 8))
+        offset = corpus_file.tell()
+    corpus_file.write(data)
+    return offset, len(data)
+
+
+def write_binary_corpus_to_file(corpus_file, songs, artist, vocabulary):
+    """
+    Writes a binary corpus to an open file. Songs are written one at a time, so songs can be a generator that is still
+    reading or cleaning its songs
+
+    Parameters
+    -------
+    corpus_file : file
+        the binary file to write, positioned at its start
+    songs : iterable
+        tuples of (song record, CorpusSong) for every song, see get_song_record. The lyrics are taken from the record
+    artist : dict
+        the artist fields to keep with the corpus. It is only read after every song was written
+    vocabulary : Vocabulary
+        the vocabulary the CorpusSong word ids are from. It is only read after every song was written
+
+    Returns
+    -------
+    int
+        the number of songs written
+    """
+    token_ids = array('I')
+    song_token_offsets = array('q', [0])
+    line_offsets = array('i')
+    song_line_offsets = array('q', [0])
+    lyrics_offsets = array('q', [0])
+    records = []
+    sections = {}
+    corpus_file.write(b'\0' * BINARY_CORPUS_HEADER.size)
+    lyrics_start = corpus_file.tell()
+    for song, corpus_song in songs:
+        lyrics = song['lyrics'].encode('utf-8')
+        corpus_file.write(lyrics)
+        lyrics_offsets.append(lyrics_offsets[-1] + len(lyrics))
+
+        token_ids.extend(corpus_song.token_ids)
+        song_token_offsets.append(len(token_ids))
+        line_offsets.extend(corpus_song.line_offsets)
+        song_line_offsets.append(len(line_offsets))
+        records.append({field: value for field, value in song.items() if field != 'lyrics'})
+    sections['lyrics'] = (lyrics_start, corpus_file.tell() - lyrics_start)
+
+    sections['lyrics_offsets'] = _write_section(corpus_file, lyrics_offsets.tobytes())
+    sections['token_ids'] = _write_section(corpus_file, token_ids.tobytes())
+    sections['song_token_offsets'] = _write_section(corpus_file, song_token_offsets.tobytes())
+    sections['line_offsets'] = _write_section(corpus_file, line_offsets.tobytes())
+    sections['song_line_offsets'] = _write_section(corpus_file, song_line_offsets.tobytes())
+    # Words never have whitespace in them, so the vocabulary is stored as one word per line
+    sections['vocabulary'] = _write_section(corpus_file, '\n'.join(vocabulary.words).encode('utf-8'))
+    metadata = {'artist': {field: artist[field] for field in ARTIST_FIELDS if field in artist}, 'songs': records}
+    sections['metadata'] = _write_section(corpus_file, json.dumps(metadata, ensure_ascii=False).encode('utf-8'))
+
+    corpus_file.seek(0)
+    corpus_file.write(BINARY_CORPUS_HEADER.pack(BINARY_CORPUS_MAGIC, BINARY_CORPUS_VERSION,
+                                                BYTE_ORDER_FLAGS[sys.byteorder],
+                                                *[number for name in BINARY_CORPUS_SECTIONS
+                                                  for number in sections[name]]))
+    return len(records)
+
+
+def write_binary_corpus_from_songs(path, songs, artist):
+    """
+    Writes songs to a binary corpus file. Songs are cleaned and written one at a time, so songs can be a generator that
+    is still reading its file
+
+    Parameters
+    -------
+    path : str
+        the file to write
+    songs : iterable
+        the song records (see get_song_record) to write
+    artist : dict
+        the artist fields to keep with the corpus. It is only read after every song was written
+
+    Returns
+    -------
+    int
+        the number of songs written
+    """
+    vocabulary = Vocabulary()
+    with open(path, 'wb') as corpus_file:
+        return write_binary_corpus_to_file(corpus_file, ((song, CorpusSong(song['lyrics'], vocabulary))
+                                                         for song in songs), artist, vocabulary)
+
+
+def get_corpus_songs(data):
+    """
+    Returns the vocabulary and a generator of (song record, CorpusSong) tuples for every song in data, for
+    write_binary_corpus_to_file. The songs of a LyricCorpus are used as they are, without cleaning them again
+    """
+    if isinstance(data, LyricCorpus):
+        # The lyrics are copied in by name so the lyrics of a MappedSongRecord are read from its file too
+        return data.vocabulary, ((get_song_record(dict(song, lyrics=song['lyrics'])), corpus_song)
+                                 for song, corpus_song in zip(data['songs'], data.songs))
+    vocabulary = Vocabulary()
+    return vocabulary, ((record, CorpusSong(record['lyrics'], vocabulary))
+                        for record in (get_song_record(song) for song in data['songs']))
+
+
+def write_binary_corpus(data, path):
+    """
+    Writes the songs in data to a binary corpus file that can be opened with open_binary_corpus
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    path : str
+        the file to write
+
+    Returns
+    -------
+    int
+        the number of songs written
+    """
+    vocabulary, songs = get_corpus_songs(data)
+    with open(path, 'wb') as corpus_file:
+        return write_binary_corpus_to_file(corpus_file, songs, data, vocabulary)
+
+
+def get_binary_corpus_bytes(data):
+    """
+    Returns the binary corpus of the songs in data as bytes, see write_binary_corpus
+    """
+    vocabulary, songs = get_corpus_songs(data)
+    corpus_file = io.BytesIO()
+    write_binary_corpus_to_file(corpus_file, songs, data, vocabulary)
+    return corpus_file.getvalue()
+
+
+def convert_json_to_binary_corpus(json_path, corpus_path):
+    """
+    Converts a lyricsgenius json file to a binary corpus file. The json is read a song at a time with
+    LyricsFileReader, so it is never all loaded at once
+
+    Parameters
+    -------
+    json_path : str
+        the lyricsgenius json file
+    corpus_path : str
+        the binary corpus file to write
+
+    Returns
+    -------
+    int
+        the number of songs written
+    """
+    reader = LyricsFileReader(json_path)
+    return write_binary_corpus_from_songs(corpus_path, reader.iterate_songs(), reader.artist)
+
+
+class MappedSongRecord(dict):
+    """
+    Song record whose 'lyrics' are only decoded from the mapped file when they are asked for
+    """
+
+    def __init__(self, record, corpus, song_index):
+        super().__init__(record)
+        self._corpus = corpus
+        self._song_index = song_index
+
+    def __missing__(self, key):
+        if key != 'lyrics':
+            raise KeyError(key)
+        return self._corpus.get_lyrics(self._song_index)
+
+
+class MappedCorpusSong:
+    """
+    Same attributes as CorpusSong, read from a binary corpus file the first time each one is asked for
+    """
+    __slots__ = ('_corpus', '_song_index', '_cased_text', '_text', '_line_offsets')
+
+    def __init__(self, corpus, song_index):
+        self._corpus = corpus
+        self._song_index = song_index
+        self._cased_text = None
+        self._text = None
+        self._line_offsets = None
+
+    @property
+    def cased_text(self):
+        if self._cased_text is None:
+            self._cased_text = remove_punctuation(remove_headers_from_lyrics(self._corpus.get_lyrics(self._song_index)))
+        return self._cased_text
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.cased_text.lower()
+        return self._text
+
+    @property
+    def token_ids(self):
+        return self._corpus.get_token_ids(self._song_index)
+
+    @property
+    def tokens(self):
+        return self._corpus.get_tokens(self._song_index)
+
+    @property
+    def line_offsets(self):
+        if self._line_offsets is None:
+            self._line_offsets = self._corpus.get_line_offsets(self._song_index)
+        return self._line_offsets
+
+    def get_lines(self):
+        """
+        Returns a list of lines, where each line is the list of words on that line
+        """
+        return CorpusSong.get_lines(self)
+
+
+class MappedLyricCorpus(LyricCorpus):
+    """
+    LyricCorpus backed by a binary corpus file opened with mmap. Only the header, vocabulary and song titles are read
+    when the file is opened. Each song's words are read from the mapped token arrays the first time they are used
+
+    Parameters
+    ----------
+    path : str
+        the binary corpus file, written by write_binary_corpus or convert_json_to_binary_corpus
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # The file is empty
+            self._file.close()
+            raise ValueError(path + " is not a binary corpus file")
+        self._load(self._map, path)
+
+    def _load(self, buffer, name):
+        """
+        Reads the header, vocabulary and song titles of the binary corpus in buffer. name is only used in errors
+        """
+        self._buffer = buffer
+        if len(buffer) < BINARY_CORPUS_HEADER.size:
+            self.close()
+            raise ValueError(name + " is not a binary corpus file")
+        header = BINARY_CORPUS_HEADER.unpack_from(buffer, 0)
+        if header[0] != BINARY_CORPUS_MAGIC or header[1] != BINARY_CORPUS_VERSION:
+            self.close()
+            raise ValueError(name + " is not a version " + str(BINARY_CORPUS_VERSION) + " binary corpus file")
+        if header[2] != BYTE_ORDER_FLAGS[sys.byteorder]:
+            self.close()
+            raise ValueError(name + " was written on a machine with a different byte order, convert the json again")
+        sections = {name: (header[3 + 2 * i], header[4 + 2 * i]) for i, name in enumerate(BINARY_CORPUS_SECTIONS)}
+
+        self._lyrics = self._get_section(sections, 'lyrics')
+        self._lyrics_offsets = self._get_section(sections, 'lyrics_offsets').cast('q')
+        self._token_ids = self._get_section(sections, 'token_ids').cast('I')
+        self._song_token_offsets = self._get_section(sections, 'song_token_offsets').cast('q')
+        self._line_offsets = self._get_section(sections, 'line_offsets').cast('i')
+        self._song_line_offsets = self._get_section(sections, 'song_line_offsets').cast('q')
+        vocabulary = bytes(self._get_section(sections, 'vocabulary')).decode('utf-8')
+        vocabulary = Vocabulary(vocabulary.split('\n') if vocabulary else [])
+        metadata = json.loads(bytes(self._get_section(sections, 'metadata')).decode('utf-8'))
+
+        data = dict(metadata['artist'])
+        data['songs'] = [MappedSongRecord(record, self, i) for i, record in enumerate(metadata['songs'])]
+        super().__init__({'songs': []})
+        self.vocabulary = vocabulary
+        self.data = data
+        self.songs = [MappedCorpusSong(self, i) for i in range(len(data['songs']))]
+
+    def _get_section(self, sections, name):
+        offset, length = sections[name]
+        return memoryview(self._buffer)[offset:offset + length]
+
+    def get_lyrics(self, song_index):
+        """
+        Returns a song's lyrics as they were in the json
+        """
+        start = self._lyrics_offsets[song_index]
+        return bytes(self._lyrics[start:self._lyrics_offsets[song_index + 1]]).decode('utf-8')
+
+    def get_token_ids(self, song_index):
+        """
+        Returns the array('I') of a song's word ids into vocabulary. The ids are copied out of the file, so no view of
+        the mapped file is left behind that would keep close from releasing it
+        """
+        token_ids = array('I')
+        token_ids.frombytes(self._get_token_id_view(song_index).cast('B'))
+        return token_ids
+
+    def _get_token_id_view(self, song_index):
+        return self._token_ids[self._song_token_offsets[song_index]:self._song_token_offsets[song_index + 1]]
+
+    def get_tokens(self, song_index):
+        """
+        Returns the list of words in a song's cleaned lyrics
+        """
+        return self.vocabulary.decode(self._get_token_id_view(song_index))
+
+    def get_ragged_token_array(self):
+        """
+        Returns the RaggedTokenArray of every song's word ids. As long as the corpus still has exactly the file's songs,
+        the mapped token arrays are copied out of the file in one go instead of song by song
+        """
+        if self._ragged_token_array is None:
+            if len(self.songs) == len(self._song_token_offsets) - 1 and all(
+                    isinstance(song, MappedCorpusSong) and song._song_index == i for i, song in enumerate(self.songs)):
+                token_ids = array('I')
+                token_ids.frombytes(self._token_ids.cast('B'))
+                song_token_offsets = array('q')
+                song_token_offsets.frombytes(self._song_token_offsets.cast('B'))
+                self._ragged_token_array = RaggedTokenArray(token_ids, song_token_offsets)
+            else:  # Songs were added or refreshed since the file was opened
+                return super().get_ragged_token_array()
+        return self._ragged_token_array
+
+    def get_line_offsets(self, song_index):
+        """
+        Returns the index of the first word of every line in a song, plus a final entry equal to its number of words
+        """
+        return self._line_offsets[self._song_line_offsets[song_index]:self._song_line_offsets[song_index + 1]].tolist()
+
+    def close(self):
+        """
+        Releases the mapped file. Songs that haven't been read yet can't be used after this. Word ids and
+        RaggedTokenArrays that were already handed out are copies, so they can still be used
+        """
+        for name in ('_lyrics', '_lyrics_offsets', '_token_ids', '_song_token_offsets', '_line_offsets',
+                     '_song_line_offsets'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        self._release_buffer()
+
+    def _release_buffer(self):
+        """
+        Closes what the binary corpus was read from, once every view of it has been released
+        """
+        self._map.close()
+        self._file.close()
+
+
+def open_binary_corpus(path):
+    """
+    Opens a binary corpus file as a LyricCorpus that can be given to any function that takes data
+
+    Parameters
+    -------
+    path : str
+        the binary corpus file, written by write_binary_corpus or convert_json_to_binary_corpus
+
+    Returns
+    -------
+    MappedLyricCorpus
+        the corpus of every song in the file
+    """
+    return MappedLyricCorpus(path)
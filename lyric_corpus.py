@@ -0,0 +1,590 @@
+# Corpus object that cleans and tokenizes every song's lyrics once so the find_* and get_* functions don't have to
+# re-clean the same lyrics on every call
+import hashlib
+import json
+from collections import Counter
+from string_cleanup_functions import (remove_headers_from_lyrics, remove_punctuation, normalize_lyrics,
+                                      get_only_artist_lyrics_in_song)
+from lyric_index import InvertedIndex
+from lyric_loader import LyricsFileReader, SONG_FIELDS, get_song_record
+from ragged_tokens import concatenate_token_ids
+from song_similarity import SongSimilarityIndex
+from vocabulary import Vocabulary
+from word_count_matrix import WordCountMatrix
+
+
+def split_lines_into_tokens(text):
+    """
+    Splits text into a list of words, keeping track of where every line starts
+
+    Parameters
+    -------
+    text : str
+        the text to split
+
+    Returns
+    -------
+    tuple
+        the list of words, and the list of indices of the first word of every line followed by the number of words
+    """
+    tokens = []
+    line_offsets = []
+    for line in text.split('\n'):
+        line_offsets.append(len(tokens))
+        tokens.extend(line.split())
+    line_offsets.append(len(tokens))
+    return tokens, line_offsets
+
+
+def count_ngrams_in_tokens(tokens, n):
+    """
+    Counts every n word phrase in tokens. Phrases are kept as tuples of words so they are hashed without building a
+    string for every phrase
+
+    Parameters
+    -------
+    tokens : list
+        list of words
+    n : int
+        number of words in each phrase
+
+    Returns
+    -------
+    Counter
+        Counter object of tuples of n words and how often they appear
+    """
+    if n < 1:
+        return Counter()
+    return Counter(zip(*[tokens[i:] for i in range(n)]))
+
+
+def get_song_hash(song):
+    """
+    Hashes the fields of a song that the analysis functions use (see get_song_record), so a song can be told apart from
+    an earlier version of itself. The song's id isn't part of the hash
+
+    Parameters
+    -------
+    song : dict
+        a song from the json's "songs" list, or a song record
+
+    Returns
+    -------
+    str
+        the sha256 hex digest of the song's content
+    """
+    # The lyrics are copied in by name so the lyrics of a MappedSongRecord are read from its file too
+    record = get_song_record(dict(song, lyrics=song['lyrics']))
+    record.pop('id', None)
+    return hashlib.sha256(json.dumps(record, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_song_key(song, song_hash):
+    """
+    Returns what a song is matched by between two versions of a json: its Genius id, or its hash if it has no id
+    """
+    if song.get('id') is None:
+        return 'hash', song_hash
+    return 'id', song['id']
+
+
+def get_song_label(song):
+    """
+    Returns how a song is listed in a refresh report: its Genius id, or its title if it has no id
+    """
+    if song.get('id') is None:
+        return song.get('title')
+    return song['id']
+
+
+class CorpusSong:
+    """
+    Holds the cleaned lyrics of a single song. The song's words are kept as ids into the corpus' Vocabulary, and only
+    turned back into a list of words when tokens is asked for
+
+    Parameters
+    ----------
+    lyrics : str
+        the song's lyrics as they are in the json
+    vocabulary : Vocabulary
+        the vocabulary to add the song's words to
+
+    Attributes
+    ----------
+    cased_text : str
+        lyrics with headers and punctuation removed, original casing kept
+    text : str
+        lyrics with headers and punctuation removed, lowercased
+    token_ids : array
+        array('I') of the id of every word in text
+    tokens : list
+        list of every word in text
+    line_offsets : list
+        index into tokens of the first word of every line, plus a final entry equal to len(tokens)
+    """
+    __slots__ = ('cased_text', 'text', 'token_ids', 'line_offsets', 'vocabulary')
+
+    def __init__(self, lyrics, vocabulary):
+        self.cased_text = remove_punctuation(remove_headers_from_lyrics(lyrics))
+        self.text = self.cased_text.lower()
+        tokens, self.line_offsets = split_lines_into_tokens(self.text)
+        self.token_ids = vocabulary.encode(tokens)
+        self.vocabulary = vocabulary
+
+    @property
+    def tokens(self):
+        return self.vocabulary.decode(self.token_ids)
+
+    def get_lines(self):
+        """
+        Returns a list of lines, where each line is the list of words on that line
+        """
+        tokens = self.tokens
+        return [tokens[self.line_offsets[i]:self.line_offsets[i + 1]] for i in range(len(self.line_offsets) - 1)]
+
+
+class LyricCorpus:
+    """
+    Pre-cleaned version of the json generated from the LyricsGenius Python client search_artist function. Every
+    song's lyrics are cleaned and tokenized once when the corpus is built. Any function that takes data can be given a
+    LyricCorpus instead of the json and will skip re-cleaning the lyrics, giving the same results.
+
+    The corpus can be indexed like the json it was built from (e.g. corpus['songs'][0]['title']).
+
+    Parameters
+    ----------
+    data : json
+        the json where the Genius data is stored in
+
+    Attributes
+    ----------
+    vocabulary : Vocabulary
+        every word in the corpus
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.vocabulary = Vocabulary()
+        self.songs = [CorpusSong(song['lyrics'], self.vocabulary) for song in data['songs']]
+        self._artist_lyrics = {}
+        self._artist_token_ids = {}
+        self._ngram_counts = {}
+        self._word_counts = {}
+        self._inverted_index = None
+        self._similarity_indexes = {}
+        self._word_count_matrices = {}
+        self._ragged_token_array = None
+        self._song_hashes = None
+
+    def add_song(self, song):
+        """
+        Adds a song to the end of the corpus, cleaning its lyrics right away. Indexes over every song that were already
+        built are thrown away, so they are rebuilt with the new song the next time they are asked for
+        """
+        self.data['songs'].append(song)
+        self.songs.append(CorpusSong(song['lyrics'], self.vocabulary))
+        if self._song_hashes is not None:
+            self._song_hashes.append(get_song_hash(song))
+        self._inverted_index = None
+        self._similarity_indexes = {}
+        self._word_count_matrices = {}
+        self._ragged_token_array = None
+
+    def get_song_hashes(self):
+        """
+        Returns the list of every song's content hash (see get_song_hash), hashing the songs the first time it is asked
+        for
+        """
+        if self._song_hashes is None:
+            self._song_hashes = [get_song_hash(song) for song in self.data['songs']]
+        return self._song_hashes
+
+    def refresh(self, data):
+        """
+        Updates the corpus to a newer version of its json. Songs are matched by their Genius id and compared by their
+        content hash, and only songs that were added or changed are cleaned and tokenized. Songs that are no longer in
+        data are removed, and the songs end up in the same order as in data. Per-song results of unchanged songs are
+        kept, indexes over every song are rebuilt the next time they are asked for. Part of speech tags are cached by
+        text (see annotate_texts), so only added and changed songs are tagged again
+
+        Parameters
+        ----------
+        data : json
+            the newer json
+
+        Returns
+        -------
+        dict
+            dictionary with the lists of the ids (or titles, for songs without an id) of the 'added', 'changed' and
+            'removed' songs, and the number of 'unchanged' songs
+        """
+        old_indices = {}
+        for song_index, (song, song_hash) in enumerate(zip(self.data['songs'], self.get_song_hashes())):
+            old_indices.setdefault(get_song_key(song, song_hash), song_index)
+
+        report = {'added': [], 'changed': [], 'removed': [], 'unchanged': 0}
+        songs = []
+        song_hashes = []
+        new_to_old_index = {}
+        for song_index, song in enumerate(data['songs']):
+            song_hash = get_song_hash(song)
+            key = get_song_key(song, song_hash)
+            old_index = old_indices.get(key)
+            if old_index is not None and self._song_hashes[old_index] == song_hash:
+                songs.append(self.songs[old_index])
+                new_to_old_index[song_index] = old_index
+                report['unchanged'] = report['unchanged'] + 1
+            else:
+                songs.append(CorpusSong(song['lyrics'], self.vocabulary))
+                report['changed' if old_index is not None else 'added'].append(get_song_label(song))
+            song_hashes.append(song_hash)
+        new_keys = {get_song_key(song, song_hash) for song, song_hash in zip(data['songs'], song_hashes)}
+        for key, old_index in old_indices.items():
+            if key not in new_keys:
+                report['removed'].append(get_song_label(self.data['songs'][old_index]))
+
+        old_to_new_index = {old_index: song_index for song_index, old_index in new_to_old_index.items()}
+        self._word_counts = {old_to_new_index[i]: value for i, value in self._word_counts.items()
+                             if i in old_to_new_index}
+        self._artist_lyrics = {(old_to_new_index[i], artist_name): value
+                               for (i, artist_name), value in self._artist_lyrics.items() if i in old_to_new_index}
+        self._artist_token_ids = {(old_to_new_index[i], artist_name): value
+                                  for (i, artist_name), value in self._artist_token_ids.items()
+                                  if i in old_to_new_index}
+        self._ngram_counts = {(old_to_new_index[i], n): value
+                              for (i, n), value in self._ngram_counts.items() if i in old_to_new_index}
+        self.data = data
+        self.songs = songs
+        self._song_hashes = song_hashes
+        self._inverted_index = None
+        self._similarity_indexes = {}
+        self._word_count_matrices = {}
+        self._ragged_token_array = None
+        return report
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.songs)
+
+    def get_inverted_index(self):
+        """
+        Returns the InvertedIndex of every word in the corpus, building it the first time it is asked for
+        """
+        if self._inverted_index is None:
+            self._inverted_index = InvertedIndex(self)
+        return self._inverted_index
+
+    def get_similarity_index(self, shingle_size=3, num_perm=128, num_bands=32):
+        """
+        Returns the SongSimilarityIndex of every song in the corpus, building it the first time it is asked for with
+        these settings
+        """
+        key = (shingle_size, num_perm, num_bands)
+        if key not in self._similarity_indexes:
+            self._similarity_indexes[key] = SongSimilarityIndex([song.tokens for song in self.songs], shingle_size,
+                                                                num_perm, num_bands)
+        return self._similarity_indexes[key]
+
+    def get_ragged_token_array(self):
+        """
+        Returns the RaggedTokenArray of every song's word ids, building it the first time it is asked for
+        """
+        if self._ragged_token_array is None:
+            self._ragged_token_array = concatenate_token_ids(song.token_ids for song in self.songs)
+        return self._ragged_token_array
+
+    def get_word_count_matrix(self, artist_name=None):
+        """
+        Returns the WordCountMatrix of every song in the corpus, building it the first time it is asked for. If
+        artist_name is given, each song only counts the words said by the artist (see get_artist_token_ids)
+        """
+        if artist_name not in self._word_count_matrices:
+            if artist_name is None:
+                list_of_token_ids = (song.token_ids for song in self.songs)
+            else:
+                list_of_token_ids = (self.get_artist_token_ids(i, artist_name) for i in range(len(self.songs)))
+            self._word_count_matrices[artist_name] = WordCountMatrix(list_of_token_ids, self.vocabulary)
+        return self._word_count_matrices[artist_name]
+
+    def get_artist_lyrics(self, song_index, artist_name):
+        """
+        Returns the same string as get_only_artist_lyrics_in_song, but only has to look through the raw lyrics the
+        first time the song and artist are asked for
+        """
+        key = (song_index, artist_name)
+        if key not in self._artist_lyrics:
+            self._artist_lyrics[key] = get_only_artist_lyrics_in_song(self.data, song_index, artist_name)
+        return self._artist_lyrics[key]
+
+    def get_artist_token_ids(self, song_index, artist_name):
+        """
+        Returns the ids of the words get_artist_tokens returns, only cleaning the artist's lyrics the first time the
+        song and artist are asked for
+        """
+        key = (song_index, artist_name)
+        if key not in self._artist_token_ids:
+            lyrics = self.get_artist_lyrics(song_index, artist_name)
+            self._artist_token_ids[key] = self.vocabulary.encode(normalize_lyrics(lyrics).split())
+        return self._artist_token_ids[key]
+
+    def get_artist_tokens(self, song_index, artist_name):
+        """
+        Returns the same list as the get_artist_tokens function, see get_artist_token_ids
+        """
+        return self.vocabulary.decode(self.get_artist_token_ids(song_index, artist_name))
+
+    def get_word_counts(self, song_index):
+        """
+        Returns a Counter of every word in the song's tokens, only counting them the first time the song is asked for.
+        The song's word ids are counted, and only turned into words for the Counter
+        """
+        if song_index not in self._word_counts:
+            self._word_counts[song_index] = self.vocabulary.get_word_counts([self.songs[song_index].token_ids])
+        return self._word_counts[song_index]
+
+    def get_ngram_counts(self, song_index, n):
+        """
+        Returns the same Counter as count_ngrams_in_tokens for the song's words, only counting them the first time the
+        song and n are asked for
+        """
+        key = (song_index, n)
+        if key not in self._ngram_counts:
+            self._ngram_counts[key] = count_ngrams_in_tokens(self.songs[song_index].tokens, n)
+        return self._ngram_counts[key]
+
+
+def load_lyric_corpus(path, song_fields=SONG_FIELDS):
+    """
+    Builds a LyricCorpus straight from a lyricsgenius json file. Each song is cleaned as soon as it has been read, so
+    the corpus is built while the file is still being read, and only the song fields the analysis functions use are
+    kept
+
+    Parameters
+    -------
+    path : str
+        the json file to load
+    song_fields : tuple
+        the fields to keep for every song
+
+    Returns
+    -------
+    LyricCorpus
+        the corpus of every song in the file
+    """
+    reader = LyricsFileReader(path, song_fields)
+    corpus = LyricCorpus({'songs': []})
+    for song in reader.iterate_songs():
+        corpus.add_song(song)
+    corpus.data.update(reader.artist)
+    return corpus
+
+
+def refresh_lyric_corpus(corpus, path, song_fields=SONG_FIELDS):
+    """
+    Updates a corpus to a newer lyricsgenius json file, see LyricCorpus.refresh. Prints how many songs changed
+
+    Parameters
+    -------
+    corpus : LyricCorpus
+        the corpus to update
+    path : str
+        the newer json file
+    song_fields : tuple
+        the fields to keep for every song
+
+    Returns
+    -------
+    dict
+        the report from LyricCorpus.refresh
+    """
+    reader = LyricsFileReader(path, song_fields)
+    songs = list(reader.iterate_songs())
+    data = dict(reader.artist)
+    data['songs'] = songs
+    report = corpus.refresh(data)
+    print("Added", len(report['added']), "songs, changed", len(report['changed']), "songs, removed",
+          len(report['removed']), "songs,", report['unchanged'], "songs unchanged")
+    return report
+
+
+def get_cleaned_lyrics(data, song_index):
+    """
+    Gets a song's lyrics with headers and punctuation removed, lowercased. If data is a LyricCorpus, the already
+    cleaned lyrics are returned
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    song_index : int
+        index of the song to get lyrics for
+
+    Returns
+    -------
+    str
+        the cleaned lyrics
+    """
+    if isinstance(data, LyricCorpus):
+        return data.songs[song_index].text
+    return normalize_lyrics(remove_headers_from_lyrics(data['songs'][song_index]['lyrics']))
+
+
+def get_cased_lyrics(data, song_index):
+    """
+    Gets a song's lyrics with headers and punctuation removed, keeping the original casing
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    song_index : int
+        index of the song to get lyrics for
+
+    Returns
+    -------
+    str
+        the cleaned lyrics
+    """
+    if isinstance(data, LyricCorpus):
+        return data.songs[song_index].cased_text
+    return remove_punctuation(remove_headers_from_lyrics(data['songs'][song_index]['lyrics']))
+
+
+def get_song_tokens(data, song_index):
+    """
+    Gets the list of words in a song's cleaned lyrics
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    song_index : int
+        index of the song to get words for
+
+    Returns
+    -------
+    list
+        list of every word in the song, in order
+    """
+    if isinstance(data, LyricCorpus):
+        return data.songs[song_index].tokens
+    return get_cleaned_lyrics(data, song_index).split()
+
+
+def get_song_tokens_with_lines(data, song_index):
+    """
+    Gets the list of words in a song's cleaned lyrics along with where every line starts
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    song_index : int
+        index of the song to get words for
+
+    Returns
+    -------
+    tuple
+        the list of words, and the list of indices of the first word of every line followed by the number of words
+    """
+    if isinstance(data, LyricCorpus):
+        song = data.songs[song_index]
+        return song.tokens, song.line_offsets
+    return split_lines_into_tokens(get_cleaned_lyrics(data, song_index))
+
+
+def get_artist_lyrics(data, song_index, artist_name):
+    """
+    Gets only the lyrics said by the artist in a song, see get_only_artist_lyrics_in_song
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    song_index : int
+        index of the song to retrieve lyrics for
+    artist_name : str
+        string of the artist's name to only get lyrics for
+
+    Returns
+    -------
+    string
+        the string of lyrics only from the specified artist
+    """
+    if isinstance(data, LyricCorpus):
+        return data.get_artist_lyrics(song_index, artist_name)
+    return get_only_artist_lyrics_in_song(data, song_index, artist_name)
+
+
+def get_artist_tokens(data, song_index, artist_name):
+    """
+    Gets the list of words said by the artist in a song, lowercased with punctuation removed
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    song_index : int
+        index of the song to get words for
+    artist_name : str
+        string of the artist's name to only get words for
+
+    Returns
+    -------
+    list
+        list of every word the artist says in the song, in order
+    """
+    if isinstance(data, LyricCorpus):
+        return data.get_artist_tokens(song_index, artist_name)
+    return normalize_lyrics(get_artist_lyrics(data, song_index, artist_name)).split()
+
+
+def get_word_counts(data, song_index):
+    """
+    Counts every word in a song's cleaned lyrics
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    song_index : int
+        index of the song to count words in
+
+    Returns
+    -------
+    Counter
+        Counter object of words and how often they appear. If data is a LyricCorpus, the Counter is shared, so it
+        shouldn't be changed
+    """
+    if isinstance(data, LyricCorpus):
+        return data.get_word_counts(song_index)
+    return Counter(get_song_tokens(data, song_index))
+
+
+def get_ngram_counts(data, song_index, n):
+    """
+    Counts every n word phrase in a song's cleaned lyrics, see count_ngrams_in_tokens
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    song_index : int
+        index of the song to count phrases in
+    n : int
+        number of words in each phrase
+
+    Returns
+    -------
+    Counter
+        Counter object of tuples of n words and how often they appear. If data is a LyricCorpus, this is a copy of the
+        counts it keeps, so it can be changed
+    """
+    if isinstance(data, LyricCorpus):
+        return Counter(data.get_ngram_counts(song_index, n))
+    return count_ngrams_in_tokens(get_song_tokens(data, song_index), n)
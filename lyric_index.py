@@ -0,0 +1,246 @@
+# Indexes built from a LyricCorpus so queries over every song don't have to scan every song's words
+from bisect import bisect_right
+from collections import Counter
+
+
+def count_keywords_in_tokens(tokens, list_of_keywords):
+    """
+    Counts every keyword in a single pass over tokens
+
+    Parameters
+    ----------
+    tokens : list
+        the song's words
+    list_of_keywords : list
+        the words to count
+
+    Returns
+    -------
+    list
+        how often each keyword appears, in the same order as list_of_keywords
+    """
+    word_counts = Counter(tokens)
+    return [word_counts[keyword] for keyword in list_of_keywords]
+
+
+def get_variant_to_groups_map(list_of_list_of_words):
+    """
+    Maps every word in list_of_list_of_words to the indices of the lists it is in, so every word only has to be looked
+    up once no matter how many lists there are
+
+    Parameters
+    ----------
+    list_of_list_of_words : list
+        list of lists of words, e.g. a root word followed by its variants
+
+    Returns
+    -------
+    dict
+        dictionary of word to list of indices into list_of_list_of_words. A word listed twice in the same list is only
+        mapped to it once
+    """
+    variant_to_groups = {}
+    for group_index, words in enumerate(list_of_list_of_words):
+        for word in dict.fromkeys(words):
+            if word in variant_to_groups:
+                variant_to_groups[word].append(group_index)
+            else:
+                variant_to_groups[word] = [group_index]
+    return variant_to_groups
+
+
+def count_variants_in_word_counts(word_counts, variant_to_groups, number_of_groups):
+    """
+    Adds up the counts of every group's words
+
+    Parameters
+    ----------
+    word_counts : Counter
+        Counter object of words and how often they appear
+    variant_to_groups : dict
+        dictionary from get_variant_to_groups_map
+    number_of_groups : int
+        number of lists the map was built from
+
+    Returns
+    -------
+    list
+        the total count of each group's words, in the same order as the lists
+    """
+    group_counts = [0] * number_of_groups
+    # Look up whichever side is smaller
+    if len(variant_to_groups) <= len(word_counts):
+        matches = ((word, word_counts[word]) for word in variant_to_groups if word in word_counts)
+    else:
+        matches = ((word, count) for word, count in word_counts.items() if word in variant_to_groups)
+    for word, count in matches:
+        for group_index in variant_to_groups[word]:
+            group_counts[group_index] = group_counts[group_index] + count
+    return group_counts
+
+
+def count_phrase_at_positions(tokens, line_offsets, phrase_words, start_positions):
+    """
+    Counts how many times phrase_words appears in tokens, only checking the given start positions. A phrase has to be
+    on a single line to count, and occurrences can't overlap (so "la la" is counted once in "la la la").
+
+    Parameters
+    ----------
+    tokens : list
+        the song's words
+    line_offsets : list
+        index into tokens of the first word of every line, plus a final entry equal to len(tokens)
+    phrase_words : list
+        the words of the phrase, in order
+    start_positions : iterable
+        sorted indices into tokens where the phrase could start
+
+    Returns
+    -------
+    int
+        how many times the phrase appears
+    """
+    phrase_length = len(phrase_words)
+    if phrase_length == 0:
+        return 0
+    phrase_count = 0
+    next_allowed_position = 0
+    for position in start_positions:
+        if position < next_allowed_position:
+            continue
+        line_end = line_offsets[bisect_right(line_offsets, position)]
+        if position + phrase_length <= line_end and tokens[position:position + phrase_length] == phrase_words:
+            phrase_count = phrase_count + 1
+            next_allowed_position = position + phrase_length
+    return phrase_count
+
+
+def count_phrase_in_tokens(tokens, line_offsets, phrase_words):
+    """
+    Counts how many times phrase_words appears in tokens by scanning every word, see count_phrase_at_positions
+
+    Parameters
+    ----------
+    tokens : list
+        the song's words
+    line_offsets : list
+        index into tokens of the first word of every line, plus a final entry equal to len(tokens)
+    phrase_words : list
+        the words of the phrase, in order
+
+    Returns
+    -------
+    int
+        how many times the phrase appears
+    """
+    if not phrase_words:
+        return 0
+    first_word = phrase_words[0]
+    start_positions = [position for position, word in enumerate(tokens) if word == first_word]
+    return count_phrase_at_positions(tokens, line_offsets, phrase_words, start_positions)
+
+
+class InvertedIndex:
+    """
+    Maps every word in a LyricCorpus to its postings. A posting is a tuple of (song_index, count, positions) where
+    positions is the list of indices into the song's tokens where the word appears. Postings for a word are kept
+    in song order. Since positions are kept, the index can also answer phrase queries.
+
+    Parameters
+    ----------
+    corpus : LyricCorpus
+        the corpus to index
+    """
+
+    def __init__(self, corpus):
+        self.songs = corpus.songs
+        self.postings = {}
+        for song_index, song in enumerate(corpus.songs):
+            self.add_song(song_index, song.tokens)
+
+    def add_song(self, song_index, tokens):
+        """
+        Adds the postings for one song. Songs must be added in increasing song_index order
+
+        Parameters
+        ----------
+        song_index : int
+            index of the song in the corpus
+        tokens : list
+            the song's words
+        """
+        positions_of_words = {}
+        for position, word in enumerate(tokens):
+            if word in positions_of_words:
+                positions_of_words[word].append(position)
+            else:
+                positions_of_words[word] = [position]
+        for word, positions in positions_of_words.items():
+            posting = (song_index, len(positions), positions)
+            if word in self.postings:
+                self.postings[word].append(posting)
+            else:
+                self.postings[word] = [posting]
+
+    def get_postings(self, word):
+        """
+        Returns the list of postings for the word, or an empty list if the word is not in any song
+        """
+        return self.postings.get(word, [])
+
+    def get_song_counts(self, word):
+        """
+        Returns a dictionary of song index to how often the word appears in that song. Songs without the word are left
+        out
+        """
+        return {song_index: count for song_index, count, positions in self.get_postings(word)}
+
+    def get_total_count(self, word, bad_song_indices=()):
+        """
+        Returns how often the word appears in every song not in bad_song_indices
+        """
+        bad_songs = set(bad_song_indices)
+        return sum(count for song_index, count, positions in self.get_postings(word) if song_index not in bad_songs)
+
+    def get_song_indices(self, word, bad_song_indices=()):
+        """
+        Returns the list of indices of songs that have the word at least once, skipping songs in bad_song_indices
+        """
+        bad_songs = set(bad_song_indices)
+        return [song_index for song_index, count, positions in self.get_postings(word) if song_index not in bad_songs]
+
+    def get_phrase_song_counts(self, phrase_words, bad_song_indices=()):
+        """
+        Counts a phrase in every song using word positions. The positions of the phrase's rarest word are used to find
+        where the phrase could start in each song, and only those spots are checked against the song's words. Phrases
+        are matched word for word on a single line, see count_phrase_at_positions
+
+        Parameters
+        ----------
+        phrase_words : list
+            the words of the phrase, in order
+        bad_song_indices : list
+            list of song indices to skip
+
+        Returns
+        -------
+        dict
+            dictionary of song index to how often the phrase appears in that song, in song order. Songs without the
+            phrase are left out
+        """
+        if not phrase_words:
+            return {}
+        # The word with the fewest postings gives the fewest places to check
+        anchor_offset = min(range(len(phrase_words)), key=lambda i: len(self.get_postings(phrase_words[i])))
+        bad_songs = set(bad_song_indices)
+        song_counts = {}
+        for song_index, count, positions in self.get_postings(phrase_words[anchor_offset]):
+            if song_index in bad_songs:
+                continue
+            song = self.songs[song_index]
+            start_positions = [position - anchor_offset for position in positions if position >= anchor_offset]
+            phrase_count = count_phrase_at_positions(song.tokens, song.line_offsets, phrase_words,
+                                                     start_positions)
+            if phrase_count > 0:
+                song_counts[song_index] = phrase_count
+        return song_counts
@@ -0,0 +1,188 @@
+# Reads the json made by lyricsgenius a piece at a time. Songs can be used while the rest of the file is still being
+# read, and the fields that are never used (media, stats, annotations...) are dropped as soon as each song is read, so
+# memory use doesn't grow with the size of the file
+import json
+
+# The fields kept for every song and for the artist, everything else is dropped
+SONG_FIELDS = ('id', 'title', 'artist', 'primary_artist', 'featured_artists', 'lyrics')
+ARTIST_FIELDS = ('id', 'name')
+READ_SIZE = 1 << 16
+JSON_WHITESPACE = ' \t\n\r'
+
+_decoder = json.JSONDecoder()
+
+
+def get_song_record(song, song_fields=SONG_FIELDS):
+    """
+    Makes a lightweight copy of a song from the json with only the fields in song_fields. The primary and featured
+    artists only keep their name
+
+    Parameters
+    -------
+    song : dict
+        a song from the json's "songs" list
+    song_fields : tuple
+        the fields to keep
+
+    Returns
+    -------
+    dict
+        the song with only song_fields in it
+    """
+    record = {field: song[field] for field in song_fields if field in song}
+    if record.get('primary_artist'):
+        record['primary_artist'] = {'name': record['primary_artist']['name']}
+    if record.get('featured_artists'):
+        record['featured_artists'] = [{'name': artist['name']} for artist in record['featured_artists']]
+    return record
+
+
+class LyricsFileReader:
+    """
+    Walks the top level object of a lyricsgenius json file and its "songs" list without loading the whole file. Every
+    value is decoded on its own with json's raw_decode, so only one song is ever held in full at a time
+
+    Parameters
+    ----------
+    path : str
+        the json file to read
+    song_fields : tuple
+        the fields to keep for every song
+    artist_fields : tuple
+        the top level fields to keep in artist
+    read_size : int
+        number of characters to read from the file at a time
+
+    Attributes
+    ----------
+    artist : dict
+        the artist_fields read so far. It is only complete once iterate_songs has finished
+    """
+
+    def __init__(self, path, song_fields=SONG_FIELDS, artist_fields=ARTIST_FIELDS, read_size=READ_SIZE):
+        self.path = path
+        self.song_fields = song_fields
+        self.artist_fields = artist_fields
+        self.read_size = read_size
+        self.artist = {}
+        self._file = None
+        self._buffer = ''
+        self._position = 0
+        self._end_of_file = False
+
+    def _read_more(self, size):
+        """
+        Adds up to size more characters to the buffer, dropping the characters that were already used. Returns False if
+        the end of the file was reached
+        """
+        chunk = self._file.read(size)
+        if not chunk:
+            self._end_of_file = True
+            return False
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def _peek(self):
+        """
+        Skips whitespace and returns the next character without using it, or '' at the end of the file
+        """
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in JSON_WHITESPACE:
+                self._position = self._position + 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read_more(self.read_size):
+                return ''
+
+    def _expect(self, characters):
+        """
+        Uses the next character, which has to be one of characters, and returns it
+        """
+        character = self._peek()
+        if not character or character not in characters:
+            raise ValueError("Expected one of " + repr(characters) + " at character " + str(self._position) + " of a "
+                             "chunk of " + self.path + ", found " + repr(character))
+        self._position = self._position + 1
+        return character
+
+    def _decode_value(self):
+        """
+        Decodes the next json value. If the value isn't all in the buffer yet, more of the file is read, at least
+        doubling the buffer each time so long values don't get decoded over and over
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._position)
+                # A number at the very end of the buffer might continue in the next chunk
+                if end < len(self._buffer) or self._end_of_file:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._end_of_file:
+                    raise
+            self._read_more(max(self.read_size, len(self._buffer) - self._position))
+
+    def iterate_songs(self):
+        """
+        Yields a record (see get_song_record) for every song in the file's "songs" list, in order, as soon as the song
+        has been read. The artist fields are filled in along the way
+
+        Returns
+        -------
+        generator
+            generator of song dictionaries with only song_fields in them
+        """
+        with open(self.path, encoding='utf-8') as json_file:
+            self._file = json_file
+            self._buffer = ''
+            self._position = 0
+            self._end_of_file = False
+            self._expect('{')
+            if self._peek() == '}':
+                return
+            while True:
+                key = self._decode_value()
+                self._expect(':')
+                if key == 'songs':
+                    self._expect('[')
+                    if self._peek() == ']':
+                        self._position = self._position + 1
+                    else:
+                        while True:
+                            yield get_song_record(self._decode_value(), self.song_fields)
+                            if self._expect(',]') == ']':
+                                break
+                else:
+                    value = self._decode_value()
+                    if key in self.artist_fields:
+                        self.artist[key] = value
+                if self._expect(',}') == '}':
+                    break
+            self._file = None
+            self._buffer = ''
+
+
+def load_lyrics_file(path, song_fields=SONG_FIELDS):
+    """
+    Loads a lyricsgenius json file with only the fields the analysis functions use. The result can be given to any
+    function that takes data, like the json loaded with json.load
+
+    Parameters
+    -------
+    path : str
+        the json file to load
+    song_fields : tuple
+        the fields to keep for every song
+
+    Returns
+    -------
+    dict
+        dictionary of the artist fields and "songs", the list of song records
+    """
+    reader = LyricsFileReader(path, song_fields)
+    songs = list(reader.iterate_songs())
+    data = dict(reader.artist)
+    data['songs'] = songs
+    return data
@@ -0,0 +1,39 @@
+# Finds the sections of a song's lyrics said by a featured artist as (start, end) spans into the lyrics, so the lyrics
+# of an artist are found in a single pass over the lyrics
+
+
+def find_artist_segments(lyrics, artist_name):
+    """
+    Finds every section of lyrics under a header that credits artist_name (e.g. [Verse 1: Khalid]). A section starts
+    right after the header and ends at the next blank line, or at the end of the lyrics
+
+    Parameters
+    -------
+    lyrics : str
+        the song's lyrics as they are in the json
+    artist_name : str
+        string of the artist's name to find sections for
+
+    Returns
+    -------
+    list
+        list of (start, end) tuples of indices into lyrics, in song order. Empty if no header credits the artist
+    """
+    segments = []
+    artist_header = ': ' + artist_name
+    header_start = lyrics.find(artist_header)
+    while header_start != -1:
+        start = header_start + len(artist_name) + 4  # Skip the header and get right to the lyrics
+        end = lyrics.find('\n\n', start)
+        if end == -1:  # If the section is last in the whole song, \n\n won't be found
+            end = len(lyrics)
+        segments.append((start, end))
+        header_start = lyrics.find(artist_header, end)
+    return segments
+
+
+def join_artist_segments(lyrics, segments):
+    """
+    Joins the lyrics of every segment from find_artist_segments, each one starting on a new line
+    """
+    return ''.join('\n' + lyrics[start:end] for start, end in segments)
@@ -0,0 +1,90 @@
+# Aho-Corasick automaton over words, used to count a whole list of phrases in a single pass over a song
+from collections import deque
+from string_cleanup_functions import normalize_search_term
+
+
+class PhraseMatcher:
+    """
+    Counts many phrases at once. The phrases are put into a trie of words with failure links (an Aho-Corasick
+    automaton), so a song's words only have to be read once no matter how many phrases there are.
+
+    Phrases are matched the same way as find_phrase_count_in_song: word for word, on a single line, and occurrences of
+    the same phrase can't overlap.
+
+    Parameters
+    ----------
+    list_of_phrases : list
+        the phrases to count. Phrases are lowercased and split into words
+    """
+
+    def __init__(self, list_of_phrases):
+        self.list_of_phrases = list(list_of_phrases)
+        self.phrase_lengths = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+
+        # Build the trie
+        for phrase_id, phrase in enumerate(self.list_of_phrases):
+            phrase_words = normalize_search_term(phrase).split()
+            self.phrase_lengths.append(len(phrase_words))
+            if not phrase_words:  # An empty phrase is never counted
+                continue
+            state = 0
+            for word in phrase_words:
+                if word not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                    self.goto[state][word] = len(self.goto) - 1
+                state = self.goto[state][word]
+            self.outputs[state].append(phrase_id)
+
+        # Breadth first pass to set the failure links, a state's outputs also include its failure state's outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail_state = self.fail[state]
+                while fail_state and word not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.goto[fail_state].get(word, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def count_in_tokens(self, tokens, line_offsets):
+        """
+        Counts every phrase in a song
+
+        Parameters
+        ----------
+        tokens : list
+            the song's words
+        line_offsets : list
+            index into tokens of the first word of every line, plus a final entry equal to len(tokens)
+
+        Returns
+        -------
+        list
+            how often each phrase appears, in the same order as list_of_phrases
+        """
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        phrase_lengths = self.phrase_lengths
+        phrase_counts = [0] * len(self.list_of_phrases)
+        # Stops overlapping occurrences of the same phrase from being counted
+        next_allowed_position = [0] * len(self.list_of_phrases)
+
+        for line_number in range(len(line_offsets) - 1):
+            state = 0  # Phrases can't go across lines, so start over on every line
+            for position in range(line_offsets[line_number], line_offsets[line_number + 1]):
+                word = tokens[position]
+                while state and word not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(word, 0)
+                for phrase_id in outputs[state]:
+                    if position - phrase_lengths[phrase_id] + 1 >= next_allowed_position[phrase_id]:
+                        phrase_counts[phrase_id] = phrase_counts[phrase_id] + 1
+                        next_allowed_position[phrase_id] = position + 1
+        return phrase_counts
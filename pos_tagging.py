@@ -0,0 +1,264 @@
+# Part of speech tagging with spacy. The pipeline is only loaded once per process, and every text is only tagged once.
+# Tags can also be kept in a SQLite file so they survive restarts
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from importlib import metadata
+
+SPACY_MODEL_NAME = "en_core_web_sm"
+# Only the tagger (and the attribute ruler that turns its tags into pos') and the lemmatizer are needed
+SPACY_DISABLED_COMPONENTS = ["parser", "ner"]
+POS_TAG_CACHE_FILE = "pos_tag_cache.sqlite"
+
+_nlp = None
+_model_version = None
+_pos_tag_cache = {}
+_disk_cache = None
+
+
+def get_spacy_pipeline():
+    """
+    Returns the spacy pipeline, loading it the first time it is asked for. spacy is only imported then, since it takes
+    some time to load
+    """
+    global _nlp
+    if _nlp is None:
+        import spacy
+        _nlp = spacy.load(SPACY_MODEL_NAME, disable=SPACY_DISABLED_COMPONENTS)
+    return _nlp
+
+
+def get_spacy_model_version():
+    """
+    Returns a string of the spacy and model versions. The installed package versions are used when they can be found,
+    so the pipeline doesn't have to be loaded just to check the disk cache
+    """
+    global _model_version
+    if _model_version is None:
+        try:
+            model_package_version = metadata.version(SPACY_MODEL_NAME)
+            _model_version = metadata.version("spacy") + '/' + SPACY_MODEL_NAME + '-' + model_package_version
+        except metadata.PackageNotFoundError:
+            import spacy
+            _model_version = spacy.__version__ + '/' + SPACY_MODEL_NAME + '-' + get_spacy_pipeline().meta['version']
+    return _model_version
+
+
+def encode_pos_tags(pos_tags):
+    """
+    Packs a tuple of (text, pos, lemma) tuples into compressed bytes, storing the texts, pos' and lemmas as three lists
+    """
+    columns = [[tag[i] for tag in pos_tags] for i in range(3)]
+    return zlib.compress(json.dumps(columns, ensure_ascii=False).encode('utf-8'))
+
+
+def decode_pos_tags(blob):
+    """
+    Unpacks bytes made by encode_pos_tags back into a tuple of (text, pos, lemma) tuples
+    """
+    texts, list_of_pos, lemmas = json.loads(zlib.decompress(blob).decode('utf-8'))
+    return tuple(zip(texts, list_of_pos, lemmas))
+
+
+class PosTagDiskCache:
+    """
+    SQLite file of tagged texts. Each text's tags are stored under a hash of the text and the model version, so texts
+    that changed or were tagged by a different model are tagged again
+
+    Parameters
+    ----------
+    path : str
+        the file to keep the tags in, it is created if it doesn't exist
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS pos_tags (key TEXT PRIMARY KEY, tags BLOB NOT NULL)')
+        self.connection.commit()
+
+    @staticmethod
+    def get_key(text, model_version):
+        """
+        Returns the key a text's tags are stored under
+        """
+        return hashlib.sha256((model_version + '\0' + text).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the stored tags for key, or None if there aren't any
+        """
+        row = self.connection.execute('SELECT tags FROM pos_tags WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return decode_pos_tags(row[0])
+
+    def put_many(self, keys_and_pos_tags):
+        """
+        Stores a list of (key, tags) pairs in a single transaction
+        """
+        self.connection.executemany('INSERT OR REPLACE INTO pos_tags (key, tags) VALUES (?, ?)',
+                                    [(key, encode_pos_tags(pos_tags)) for key, pos_tags in keys_and_pos_tags])
+        self.connection.commit()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM pos_tags').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+def use_pos_tag_cache_file(path=POS_TAG_CACHE_FILE):
+    """
+    Keeps tags in a SQLite file from now on, so texts tagged in an earlier run aren't tagged again. Give None to stop
+    using the file
+
+    Parameters
+    ----------
+    path : str
+        the file to keep the tags in, optional param
+    """
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.close()
+    _disk_cache = PosTagDiskCache(path) if path is not None else None
+
+
+def get_pos_tags_from_doc(doc):
+    """
+    Returns a tuple of (text, pos, lemma) tuples, one per token in a spacy doc
+    """
+    return tuple((token.text, token.pos_, token.lemma_) for token in doc)
+
+
+def get_pos_tags(text):
+    """
+    Tags a text with spacy, only running the pipeline the first time the text is asked for
+
+    Parameters
+    ----------
+    text : str
+        the text to tag
+
+    Returns
+    -------
+    tuple
+        tuple of (text, pos, lemma) tuples, one per token
+    """
+    if text not in _pos_tag_cache:
+        annotate_texts([text])
+    return _pos_tag_cache[text]
+
+
+def tag_texts(texts, batch_size=64):
+    """
+    Tags texts with nlp.pipe without looking at or filling any cache. This is what each worker process runs
+
+    Parameters
+    ----------
+    texts : list
+        the texts to tag
+    batch_size : int
+        number of texts spacy tags at a time
+
+    Returns
+    -------
+    list
+        list of tuples of (text, pos, lemma) tuples, one per text
+    """
+    return [get_pos_tags_from_doc(doc) for doc in get_spacy_pipeline().pipe(texts, batch_size=batch_size)]
+
+
+def annotate_texts(texts, batch_size=64, workers=1):
+    """
+    Tags many texts with spacy's nlp.pipe, which is much faster than tagging them one at a time. Texts that were
+    already tagged, in this run or in the cache file given to use_pos_tag_cache_file, aren't tagged again
+
+    Parameters
+    ----------
+    texts : list
+        the texts to tag
+    batch_size : int
+        number of texts spacy tags at a time
+    workers : int
+        number of processes to tag with, None to use every cpu. Texts are sent to the processes batch_size at a time
+
+    Returns
+    -------
+    list
+        list of tuples of (text, pos, lemma) tuples, one per text
+    """
+    untagged_texts = list(dict.fromkeys(text for text in texts if text not in _pos_tag_cache))
+    if untagged_texts and _disk_cache is not None:
+        model_version = get_spacy_model_version()
+        keys = {}
+        for text in untagged_texts:
+            keys[text] = PosTagDiskCache.get_key(text, model_version)
+            pos_tags = _disk_cache.get(keys[text])
+            if pos_tags is not None:
+                _pos_tag_cache[text] = pos_tags
+        untagged_texts = [text for text in untagged_texts if text not in _pos_tag_cache]
+
+    if untagged_texts:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers > 1 and len(untagged_texts) > batch_size:
+            # Each worker loads its own pipeline once and tags whole batches, the tags come back in order
+            chunks = [untagged_texts[i:i + batch_size] for i in range(0, len(untagged_texts), batch_size)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list_of_pos_tags = [pos_tags for chunk_pos_tags in
+                                    executor.map(partial(tag_texts, batch_size=batch_size), chunks)
+                                    for pos_tags in chunk_pos_tags]
+        else:
+            list_of_pos_tags = tag_texts(untagged_texts, batch_size)
+        for text, pos_tags in zip(untagged_texts, list_of_pos_tags):
+            _pos_tag_cache[text] = pos_tags
+        if _disk_cache is not None:
+            _disk_cache.put_many([(keys[text], _pos_tag_cache[text]) for text in untagged_texts])
+    return [_pos_tag_cache[text] for text in texts]
+
+
+def count_pos_in_texts(texts, pos, batch_size=64, workers=1):
+    """
+    Counts every word spacy tags as pos in a list of texts, tagging them with annotate_texts. Prints how many texts
+    were counted per second
+
+    Parameters
+    ----------
+    texts : list
+        the texts to count words in
+    pos : str
+        the part of speech to count
+    batch_size : int
+        number of texts spacy tags at a time
+    workers : int
+        number of processes to tag with, None to use every cpu
+
+    Returns
+    -------
+    counts : Counter
+        Counter object of every word tagged as pos and its count, in the order the words first appear
+    """
+    start_time = time.perf_counter()
+    counts = Counter()
+    for pos_tags in annotate_texts(texts, batch_size, workers):
+        counts.update(text for text, token_pos, lemma in pos_tags if token_pos == pos)
+    seconds = time.perf_counter() - start_time
+    if seconds > 0:
+        print("Counted", len(texts), "songs in", round(seconds, 2), "seconds (" + str(round(len(texts) / seconds, 1)),
+              "songs/second)")
+    return counts
+
+
+def clear_pos_tag_cache():
+    """
+    Forgets every tagged text kept in memory, e.g. to free memory after analyzing a large corpus. The cache file is
+    left alone
+    """
+    _pos_tag_cache.clear()
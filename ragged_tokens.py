@@ -0,0 +1,137 @@
+# Every song's word ids in one flat array with an offsets array marking where each song starts, so statistics of every
+# song (number of words, number of different words, how often a word appears) are a few array operations over the
+# whole corpus instead of a loop over the songs
+from array import array
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, every song is looped over without it
+    numpy = None
+
+
+class RaggedTokenArray:
+    """
+    The word ids of every song, stored as one flat array. The ids of song i are token_ids[offsets[i]:offsets[i + 1]]
+
+    Parameters
+    ----------
+    token_ids : array, memoryview or numpy array
+        the word ids of every song, one song after the other. A buffer is used without being copied
+    offsets : array, memoryview, list or numpy array
+        the index of the first id of every song, plus a final entry equal to the number of ids
+    """
+
+    def __init__(self, token_ids, offsets):
+        if numpy is not None:
+            token_ids = numpy.asarray(token_ids)
+            offsets = numpy.asarray(offsets, dtype=numpy.int64)
+        self.token_ids = token_ids
+        self.offsets = offsets
+        self._song_of_token = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get_song_token_ids(self, song_index):
+        """
+        Returns the word ids of a song, without copying them
+        """
+        return self.token_ids[self.offsets[song_index]:self.offsets[song_index + 1]]
+
+    def get_song_of_token(self):
+        """
+        Returns the numpy array of the song index of every id in token_ids, building it the first time it is asked for
+        """
+        if self._song_of_token is None:
+            self._song_of_token = numpy.repeat(numpy.arange(len(self), dtype=numpy.int64), numpy.diff(self.offsets))
+        return self._song_of_token
+
+    def get_song_lengths(self):
+        """
+        Returns the list of the number of words in every song
+        """
+        if numpy is not None:
+            return numpy.diff(self.offsets).tolist()
+        return [self.offsets[i + 1] - self.offsets[i] for i in range(len(self))]
+
+    def get_token_counts(self, token_id):
+        """
+        Returns the list of how often token_id appears in every song. A token_id of None (a word that isn't in the
+        vocabulary) appears 0 times in every song
+        """
+        if token_id is None:
+            return [0] * len(self)
+        if numpy is not None:
+            return numpy.bincount(self.get_song_of_token()[self.token_ids == token_id], minlength=len(self)).tolist()
+        return [list(self.get_song_token_ids(i)).count(token_id) for i in range(len(self))]
+
+    def get_distinct_counts(self):
+        """
+        Returns the list of the number of different words in every song
+        """
+        if numpy is not None:
+            if not len(self.token_ids):
+                return [0] * len(self)
+            number_of_ids = int(self.token_ids.max()) + 1
+            # Each (song, id) pair is turned into a single key, so once the keys are sorted the first of every run of
+            # equal keys is a different word of its song
+            keys = numpy.sort(self.get_song_of_token() * number_of_ids + self.token_ids.astype(numpy.int64))
+            is_first = numpy.empty(len(keys), dtype=bool)
+            is_first[0] = True
+            numpy.not_equal(keys[1:], keys[:-1], out=is_first[1:])
+            return numpy.bincount(keys[is_first] // number_of_ids, minlength=len(self)).tolist()
+        return [len(set(self.get_song_token_ids(i))) for i in range(len(self))]
+
+
+def concatenate_token_ids(list_of_token_ids):
+    """
+    Builds a RaggedTokenArray by copying every song's word ids into one array
+
+    Parameters
+    ----------
+    list_of_token_ids : iterable
+        the word ids of every song, in song order
+
+    Returns
+    -------
+    RaggedTokenArray
+        the word ids of every song
+    """
+    token_ids = array('I')
+    offsets = array('q', [0])
+    for song_token_ids in list_of_token_ids:
+        token_ids.extend(song_token_ids)
+        offsets.append(len(token_ids))
+    return RaggedTokenArray(token_ids, offsets)
+
+
+def find_max_song(values, excluded_song_indices=()):
+    """
+    Finds the song with the highest value, ignoring the excluded songs. The first song wins a tie
+
+    Parameters
+    ----------
+    values : list
+        one value per song, e.g. from RaggedTokenArray.get_song_lengths
+    excluded_song_indices : iterable
+        songs to ignore
+
+    Returns
+    -------
+    tuple
+        the index of the song and its value, or (None, 0) if every song is excluded
+    """
+    excluded = set(excluded_song_indices)
+    if numpy is not None and len(values):
+        values = numpy.asarray(values)
+        is_included = numpy.ones(len(values), dtype=bool)
+        is_included[[i for i in excluded if 0 <= i < len(values)]] = False
+        if not is_included.any():
+            return None, 0
+        song_index = int(numpy.argmax(numpy.where(is_included, values, values.min() - 1)))
+        return song_index, values[song_index].item()
+    best_index, best_value = None, 0
+    for song_index, value in enumerate(values):
+        if song_index not in excluded and (best_index is None or value > best_value):
+            best_index, best_value = song_index, value
+    return best_index, best_value
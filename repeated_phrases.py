@@ -0,0 +1,307 @@
+# Suffix array based mining of repeated phrases, so every repeated phrase can be found without building every phrase
+from bisect import bisect_right
+from collections import Counter
+import heapq
+
+
+def get_token_ids(tokens, vocabulary=None):
+    """
+    Maps every word to an int id, so suffixes can be compared as lists of ints
+
+    Parameters
+    ----------
+    tokens : list
+        list of words
+    vocabulary : dict
+        dictionary of word to id to add new words to, optional param
+
+    Returns
+    -------
+    list
+        list of ids, one per word in tokens
+    """
+    if vocabulary is None:
+        vocabulary = {}
+    token_ids = []
+    for word in tokens:
+        if word not in vocabulary:
+            vocabulary[word] = len(vocabulary)
+        token_ids.append(vocabulary[word])
+    return token_ids
+
+
+def build_suffix_array(token_ids):
+    """
+    Sorts every suffix of token_ids using prefix doubling, O(n log^2 n)
+
+    Parameters
+    ----------
+    token_ids : list
+        list of ints
+
+    Returns
+    -------
+    list
+        list of suffix start positions in sorted order
+    """
+    n = len(token_ids)
+    suffix_array = sorted(range(n), key=token_ids.__getitem__)
+    rank = [0] * n
+    for i in range(1, n):
+        previous, current = suffix_array[i - 1], suffix_array[i]
+        rank[current] = rank[previous] + (token_ids[current] != token_ids[previous])
+
+    k = 1
+    while n and rank[suffix_array[-1]] < n - 1:  # Stop once every suffix has its own rank
+        # The pair (rank[i], rank[i + k]) packed into one int, so every key is built once per round
+        sort_keys = [rank[i] * (n + 1) + (rank[i + k] + 1 if i + k < n else 0) for i in range(n)]
+        suffix_array.sort(key=sort_keys.__getitem__)
+        new_rank = [0] * n
+        for i in range(1, n):
+            previous, current = suffix_array[i - 1], suffix_array[i]
+            new_rank[current] = new_rank[previous] + (sort_keys[current] != sort_keys[previous])
+        rank = new_rank
+        k = k * 2
+    return suffix_array
+
+
+def build_lcp_array(token_ids, suffix_array):
+    """
+    Finds the longest common prefix of every pair of neighbouring suffixes using Kasai's algorithm, O(n)
+
+    Parameters
+    ----------
+    token_ids : list
+        list of ints
+    suffix_array : list
+        sorted suffix start positions from build_suffix_array
+
+    Returns
+    -------
+    list
+        lcp[i] is the length of the longest common prefix of suffix_array[i - 1] and suffix_array[i], lcp[0] is 0
+    """
+    n = len(token_ids)
+    rank = [0] * n
+    for i, suffix in enumerate(suffix_array):
+        rank[suffix] = i
+    lcp = [0] * n
+    common = 0
+    for suffix in range(n):
+        if rank[suffix] == 0:
+            common = 0
+            continue
+        previous_suffix = suffix_array[rank[suffix] - 1]
+        while (suffix + common < n and previous_suffix + common < n
+               and token_ids[suffix + common] == token_ids[previous_suffix + common]):
+            common = common + 1
+        lcp[rank[suffix]] = common
+        if common:
+            common = common - 1
+    return lcp
+
+
+def iterate_lcp_intervals(suffix_array, lcp, document_of_position=None):
+    """
+    Walks every lcp interval (every internal node of the suffix tree) bottom up. Every phrase that appears more than
+    once belongs to exactly one interval: the phrases of lengths parent_lcp + 1 through interval_lcp starting at any of
+    the interval's suffixes.
+
+    If document_of_position is given, the number of different documents (songs) each interval's suffixes come from is
+    counted as well. Every suffix is paired with the previous suffix (in suffix array order) from the same document,
+    and the pair is marked as a duplicate on the deepest interval holding both of them. An interval's document count is
+    its size minus the duplicates marked on it and on the intervals below it.
+
+    Parameters
+    ----------
+    suffix_array : list
+        sorted suffix start positions
+    lcp : list
+        lcp array from build_lcp_array
+    document_of_position : list
+        the document number of every position, optional param
+
+    Returns
+    -------
+    generator
+        yields tuples of (interval_lcp, parent_lcp, left_bound, right_bound, first_position, number_of_documents)
+        where the bounds are inclusive indices into suffix_array, first_position is the smallest suffix start in the
+        interval and number_of_documents is None if document_of_position wasn't given
+    """
+    n = len(suffix_array)
+    # The stack is kept as parallel lists so the left bounds can be binary searched
+    stack_lcp = [0]
+    stack_left_bound = [0]
+    stack_first_position = [n]
+    stack_duplicates = [0]
+    last_index_of_document = {}
+    for i in range(1, n + 1):
+        current_lcp = lcp[i] if i < n else 0
+        left_bound = i - 1
+        first_position = suffix_array[i - 1]
+        duplicates = 0
+        while current_lcp < stack_lcp[-1]:
+            interval_lcp = stack_lcp.pop()
+            interval_left_bound = stack_left_bound.pop()
+            first_position = min(first_position, stack_first_position.pop())
+            duplicates = duplicates + stack_duplicates.pop()
+            number_of_documents = None
+            if document_of_position is not None:
+                number_of_documents = i - interval_left_bound - duplicates
+            yield (interval_lcp, max(current_lcp, stack_lcp[-1]), interval_left_bound, i - 1, first_position,
+                   number_of_documents)
+            left_bound = interval_left_bound
+        if current_lcp > stack_lcp[-1]:
+            stack_lcp.append(current_lcp)
+            stack_left_bound.append(left_bound)
+            stack_first_position.append(first_position)
+            stack_duplicates.append(duplicates)
+        else:
+            stack_first_position[-1] = min(stack_first_position[-1], first_position)
+            stack_duplicates[-1] = stack_duplicates[-1] + duplicates
+
+        if document_of_position is not None and i < n:
+            document = document_of_position[suffix_array[i]]
+            if document in last_index_of_document:
+                # Every interval on the stack holds suffix i, the deepest one holding the previous suffix from the same
+                # document is the last one that starts at or before it
+                holder = bisect_right(stack_left_bound, last_index_of_document[document]) - 1
+                stack_duplicates[holder] = stack_duplicates[holder] + 1
+            last_index_of_document[document] = i
+
+
+def find_repeated_phrases_in_tokens(tokens, min_length=1, min_count=2, top_k=None):
+    """
+    Finds every phrase that appears at least min_count times in tokens using a suffix array, so only the phrases that
+    are reported ever get built. Phrases are ordered the same way as building every phrase by length and then by first
+    appearance, so ties in most_common() come out in the same order.
+
+    Parameters
+    ----------
+    tokens : list
+        list of words
+    min_length : int
+        shortest phrase (in words) to include
+    min_count : int
+        fewest times a phrase has to appear to be included. With 1, every phrase is included, which can be a lot of
+        phrases for a long song
+    top_k : int
+        if given, only the top_k most common phrases are kept
+
+    Returns
+    -------
+    phrase_counts : Counter
+        Counter object of phrases and how often they appear
+    """
+    token_ids = get_token_ids(tokens)
+    suffix_array = build_suffix_array(token_ids)
+    lcp = build_lcp_array(token_ids, suffix_array)
+    n = len(tokens)
+    min_length = max(min_length, 1)
+
+    found_phrases = []  # (phrase_length, first_position, count)
+    for interval_lcp, parent_lcp, left_bound, right_bound, first_position, number_of_documents in \
+            iterate_lcp_intervals(suffix_array, lcp):
+        count = right_bound - left_bound + 1
+        if count < min_count:
+            continue
+        for phrase_length in range(max(parent_lcp + 1, min_length), interval_lcp + 1):
+            found_phrases.append((phrase_length, first_position, count))
+    if min_count <= 1:  # Phrases that only appear once are the ones longer than any shared prefix of their suffix
+        for i, suffix in enumerate(suffix_array):
+            longest_shared = max(lcp[i], lcp[i + 1] if i + 1 < n else 0)
+            for phrase_length in range(max(longest_shared + 1, min_length), n - suffix + 1):
+                found_phrases.append((phrase_length, suffix, 1))
+
+    found_phrases.sort()
+    if top_k is not None:
+        found_phrases = heapq.nlargest(top_k, found_phrases, key=lambda found_phrase: found_phrase[2])
+
+    phrase_counts = Counter()
+    for phrase_length, first_position, count in found_phrases:
+        phrase_counts[' '.join(tokens[first_position:first_position + phrase_length])] = count
+    return phrase_counts
+
+
+def find_repeated_phrases_in_songs(list_of_token_lists, min_length=2, max_length=None, min_count=2, min_songs=1,
+                                   top_k=None, sort_by='count'):
+    """
+    Finds every phrase that appears at least min_count times across many songs using a single suffix array over every
+    song's words. Each song is followed by its own separator id, so no phrase can run from one song into the next.
+
+    Parameters
+    ----------
+    list_of_token_lists : list
+        list of songs, where each song is the list of its words
+    min_length : int
+        shortest phrase (in words) to include
+    max_length : int
+        longest phrase (in words) to include, optional param. Songs in the corpus more than once (remixes, live
+        versions) share very long phrases, this keeps them from being reported at every length
+    min_count : int
+        fewest times a phrase has to appear in total to be included, at least 2
+    min_songs : int
+        fewest songs a phrase has to appear in to be included
+    top_k : int
+        if given, only the top_k phrases are kept. Only top_k phrases are held in memory while the suffix array is
+        walked
+    sort_by : str
+        'count' to sort by total count, 'songs' to sort by the number of songs, 'length' to sort longest first
+
+    Returns
+    -------
+    list
+        list of tuples of (phrase, total_count, number_of_songs), ties are ordered by phrase length and then by first
+        appearance
+    """
+    if sort_by == 'count':
+        def sort_key(phrase_length, first_position, count, number_of_songs):
+            return -count, phrase_length, first_position
+    elif sort_by == 'songs':
+        def sort_key(phrase_length, first_position, count, number_of_songs):
+            return -number_of_songs, -count, phrase_length, first_position
+    elif sort_by == 'length':
+        def sort_key(phrase_length, first_position, count, number_of_songs):
+            return -phrase_length, -count, first_position
+    else:
+        print("sort_by must be 'count', 'songs' or 'length'")
+        return []
+    if top_k is not None and top_k <= 0:
+        return []
+
+    vocabulary = {}
+    token_ids = []
+    all_tokens = []
+    song_of_position = []
+    for song_number, tokens in enumerate(list_of_token_lists):
+        token_ids.extend(get_token_ids(tokens, vocabulary))
+        token_ids.append(-1 - song_number)  # Separator ids are negative so they never match a word or each other
+        all_tokens.extend(tokens)
+        all_tokens.append(None)
+        song_of_position.extend([song_number] * (len(tokens) + 1))
+
+    suffix_array = build_suffix_array(token_ids)
+    lcp = build_lcp_array(token_ids, suffix_array)
+    min_length = max(min_length, 1)
+    min_count = max(min_count, 2)
+
+    found_phrases = []  # (negated sort key, phrase_length, first_position, count, number_of_songs)
+    for interval_lcp, parent_lcp, left_bound, right_bound, first_position, number_of_songs in \
+            iterate_lcp_intervals(suffix_array, lcp, song_of_position):
+        count = right_bound - left_bound + 1
+        if count < min_count or number_of_songs < min_songs:
+            continue
+        longest = interval_lcp if max_length is None else min(interval_lcp, max_length)
+        for phrase_length in range(max(parent_lcp + 1, min_length), longest + 1):
+            key = sort_key(phrase_length, first_position, count, number_of_songs)
+            found_phrase = (tuple(-k for k in key), phrase_length, first_position, count, number_of_songs)
+            if top_k is None:
+                found_phrases.append(found_phrase)
+            elif len(found_phrases) < top_k:
+                heapq.heappush(found_phrases, found_phrase)
+            elif found_phrase > found_phrases[0]:  # The heap's first entry is the worst phrase kept so far
+                heapq.heapreplace(found_phrases, found_phrase)
+
+    found_phrases.sort(reverse=True)
+    return [(' '.join(all_tokens[first_position:first_position + phrase_length]), count, number_of_songs)
+            for key, phrase_length, first_position, count, number_of_songs in found_phrases]
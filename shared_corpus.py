@@ -0,0 +1,51 @@
+# Binary corpus kept in a multiprocessing.shared_memory block instead of a file, so worker processes can attach to
+# the tokenized songs without them being pickled and copied into every process
+from multiprocessing.shared_memory import SharedMemory
+from binary_corpus import MappedLyricCorpus, get_binary_corpus_bytes
+
+
+def create_shared_corpus(data):
+    """
+    Writes the songs of data as a binary corpus to a new shared memory block. The songs of a LyricCorpus are used
+    without cleaning them again. The block stays until it is unlinked, so the caller has to close and unlink it once
+    every process is done with it
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+
+    Returns
+    -------
+    SharedMemory
+        the shared memory block, which can be attached to by name with SharedLyricCorpus
+    """
+    corpus_bytes = get_binary_corpus_bytes(data)
+    shared_memory = SharedMemory(create=True, size=len(corpus_bytes))
+    shared_memory.buf[:len(corpus_bytes)] = corpus_bytes
+    return shared_memory
+
+
+class SharedLyricCorpus(MappedLyricCorpus):
+    """
+    MappedLyricCorpus read straight from a shared memory block made by create_shared_corpus. Every process that
+    attaches to the same block reads the same pages
+
+    Parameters
+    ----------
+    name : str
+        the name of the shared memory block
+    """
+
+    def __init__(self, name):
+        self.path = None
+        self.name = name
+        self._shared_memory = SharedMemory(name=name)
+        self._load(self._shared_memory.buf, name)
+
+    def _release_buffer(self):
+        """
+        Detaches from the shared memory block without unlinking it
+        """
+        self._buffer = None
+        self._shared_memory.close()
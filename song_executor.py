@@ -0,0 +1,150 @@
+# Runs a per-song function over many songs in a process pool. The songs are split into chunks of neighbouring songs,
+# every worker is given data once when it starts, and each chunk's results are merged in the worker and then merged
+# again in song order, so the result is the same as running the function on every song one after the other
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from binary_corpus import MappedLyricCorpus, open_binary_corpus
+from lyric_corpus import LyricCorpus
+from shared_corpus import SharedLyricCorpus, create_shared_corpus
+
+# Number of chunks given to each worker, so a worker that gets the short songs can pick up more chunks
+CHUNKS_PER_WORKER = 4
+
+_worker_data = None
+
+
+def add_numbers(results):
+    """
+    Merges int results by adding them up
+    """
+    return sum(results)
+
+
+def add_counters(results):
+    """
+    Merges Counter results by adding them up in order, the same as adding each one to a running Counter
+    """
+    total = Counter()
+    for counts in results:
+        total = total + counts
+    return total
+
+
+def concatenate_lists(results):
+    """
+    Merges list results by joining them in order
+    """
+    return [element for result in results for element in result]
+
+
+def split_into_chunks(song_indices, number_of_chunks):
+    """
+    Splits song_indices into at most number_of_chunks lists of neighbouring indices of about the same length, in order
+    """
+    number_of_chunks = max(1, min(number_of_chunks, len(song_indices)))
+    chunk_size, remainder = divmod(len(song_indices), number_of_chunks)
+    chunks = []
+    start = 0
+    for chunk_index in range(number_of_chunks):
+        end = start + chunk_size + (1 if chunk_index < remainder else 0)
+        chunks.append(song_indices[start:end])
+        start = end
+    return chunks
+
+
+def get_worker_count(workers):
+    """
+    Returns the number of processes to use, every cpu if workers is None
+    """
+    if workers is None:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _set_worker_data(data):
+    global _worker_data
+    _worker_data = data
+
+
+def _attach_worker_data(open_corpus, name):
+    global _worker_data
+    _worker_data = open_corpus(name)
+    # Closed when the worker exits. Forked workers end with os._exit, which skips atexit hooks, but multiprocessing
+    # still runs its own finalizers first
+    Finalize(None, _worker_data.close, exitpriority=0)
+
+
+def _run_chunk(function, song_indices, merge):
+    return merge([function(_worker_data, song_index=song_index) for song_index in song_indices])
+
+
+def map_songs(data, function, song_indices, merge, workers=1):
+    """
+    Runs function on every song and merges the results
+
+    Parameters
+    ----------
+    data : json or LyricCorpus
+        the data every song is in, given to each worker once (see get_worker_initializer)
+    function : callable
+        called as function(data, song_index=i) for every song. It has to be picklable (a module level function or a
+        functools.partial of one) to be sent to the workers. If data is a LyricCorpus, the workers call it with a
+        MappedLyricCorpus of the same songs instead (see get_worker_initializer)
+    song_indices : iterable
+        the songs to run function on, in the order their results are merged
+    merge : callable
+        turns a list of results into one result, e.g. add_numbers, add_counters or concatenate_lists. It is used on
+        each chunk's results and then on the chunks' merged results, so it has to give the same answer both ways
+    workers : int
+        number of processes to use, None to use every cpu. With 1 worker every song is run in this process
+
+    Returns
+    -------
+    object
+        the merged result, the same no matter how many workers are used
+    """
+    song_indices = list(song_indices)
+    workers = get_worker_count(workers)
+    if workers <= 1 or len(song_indices) < 2:
+        return merge([function(data, song_index=song_index) for song_index in song_indices])
+
+    chunks = split_into_chunks(song_indices, workers * CHUNKS_PER_WORKER)
+    initializer, initargs, shared_memory = get_worker_initializer(data)
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=initializer,
+                                 initargs=initargs) as executor:
+            return merge(list(executor.map(_run_chunk, [function] * len(chunks), chunks, [merge] * len(chunks))))
+    finally:
+        if shared_memory is not None:
+            shared_memory.close()
+            shared_memory.unlink()
+
+
+def get_worker_initializer(data):
+    """
+    Decides how the workers get data. A LyricCorpus isn't sent to the workers, they attach to its tokenized songs
+    instead: the file of a MappedLyricCorpus is opened again by every worker, and any other LyricCorpus is written to a
+    shared memory block once (see create_shared_corpus). A json is given to the workers as it is, since cleaning it in
+    this process first would take as long as the work being split up
+
+    Parameters
+    ----------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+
+    Returns
+    -------
+    tuple
+        the initializer and initargs for ProcessPoolExecutor, and the SharedMemory block that was made for them (or
+        None), which has to be closed and unlinked once the pool is done
+    """
+    if isinstance(data, SharedLyricCorpus):
+        return _attach_worker_data, (SharedLyricCorpus, data.name), None
+    if isinstance(data, MappedLyricCorpus):
+        return _attach_worker_data, (open_binary_corpus, data.path), None
+    if isinstance(data, LyricCorpus):
+        shared_memory = create_shared_corpus(data)
+        return _attach_worker_data, (SharedLyricCorpus, shared_memory.name), shared_memory
+    return _set_worker_data, (data,), None
@@ -2,8 +2,19 @@ import json
 import os
 import sys
 from collections import Counter
+from functools import partial
 from string_cleanup_functions import *
-import re
+from lyric_corpus import *
+from lyric_index import *
+from lyric_loader import load_lyrics_file
+from binary_corpus import convert_json_to_binary_corpus, write_binary_corpus, open_binary_corpus
+from phrase_matcher import PhraseMatcher
+from ragged_tokens import find_max_song
+from song_executor import map_songs, add_numbers, add_counters, concatenate_lists
+from repeated_phrases import find_repeated_phrases_in_tokens, find_repeated_phrases_in_songs
+from song_similarity import SongSimilarityIndex
+from pos_tagging import *
+from wordnet_lexicon import get_wordnet_words
 
 
 # Functions to be used on a Genius artist object
@@ -26,7 +37,7 @@ def print_all_songs_from_json(data):
     list_of_songs = []
     for i in range(len(data['songs'])):
         print(i, data['songs'][i]['title'])
-        list_of_songs.append(data['songs'][i]['title'].replace('\u200b', ''))
+        list_of_songs.append(clean_title(data['songs'][i]['title']))
     return list_of_songs
 
 
@@ -65,7 +76,7 @@ def print_bad_songs_from_json(data, bad_song_indices):
         bad_song_indices = remove_duplicate_valid_indices(bad_song_indices)
 
     for index in bad_song_indices:
-        list_of_songs.append(data['songs'][index]['title'].replace('\u200b', ''))
+        list_of_songs.append(clean_title(data['songs'][index]['title']))
         print(index, data['songs'][index]['title'])
 
     return list_of_songs
@@ -105,7 +116,7 @@ def print_good_songs_from_json(data, bad_song_indices):
             continue
         print(i, data['songs'][i]['title'])
         total_good_songs = total_good_songs + 1
-        list_of_good_songs.append(data['songs'][i]['title'].replace('\u200b', ''))
+        list_of_good_songs.append(clean_title(data['songs'][i]['title']))
     print("There are", total_good_songs, "good songs")
     return list_of_good_songs
 
@@ -139,11 +150,7 @@ def find_total_words_in_song(data, song_index):
     int
         an int with how many total words are in the song
     """
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    lyrics = remove_punctuation(lyrics)
-    lyrics = lyrics.lower()
-    total_word_count = len(lyrics.split())
+    total_word_count = len(get_song_tokens(data, song_index))
     return total_word_count
 
 
@@ -165,11 +172,11 @@ def find_total_words_in_song_by_artist(data, song_index, artist_name):
     int
         an int with how many total words are in the song
     """
-    lyrics = get_only_artist_lyrics_in_song(data, song_index, artist_name)
-    lyrics = remove_headers_from_lyrics(lyrics)
-    lyrics = remove_punctuation(lyrics)
-    lyrics = lyrics.lower()
-    total_word_count = len(lyrics.split())
+    lyrics = get_artist_lyrics(data, song_index, artist_name)
+    # With no '[' left in the artist's lyrics there are no headers to remove, so the corpus' cached ids can be counted
+    if isinstance(data, LyricCorpus) and '[' not in lyrics:
+        return len(data.get_artist_token_ids(song_index, artist_name))
+    total_word_count = len(normalize_lyrics(remove_headers_from_lyrics(lyrics)).split())
     return total_word_count
 
 
@@ -189,11 +196,7 @@ def find_total_unique_words_in_song(data, song_index):
     int
         an int with how many total unqiue words are in the song
     """
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    lyrics = remove_punctuation(lyrics)
-    lyrics = lyrics.lower()
-    list_of_words = lyrics.split()
+    list_of_words = get_song_tokens(data, song_index)
     total_unique_word_count = len(set(list_of_words))
     return total_unique_word_count
 
@@ -216,11 +219,11 @@ def find_total_unique_words_in_song_by_artist(data, song_index, artist_name):
     int
         an int with how many total unqiue words are in the song
     """
-    lyrics = get_only_artist_lyrics_in_song(data, song_index, artist_name)
-    lyrics = remove_headers_from_lyrics(lyrics)
-    lyrics = remove_punctuation(lyrics)
-    lyrics = lyrics.lower()
-    list_of_words = lyrics.split()
+    lyrics = get_artist_lyrics(data, song_index, artist_name)
+    # Each word has a single id in the corpus' vocabulary, so the unique ids are as many as the unique words
+    if isinstance(data, LyricCorpus) and '[' not in lyrics:
+        return len(set(data.get_artist_token_ids(song_index, artist_name)))
+    list_of_words = normalize_lyrics(remove_headers_from_lyrics(lyrics)).split()
     total_unique_word_count = len(set(list_of_words))
     return total_unique_word_count
 
@@ -273,6 +276,160 @@ def find_uniqueness_percent_of_song_by_artist(data, song_index, artist_name):
     return round(uniqueness_percent, 4)
 
 
+def find_total_words_in_all_songs(data, bad_song_indices):
+    """
+    Counts the number of words in every song. If data is a LyricCorpus, the lengths come from the offsets of the
+    corpus' RaggedTokenArray without looking at any song
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    bad_song_indices : list
+        list of song indices to not count words in
+
+    Returns
+    -------
+    list
+        list where element i is how many words are in song i. Songs in bad_song_indices have a count of 0. Returns an
+        empty list if bad_song_indices has invalid values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return []
+
+    bad_songs = set(bad_song_indices)
+    if isinstance(data, LyricCorpus):
+        song_lengths = data.get_ragged_token_array().get_song_lengths()
+    else:
+        song_lengths = [0 if i in bad_songs else find_total_words_in_song(data, i) for i in range(len(data['songs']))]
+    for i in bad_songs:
+        song_lengths[i] = 0
+    return song_lengths
+
+
+def find_total_unique_words_in_all_songs(data, bad_song_indices):
+    """
+    Counts the number of unique words in every song. If data is a LyricCorpus, every song is counted at once with the
+    corpus' RaggedTokenArray
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    bad_song_indices : list
+        list of song indices to not count words in
+
+    Returns
+    -------
+    list
+        list where element i is how many unique words are in song i. Songs in bad_song_indices have a count of 0.
+        Returns an empty list if bad_song_indices has invalid values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return []
+
+    bad_songs = set(bad_song_indices)
+    if isinstance(data, LyricCorpus):
+        unique_word_counts = data.get_ragged_token_array().get_distinct_counts()
+    else:
+        unique_word_counts = [0 if i in bad_songs else find_total_unique_words_in_song(data, i)
+                              for i in range(len(data['songs']))]
+    for i in bad_songs:
+        unique_word_counts[i] = 0
+    return unique_word_counts
+
+
+def find_keyword_count_in_every_song(data, keyword, bad_song_indices):
+    """
+    Counts how often a keyword appears in every song. If data is a LyricCorpus, every song is counted at once by
+    comparing the keyword's id against the corpus' RaggedTokenArray
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    keyword : str
+        the word to count
+    bad_song_indices : list
+        list of song indices to not count the keyword in
+
+    Returns
+    -------
+    list
+        list where element i is how often the keyword appears in song i. Songs in bad_song_indices have a count of 0.
+        Returns an empty list if bad_song_indices has invalid values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return []
+
+    bad_songs = set(bad_song_indices)
+    if isinstance(data, LyricCorpus):
+        keyword_id = data.vocabulary.get_id(normalize_search_term(keyword))
+        keyword_counts = data.get_ragged_token_array().get_token_counts(keyword_id)
+    else:
+        keyword_counts = [0 if i in bad_songs else find_keyword_count_in_song(data, keyword, i)
+                          for i in range(len(data['songs']))]
+    for i in bad_songs:
+        keyword_counts[i] = 0
+    return keyword_counts
+
+
+def find_song_with_the_most_words(data, bad_song_indices, unique=False):
+    """
+    Finds the song with the most words. If there are ties, the first song is returned
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    bad_song_indices : list
+        list of song indices to ignore
+    unique : bool
+        whether to only count each different word once
+
+    Returns
+    -------
+    list
+        index 0 contains the number of words in the song, index 1 contains the song name. Returns an empty string if
+        bad_song_indices has invalid values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return ''
+
+    if unique:
+        word_counts = find_total_unique_words_in_all_songs(data, bad_song_indices)
+    else:
+        word_counts = find_total_words_in_all_songs(data, bad_song_indices)
+    song_index, highest_count = find_max_song(word_counts, bad_song_indices)
+    if song_index is None:
+        return [0, '']
+    return [highest_count, clean_title(data['songs'][song_index]['title'])]
+
+
 def get_spacy_nlp_object(text):
     """
     Uses spacy to process a string. The processed object contains information including tokenized components, part of
@@ -288,12 +445,67 @@ def get_spacy_nlp_object(text):
     doc
 
     """
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
+    nlp = get_spacy_pipeline()  # Only loaded the first time, the parser and ner are disabled
     doc = nlp(text)
     return doc
 
 
+def get_pos_tags_in_song(data, song_index):
+    """
+    Tags a song's lyrics with spacy. The tags are kept, so tagging the same song again doesn't run spacy again
+
+    Parameters
+    ----------
+    data : json
+        the json where the Genius data is stored in
+    song_index : int
+        index of the song to tag
+
+    Returns
+    -------
+    tuple
+        tuple of (text, pos, lemma) tuples, one per token in the song
+    """
+    return get_pos_tags(get_cased_lyrics(data, song_index))
+
+
+def annotate_songs(data, bad_song_indices, batch_size=64, workers=1):
+    """
+    Tags every song's lyrics with spacy in batches using nlp.pipe, so the model is loaded once and each song is only
+    tagged once. Later calls to find_pos_counts_in_song and analyze_song use these tags
+
+    Parameters
+    ----------
+    data : json
+        the json where the Genius data is stored in
+    bad_song_indices : list
+        list of song indices to skip
+    batch_size : int
+        number of songs spacy tags at a time, optional param
+    workers : int
+        number of processes to tag songs with, optional param. None uses every cpu
+
+    Returns
+    -------
+    dict
+        dictionary of song index to tuple of (text, pos, lemma) tuples. Returns an empty dictionary if
+        bad_song_indices has invalid values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return {}
+
+    bad_songs = set(bad_song_indices)
+    song_indices = [i for i in range(len(data['songs'])) if i not in bad_songs]
+    list_of_pos_tags = annotate_texts([get_cased_lyrics(data, i) for i in song_indices], batch_size, workers)
+    return dict(zip(song_indices, list_of_pos_tags))
+
+
 # Write to CSV functions
 def write_counter_to_csv(counter, output_file_name):
     """
@@ -371,24 +583,15 @@ def find_keyword_count_in_song(data, keyword, song_index):
     int
         an int with how often the keyword appears in the song
     """
-    keyword_count = 0
-    keyword = keyword.lower()
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    if lyrics is not None:
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        lyrics = lyrics.replace('\u200b', '')  # Catch weird bug where \u200b was showing up in some keywords
-        lyrics = lyrics.split()
-        for a in range(len(lyrics)):  # Loop through the current song
-            if (keyword in lyrics[a]) & (keyword == lyrics[a]):
-                keyword_count = keyword_count + 1
+    keyword = normalize_search_term(keyword)
+    keyword_count = get_word_counts(data, song_index)[keyword]
     return keyword_count
 
 
-def find_keyword_count_in_all_songs(data, keyword, bad_song_indices):
+def find_keyword_count_in_all_songs(data, keyword, bad_song_indices, workers=1):
     """
-    Will go through the entire list of songs (in data) and count how many times the keyword appears in total
+    Will go through the entire list of songs (in data) and count how many times the keyword appears in total. If data
+    is a LyricCorpus, the inverted index is used and workers is ignored
 
     Parameters
     -------
@@ -398,6 +601,8 @@ def find_keyword_count_in_all_songs(data, keyword, bad_song_indices):
         the word to count in all the songs in data
     bad_song_indices : list
         list of song indices to print their titles
+    workers : int
+        number of processes to count with, None to use every cpu. See map_songs
 
     Returns
     -------
@@ -413,13 +618,14 @@ def find_keyword_count_in_all_songs(data, keyword, bad_song_indices):
                 print('[' + str(i) + ']', bad_song_indices[i])
         return 0
 
-    keyword = keyword.lower()
-    keyword_count = 0
-    for i in range(len(data['songs'])):  # Loop through every song in data
-        # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-        if i in set(bad_song_indices):
-            continue
-        keyword_count = keyword_count + find_keyword_count_in_song(data, keyword, i)
+    keyword = normalize_search_term(keyword)
+    if isinstance(data, LyricCorpus):  # Only look at the songs the keyword appears in
+        return data.get_inverted_index().get_total_count(keyword, bad_song_indices)
+
+    bad_songs = set(bad_song_indices)
+    song_indices = [i for i in range(len(data['songs'])) if i not in bad_songs]
+    keyword_count = map_songs(data, partial(find_keyword_count_in_song, keyword=keyword), song_indices, add_numbers,
+                              workers)
     return keyword_count
 
 
@@ -443,16 +649,8 @@ def find_keyword_count_in_song_by_artist(data, keyword, song_index, artist_name)
     int
         an int with how often the keyword appears in the artist's lyrics
     """
-    keyword_count = 0
-    keyword = keyword.lower()
-    lyrics = get_only_artist_lyrics_in_song(data, song_index, artist_name)
-    if lyrics is not None:
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        lyrics = lyrics.split()
-        for a in range(len(lyrics)):  # Loop through the current song
-            if (keyword in lyrics[a]) & (keyword == lyrics[a]):
-                keyword_count = keyword_count + 1
+    keyword = normalize_search_term(keyword)
+    keyword_count = get_artist_tokens(data, song_index, artist_name).count(keyword)
     return keyword_count
 
 
@@ -513,17 +711,17 @@ def find_keyword_counts_in_song(data, list_of_keywords, song_index):
     list_of_keyword_counts : list
         a list of tuples where first value is the keyword, second value is int of occurrences
     """
-    list_of_keyword_counts = []
-    for keyword in list_of_keywords:  # Loop through all the keywords to count
-        current_keyword = keyword
-        list_of_keyword_counts.append((current_keyword, find_keyword_count_in_song(data, keyword, song_index)))
+    word_counts = get_word_counts(data, song_index)
+    counts = [word_counts[normalize_search_term(keyword)] for keyword in list_of_keywords]
+    list_of_keyword_counts = list(zip(list_of_keywords, counts))
 
     return list_of_keyword_counts
 
 
-def find_keyword_counts_in_all_songs(data, list_of_keywords, bad_song_indices):
+def find_keyword_count_matrix(data, list_of_keywords, bad_song_indices):
     """
-    Takes a list of keywords and finds counts for every keyword in every song
+    Counts every keyword in every song, going through each song's words once no matter how many keywords there are.
+    If data is a LyricCorpus, the counts come straight from the corpus' inverted index instead.
 
     Parameters
     -------
@@ -537,7 +735,8 @@ def find_keyword_counts_in_all_songs(data, list_of_keywords, bad_song_indices):
     Returns
     -------
     list
-        a list of tuples where first value is the keyword, second value is int of occurrences
+        a list with one row per keyword, where row[i] is how often the keyword appears in song i. Songs in
+        bad_song_indices have a count of 0. Returns an empty list if bad_song_indices has invalid values
     """
     if not is_valid_indices_list(data, bad_song_indices):
         print("Invalid Values in bad_song_indices, please remove them:\n")
@@ -548,17 +747,48 @@ def find_keyword_counts_in_all_songs(data, list_of_keywords, bad_song_indices):
                 print('[' + str(i) + ']', bad_song_indices[i])
         return []
 
-    list_of_keyword_counts = []
+    list_of_keywords = [normalize_search_term(keyword) for keyword in list_of_keywords]
+    number_of_songs = len(data['songs'])
+    bad_songs = set(bad_song_indices)
+    matrix = [[0] * number_of_songs for keyword in list_of_keywords]
+
+    if isinstance(data, LyricCorpus):  # Only look at the songs each keyword appears in
+        index = data.get_inverted_index()
+        for row, keyword in enumerate(list_of_keywords):
+            for song_index, count, positions in index.get_postings(keyword):
+                if song_index not in bad_songs:
+                    matrix[row][song_index] = count
+        return matrix
+
+    for i in range(number_of_songs):  # Loop through every song in data
+        if i in bad_songs:
+            continue
+        lyrics = get_song_tokens(data, i)
+        for row, count in enumerate(count_keywords_in_tokens(lyrics, list_of_keywords)):
+            matrix[row][i] = count
+    return matrix
+
 
-    for i in range(len(list_of_keywords)):  # Loop through all the keywords to count
-        current_cumulative_count = 0
-        for j in range(len(data['songs'])):  # Loop through every song in data
-            # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-            if j in set(bad_song_indices):
-                continue
-            current_cumulative_count = current_cumulative_count + find_keyword_count_in_song(data, list_of_keywords[i],
-                                                                                             j)
-        list_of_keyword_counts.append((list_of_keywords[i], current_cumulative_count))
+def find_keyword_counts_in_all_songs(data, list_of_keywords, bad_song_indices):
+    """
+    Takes a list of keywords and finds counts for every keyword in every song
+
+    Parameters
+    -------
+    data : json
+        json with song info
+    list_of_keywords : list
+        list of keywords to count for individually
+    bad_song_indices : list
+        list of song indices to ignore in the counts
+
+    Returns
+    -------
+    list
+        a list of tuples where first value is the keyword, second value is int of occurrences
+    """
+    matrix = find_keyword_count_matrix(data, list_of_keywords, bad_song_indices)
+    list_of_keyword_counts = [(keyword, sum(row)) for keyword, row in zip(list_of_keywords, matrix)]
 
     return list_of_keyword_counts
 
@@ -583,17 +813,16 @@ def find_keyword_counts_in_song_by_artist(data, list_of_keywords, song_index, ar
     list_of_keyword_counts : list
         a list of tuples where first value is the keyword, second value is int of occurrences
     """
-    list_of_keyword_counts = []
-    for keyword in list_of_keywords:  # Loop through all the keywords to count
-        current_keyword = keyword
-        list_of_keyword_counts.append((current_keyword, find_keyword_count_in_song_by_artist(data, keyword, song_index,
-                                                                                             artist_name)))
+    lyrics = get_artist_tokens(data, song_index, artist_name)
+    counts = count_keywords_in_tokens(lyrics, [normalize_search_term(keyword) for keyword in list_of_keywords])
+    list_of_keyword_counts = list(zip(list_of_keywords, counts))
     return list_of_keyword_counts
 
 
-def find_keyword_counts_in_all_songs_by_artist(data, list_of_keywords, bad_song_indices, artist_name):
+def find_keyword_count_matrix_by_artist(data, list_of_keywords, bad_song_indices, artist_name):
     """
-    Takes a list of keywords and finds counts for every keyword in every song
+    Counts every keyword said by the artist in every song, going through each song's words once no matter how many
+    keywords there are
 
     Parameters
     -------
@@ -604,12 +833,13 @@ def find_keyword_counts_in_all_songs_by_artist(data, list_of_keywords, bad_song_
     bad_song_indices : list
         list of song indices to ignore in the counts
     artist_name : str
-            name of artist to only check lyrics from
+        name of artist to only check lyrics from
 
     Returns
     -------
     list
-        a list of tuples where first value is the keyword, second value is int of occurrences
+        a list with one row per keyword, where row[i] is how often the artist says the keyword in song i. Songs in
+        bad_song_indices have a count of 0. Returns an empty list if bad_song_indices has invalid values
     """
     if not is_valid_indices_list(data, bad_song_indices):
         print("Invalid Values in bad_song_indices, please remove them:\n")
@@ -620,23 +850,69 @@ def find_keyword_counts_in_all_songs_by_artist(data, list_of_keywords, bad_song_
                 print('[' + str(i) + ']', bad_song_indices[i])
         return []
 
-    list_of_keyword_counts = []
+    list_of_keywords = [normalize_search_term(keyword) for keyword in list_of_keywords]
+    number_of_songs = len(data['songs'])
+    bad_songs = set(bad_song_indices)
+    matrix = [[0] * number_of_songs for keyword in list_of_keywords]
+
+    for i in range(number_of_songs):  # Loop through every song in data
+        if i in bad_songs:
+            continue
+        lyrics = get_artist_tokens(data, i, artist_name)
+        for row, count in enumerate(count_keywords_in_tokens(lyrics, list_of_keywords)):
+            matrix[row][i] = count
+    return matrix
 
-    for i in range(len(list_of_keywords)):  # Loop through all the keywords to count
-        current_cumulative_count = 0
-        for j in range(len(data['songs'])):  # Loop through every song in data
-            # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-            if j in set(bad_song_indices):
-                continue
-            current_cumulative_count = current_cumulative_count + find_keyword_count_in_song_by_artist(data,
-                                                                                                       list_of_keywords[
-                                                                                                           i], j,
-                                                                                                       artist_name)
-        list_of_keyword_counts.append((list_of_keywords[i], current_cumulative_count))
+
+def find_keyword_counts_in_all_songs_by_artist(data, list_of_keywords, bad_song_indices, artist_name):
+    """
+    Takes a list of keywords and finds counts for every keyword in every song
+
+    Parameters
+    -------
+    data : json
+        json with song info
+    list_of_keywords : list
+        list of keywords to count for individually
+    bad_song_indices : list
+        list of song indices to ignore in the counts
+    artist_name : str
+            name of artist to only check lyrics from
+
+    Returns
+    -------
+    list
+        a list of tuples where first value is the keyword, second value is int of occurrences
+    """
+    matrix = find_keyword_count_matrix_by_artist(data, list_of_keywords, bad_song_indices, artist_name)
+    list_of_keyword_counts = [(keyword, sum(row)) for keyword, row in zip(list_of_keywords, matrix)]
 
     return list_of_keyword_counts
 
 
+def is_valid_pos_tag(pos):
+    """
+    Checks if pos is one of spacy's pos tags, printing the valid tags if it isn't
+
+    Parameters
+    -------
+    pos : str
+        the part of speech tag to check
+
+    Returns
+    -------
+    bool
+        True if pos is a valid pos tag
+    """
+    if pos not in {'ADJ', 'ADP', 'ADV', 'AUX', 'CONJ', 'CCONJ', 'DET', 'INTJ', 'NOUN', 'NUM', 'PART', 'PRON', 'PROPN',
+                   'PUNCT', 'SCONJ', 'SCONJ', 'SYM', 'VERB', 'X', 'SPACE'}:
+        print("\"" + pos + "\" is not a valid pos tag. Please enter a valid pos tag. Valid tags are: ")
+        print('ADJ', 'ADP', 'ADV', 'AUX', 'CONJ', 'CCONJ', 'DET', 'INTJ', 'NOUN', 'NUM', 'PART', 'PRON', 'PROPN',
+              'PUNCT', 'SCONJ', 'SCONJ', 'SYM', 'VERB', 'X', 'SPACE')
+        return False
+    return True
+
+
 def find_pos_counts_in_song(data, song_index, pos):
     """"
     Find counts for every specified part of speech (pos) in the song. Pos' are determined by spacy's best prediction.
@@ -655,27 +931,99 @@ def find_pos_counts_in_song(data, song_index, pos):
     counts : Counter
         Counter object of all nouns in the song and their counts
     """
-    if pos not in {'ADJ', 'ADP', 'ADV', 'AUX', 'CONJ', 'CCONJ', 'DET', 'INTJ', 'NOUN', 'NUM', 'PART', 'PRON', 'PROPN',
-                   'PUNCT', 'SCONJ', 'SCONJ', 'SYM', 'VERB', 'X', 'SPACE'}:
-        print("\"" + pos + "\" is not a valid pos tag. Please enter a valid pos tag. Valid tags are: ")
-        print('ADJ', 'ADP', 'ADV', 'AUX', 'CONJ', 'CCONJ', 'DET', 'INTJ', 'NOUN', 'NUM', 'PART', 'PRON', 'PROPN',
-              'PUNCT', 'SCONJ', 'SCONJ', 'SYM', 'VERB', 'X', 'SPACE')
+    if not is_valid_pos_tag(pos):
         return Counter()
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    lyrics = remove_punctuation(lyrics)
-    lyrics.lower()
-    annotated_lyrics = get_spacy_nlp_object(lyrics)
     list_of_pos = []
-    for token in annotated_lyrics:
-        if token.pos_ == pos:
-            list_of_pos.append(token.text)
+    for text, token_pos, lemma in get_pos_tags_in_song(data, song_index):
+        if token_pos == pos:
+            list_of_pos.append(text)
 
     counts = Counter(list_of_pos)
 
     return counts
 
 
+def find_pos_counts_in_all_songs(data, pos, bad_song_indices, workers=1, batch_size=64):
+    """
+    Find counts for every specified part of speech (pos) in all songs. Songs are tagged by spacy in batches, which can
+    be spread over a pool of processes, and songs that were already tagged aren't tagged again.
+
+    Parameters
+    -------
+    data : json
+        the json where the Genius data is stored in
+    pos : str
+        the part of speech to count
+    bad_song_indices : list
+        list of song indices for songs we don't want to count for
+    workers : int
+        number of processes to tag songs with, optional param. None uses every cpu, 1 tags in this process
+    batch_size : int
+        number of songs tagged at a time by each process, optional param
+
+    Returns
+    -------
+    counts : Counter
+        Counter object of all words tagged as pos in every song and their cumulative counts
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return Counter()
+    if not is_valid_pos_tag(pos):
+        return Counter()
+
+    bad_songs = set(bad_song_indices)
+    texts = [get_cased_lyrics(data, i) for i in range(len(data['songs'])) if i not in bad_songs]
+    return count_pos_in_texts(texts, pos, batch_size, workers)
+
+
+def find_pos_counts_in_all_songs_by_artist(data, pos, bad_song_indices, artist_name, workers=1, batch_size=64):
+    """
+    Find counts for every specified part of speech (pos) said by the artist in all songs, see
+    find_pos_counts_in_all_songs
+
+    Parameters
+    -------
+    data : json
+        the json where the Genius data is stored in
+    pos : str
+        the part of speech to count
+    bad_song_indices : list
+        list of song indices for songs we don't want to count for
+    artist_name : str
+        name of artist to only check lyrics from
+    workers : int
+        number of processes to tag songs with, optional param. None uses every cpu, 1 tags in this process
+    batch_size : int
+        number of songs tagged at a time by each process, optional param
+
+    Returns
+    -------
+    counts : Counter
+        Counter object of all words tagged as pos in every song and their cumulative counts
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return Counter()
+    if not is_valid_pos_tag(pos):
+        return Counter()
+
+    bad_songs = set(bad_song_indices)
+    texts = [remove_punctuation(remove_headers_from_lyrics(get_artist_lyrics(data, i, artist_name)))
+             for i in range(len(data['songs'])) if i not in bad_songs]
+    return count_pos_in_texts(texts, pos, batch_size, workers)
+
+
 def find_noun_counts_in_all_songs(data, bad_song_indices):
     """
     Find counts for every noun in all songs
@@ -702,8 +1050,7 @@ def find_noun_counts_in_all_songs(data, bad_song_indices):
                 print('[' + str(i) + ']', bad_song_indices[i])
         return Counter()
 
-    from nltk.corpus import wordnet as wn  # this takes some time, so only load it if we use this function
-    nouns = {x.name().split('.', 1)[0] for x in wn.all_synsets('n')}
+    nouns = get_wordnet_words('noun')  # Loaded from the lexicon file once per run
     counts = Counter()
     cumulative_counts = find_all_word_counts_in_all_songs(data, counts, bad_song_indices)
 
@@ -742,8 +1089,7 @@ def find_noun_counts_in_all_songs_by_artist(data, bad_song_indices, artist_name)
                 print('[' + str(i) + ']', bad_song_indices[i])
         return Counter()
 
-    from nltk.corpus import wordnet as wn  # this takes some time, so only load it if we use this function
-    nouns = {x.name().split('.', 1)[0] for x in wn.all_synsets('n')}
+    nouns = get_wordnet_words('noun')  # Loaded from the lexicon file once per run
     counts = Counter()
     cumulative_counts = find_all_word_counts_in_all_songs_by_artist(data, counts, bad_song_indices, artist_name)
 
@@ -754,7 +1100,117 @@ def find_noun_counts_in_all_songs_by_artist(data, bad_song_indices, artist_name)
     return cumulative_counts
 
 
-def find_keyword_counts_and_compact_variants_in_all_songs(data, counts, list_of_list_of_words, bad_song_indices):
+def find_variant_count_matrix(data, list_of_list_of_words, bad_song_indices):
+    """
+    Counts every root word and its variants in every song. Every variant is mapped to its root word once, and then
+    each song's word counts are gone through a single time no matter how many root words there are. If data is a
+    LyricCorpus, each song's word counts are only counted once and kept for later calls.
+
+    Parameters
+    ----------
+    data : json
+        The json holding all the info
+    list_of_list_of_words : list
+        list of lists where the first entry in a list is the root word, and everything after are the word variances
+    bad_song_indices : list
+        list of song indices we don't want to work with
+
+    Returns
+    -------
+    list
+        a list with one row per list of words, where row[i] is how often the root word and its variants appear in song
+        i. Songs in bad_song_indices have a count of 0. Returns an empty list if bad_song_indices has invalid values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return []
+
+    variant_to_groups = get_variant_to_groups_map(list_of_list_of_words)
+    number_of_songs = len(data['songs'])
+    bad_songs = set(bad_song_indices)
+    matrix = [[0] * number_of_songs for words in list_of_list_of_words]
+
+    for i in range(number_of_songs):  # Loop through every song in data
+        if i in bad_songs:
+            continue
+        group_counts = count_variants_in_word_counts(get_word_counts(data, i), variant_to_groups,
+                                                     len(list_of_list_of_words))
+        for row, count in enumerate(group_counts):
+            matrix[row][i] = count
+    return matrix
+
+
+def find_variant_count_matrix_by_artist(data, list_of_list_of_words, bad_song_indices, artist_name):
+    """
+    Counts every root word and its variants said by the artist in every song, see find_variant_count_matrix
+
+    Parameters
+    ----------
+    data : json
+        The json holding all the info
+    list_of_list_of_words : list
+        list of lists where the first entry in a list is the root word, and everything after are the word variances
+    bad_song_indices : list
+        list of song indices we don't want to work with
+    artist_name : str
+        name of artist to only check lyrics from
+
+    Returns
+    -------
+    list
+        a list with one row per list of words, where row[i] is how often the artist says the root word and its
+        variants in song i. Songs in bad_song_indices have a count of 0. Returns an empty list if bad_song_indices has
+        invalid values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return []
+
+    variant_to_groups = get_variant_to_groups_map(list_of_list_of_words)
+    number_of_songs = len(data['songs'])
+    bad_songs = set(bad_song_indices)
+    matrix = [[0] * number_of_songs for words in list_of_list_of_words]
+
+    for i in range(number_of_songs):  # Loop through every song in data
+        if i in bad_songs:
+            continue
+        word_counts = Counter(get_artist_tokens(data, i, artist_name))
+        group_counts = count_variants_in_word_counts(word_counts, variant_to_groups, len(list_of_list_of_words))
+        for row, count in enumerate(group_counts):
+            matrix[row][i] = count
+    return matrix
+
+
+def get_root_word_totals(counts, list_of_list_of_words, matrix, return_song_counts):
+    """
+    Adds up each row of a variant count matrix, along with the counts of the root word and its variants already in
+    counts. Returns the dictionary of root word totals, and if return_song_counts is True, also the dictionary of root
+    word to its row
+    """
+    dict_of_totals = {}
+    dict_of_song_counts = {}
+    for words, song_counts in zip(list_of_list_of_words, matrix):
+        if not words:
+            continue
+        dict_of_totals[words[0]] = sum(song_counts) + sum(counts.get(word, 0) for word in dict.fromkeys(words))
+        dict_of_song_counts[words[0]] = song_counts
+    if return_song_counts:
+        return dict_of_totals, dict_of_song_counts
+    return dict_of_totals
+
+
+def find_keyword_counts_and_compact_variants_in_all_songs(data, counts, list_of_list_of_words, bad_song_indices,
+                                                          return_song_counts=False):
     """
     Returns a dictionary with the totals for each root word in list_of_list_of_words
     For example, if I want to find how many times "cat" is referenced, along with
@@ -764,21 +1220,26 @@ def find_keyword_counts_and_compact_variants_in_all_songs(data, counts, list_of_
     46 because 'cats' appeared 3 times, 'feline' appeared 2 times, and 'felines' appeared
     4 times - for a total of 46 times.
 
+    Every song is only gone through once, see find_variant_count_matrix.
+
     Parameters
     ----------
     data : json
         The json holding all the info
     counts : Counter
-        Counter Object that TODO
+        Counter Object of words counted somewhere else, added to the totals. It isn't changed
     list_of_list_of_words : list
         list of lists where the first entry in a list is the root word, and everything after are the word variances
     bad_song_indices : list
         list of song indices we don't want to work with
+    return_song_counts : bool
+        if True, also return how often each root word and its variants appear in every song, optional param
 
     Returns
     -------
     dict_of_totals
-        dictionary of each root word and their frequencies
+        dictionary of each root word and their frequencies. If return_song_counts is True, a tuple of dict_of_totals
+        and a dictionary of each root word to a list of its count in every song
     """
     if not is_valid_indices_list(data, bad_song_indices):
         print("Invalid Values in bad_song_indices, please remove them:\n")
@@ -787,23 +1248,19 @@ def find_keyword_counts_and_compact_variants_in_all_songs(data, counts, list_of_
                 print('[' + str(i) + ']', bad_song_indices[i])
             elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
                 print('[' + str(i) + ']', bad_song_indices[i])
-        return {}
-
-    dict_of_totals = {}
-    for i in range(len(list_of_list_of_words)):
-        all_count = find_all_word_counts_in_all_songs(data, counts, bad_song_indices)
-        custom_count = custom_white_list_count_object(all_count, list_of_list_of_words[i])
-        total = 0
-        for key in custom_count.keys():  # Loop to add up all the variants together to find total of root word
-            total = total + custom_count.get(key)
-        print("\"" + list_of_list_of_words[i][0] + "\" and all its variants add up to: ", total, "\n")
-        dict_of_totals[list_of_list_of_words[i][0]] = total
+        return ({}, {}) if return_song_counts else {}
 
-    return dict_of_totals
+    matrix = find_variant_count_matrix(data, list_of_list_of_words, bad_song_indices)
+    result = get_root_word_totals(counts, list_of_list_of_words, matrix, return_song_counts)
+    dict_of_totals = result[0] if return_song_counts else result
+    for root_word, total in dict_of_totals.items():
+        print("\"" + root_word + "\" and all its variants add up to: ", total, "\n")
+    return result
 
 
 def find_keyword_counts_and_compact_variants_in_all_songs_by_artist(data, counts, list_of_list_of_words,
-                                                                    bad_song_indices, artist_name):
+                                                                    bad_song_indices, artist_name,
+                                                                    return_song_counts=False):
     """
     Returns a dictionary with the totals for each root word in list_of_list_of_words
     For example, if I want to find how many times "cat" is referenced, along with
@@ -813,23 +1270,28 @@ def find_keyword_counts_and_compact_variants_in_all_songs_by_artist(data, counts
     46 because 'cats' appeared 3 times, 'feline' appeared 2 times, and 'felines' appeared
     4 times - for a total of 46 times.
 
+    Every song is only gone through once, see find_variant_count_matrix_by_artist.
+
     Parameters
     ----------
     data : json
         The json holding all the info
     counts : Counter
-        Counter Object that
+        Counter Object of words counted somewhere else, added to the totals. It isn't changed
     list_of_list_of_words : list
         list of lists where the first entry in a list is the root word, and everything after are the word variances
     bad_song_indices : list
         list of song indices we don't want to work with
     artist_name : str
         name of artist to only check lyrics from
+    return_song_counts : bool
+        if True, also return how often each root word and its variants appear in every song, optional param
 
     Returns
     -------
     dict_of_totals
-        dictionary of each root word and their frequencies
+        dictionary of each root word and their frequencies. If return_song_counts is True, a tuple of dict_of_totals
+        and a dictionary of each root word to a list of its count in every song
     """
     if not is_valid_indices_list(data, bad_song_indices):
         print("Invalid Values in bad_song_indices, please remove them:\n")
@@ -838,71 +1300,123 @@ def find_keyword_counts_and_compact_variants_in_all_songs_by_artist(data, counts
                 print('[' + str(i) + ']', bad_song_indices[i])
             elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
                 print('[' + str(i) + ']', bad_song_indices[i])
-        return {}
+        return ({}, {}) if return_song_counts else {}
+
+    matrix = find_variant_count_matrix_by_artist(data, list_of_list_of_words, bad_song_indices, artist_name)
+    return get_root_word_totals(counts, list_of_list_of_words, matrix, return_song_counts)
+
+
+# Find Frequency(s) of a phrase in one or more songs
+def find_phrase_count_in_song(data, phrase, song_index):
+    """
+    Find phrase frequency in a song - will include ad libs (lyrics in parenthesis). The phrase is matched word for
+    word and has to be on a single line to count
+
+    Parameters
+    ----------
+    data : json
+        The json holding all the info
+    phrase : str
+        the phrase to count
+    song_index : int
+        the song index of the song to count phrases in
+
+    Returns
+    -------
+    phrase_count
+        int representing how often the phrase was found
+
+    """
+    phrase_words = normalize_search_term(phrase).split()
+    tokens, line_offsets = get_song_tokens_with_lines(data, song_index)
+    phrase_count = count_phrase_in_tokens(tokens, line_offsets, phrase_words)
+    return phrase_count
+
+
+def find_phrase_count_in_all_songs(data, phrase, bad_song_indices, workers=1):
+    """
+    Find phrase count in all songs. If data is a LyricCorpus, the inverted index is used and workers is ignored
+
+    Parameters
+    ----------
+    data : json
+        The json holding all the info
+    phrase : str
+        the phrase to count
+    bad_song_indices : list
+        a list of song indices to skip
+    workers : int
+        number of processes to count with, None to use every cpu. See map_songs
+
+    Returns
+    -------
+    phrase_count
+        int representing how often the phrase was found
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return 0
 
-    dict_of_totals = {}
-    for i in range(len(list_of_list_of_words)):
-        all_count = find_all_word_counts_in_all_songs_by_artist(data, counts, bad_song_indices, artist_name)
-        custom_count = custom_white_list_count_object(all_count, list_of_list_of_words[i])
-        total = 0
-        for key in custom_count.keys():  # Loop to add up all the variants together to find total of root word
-            total = total + custom_count.get(key)
-        dict_of_totals[list_of_list_of_words[i][0]] = total
+    phrase = normalize_search_term(phrase)
+    if isinstance(data, LyricCorpus):  # Only look at the songs the phrase's words appear in
+        return sum(data.get_inverted_index().get_phrase_song_counts(phrase.split(), bad_song_indices).values())
 
-    return dict_of_totals
+    bad_songs = set(bad_song_indices)
+    song_indices = [i for i in range(len(data['songs'])) if i not in bad_songs]
+    phrase_count = map_songs(data, partial(find_phrase_count_in_song, phrase=phrase), song_indices, add_numbers,
+                             workers)
+    return phrase_count
 
 
-# Find Frequency(s) of a phrase in one or more songs
-def find_phrase_count_in_song(data, phrase, song_index):
+def find_phrase_counts_in_song(data, list_of_phrases, song_index):
     """
-    Find phrase frequency in a song - will include ad libs (lyrics in parenthesis)
+    Takes a list of phrases and finds counts for every phase in the list. All the phrases are counted in a single pass
+    over the song's words
 
     Parameters
     ----------
     data : json
         The json holding all the info
-    phrase : str
-        the phrase to count
+    list_of_phrases : list
+        a list containing all the phrases to count
     song_index : int
         the song index of the song to count phrases in
 
     Returns
     -------
-    phrase_count
-        int representing how often the phrase was found
-
+    list_of_phrase_count
+        list containing the count for each phrase given
     """
-    phrase_count = 0
-    phrase = phrase.lower()
-    string_of_words = data['songs'][song_index]['lyrics']
-    if string_of_words is not None:
-        string_of_words = string_of_words.lower()
-        string_of_words = remove_headers_from_lyrics(string_of_words)
-        string_of_words = remove_punctuation(string_of_words)
-        # This catches weird bug where spaces weren't actually spaces
-        string_of_words = string_of_words.replace('\u2005', ' ')
-        list_of_matches = re.findall(r'\b' + phrase + r'\b', string_of_words)
-        phrase_count = len(list_of_matches)
-    return phrase_count
+    tokens, line_offsets = get_song_tokens_with_lines(data, song_index)
+    counts = PhraseMatcher(list_of_phrases).count_in_tokens(tokens, line_offsets)
+    list_of_phrase_counts = list(zip(list_of_phrases, counts))
+
+    return list_of_phrase_counts
 
 
-def find_phrase_count_in_all_songs(data, phrase, bad_song_indices):
+def find_phrase_count_matrix(data, list_of_phrases, bad_song_indices):
     """
-    Find phrase count in all songs
+    Counts every phrase in every song, going through each song's words once no matter how many phrases there are
 
     Parameters
     ----------
     data : json
         The json holding all the info
-    phrase : str
-        the phrase to count
+    list_of_phrases : list
+        a list containing all the phrases to count
     bad_song_indices : list
         a list of song indices to skip
 
     Returns
     -------
-    phrase_count
-        int representing how often the phrase was found
+    list
+        a list with one row per phrase, where row[i] is how often the phrase appears in song i. Songs in
+        bad_song_indices have a count of 0. Returns an empty list if bad_song_indices has invalid values
     """
     if not is_valid_indices_list(data, bad_song_indices):
         print("Invalid Values in bad_song_indices, please remove them:\n")
@@ -911,25 +1425,24 @@ def find_phrase_count_in_all_songs(data, phrase, bad_song_indices):
                 print('[' + str(i) + ']', bad_song_indices[i])
             elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
                 print('[' + str(i) + ']', bad_song_indices[i])
-        return 0
+        return []
 
-    phrase_count = 0
-    phrase = phrase.lower()
-    for i in range(len(data['songs'])):  # loop through all the songs
-        # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-        if i in set(bad_song_indices):
+    matcher = PhraseMatcher(list_of_phrases)
+    number_of_songs = len(data['songs'])
+    bad_songs = set(bad_song_indices)
+    matrix = [[0] * number_of_songs for phrase in list_of_phrases]
+    for i in range(number_of_songs):  # loop through all the songs
+        if i in bad_songs:
             continue
-        list_of_words = data['songs'][i]['lyrics']
-        if list_of_words is not None:
-            list_of_words = list_of_words.lower()
-            remove_punctuation(list_of_words)
-            phrase_count = phrase_count + find_phrase_count_in_song(data, phrase, i)
-    return phrase_count
+        tokens, line_offsets = get_song_tokens_with_lines(data, i)
+        for row, count in enumerate(matcher.count_in_tokens(tokens, line_offsets)):
+            matrix[row][i] = count
+    return matrix
 
 
-def find_phrase_counts_in_song(data, list_of_phrases, song_index):
+def find_phrase_counts_in_all_songs(data, list_of_phrases, bad_song_indices):
     """
-    Takes a list of phrases and finds counts for every phase in the list
+    Takes a list of phrases and finds counts for every phrase in every song
 
     Parameters
     ----------
@@ -937,26 +1450,24 @@ def find_phrase_counts_in_song(data, list_of_phrases, song_index):
         The json holding all the info
     list_of_phrases : list
         a list containing all the phrases to count
-    song_index : int
-        the song index of the song to count phrases in
+    bad_song_indices : list
+        a list of song indices to skip
 
     Returns
     -------
-    list_of_phrase_count
-        list containing the count for each phrase given
+    list
+        a list of tuples where first value is the phrase, second value is int of occurrences
     """
-    list_of_phrase_counts = []
-    for i in range(len(list_of_phrases)):
-        current_phrase = list_of_phrases[i]
-
-        list_of_phrase_counts.append((current_phrase, find_phrase_count_in_song(data, list_of_phrases[i], song_index)))
+    matrix = find_phrase_count_matrix(data, list_of_phrases, bad_song_indices)
+    list_of_phrase_counts = [(phrase, sum(row)) for phrase, row in zip(list_of_phrases, matrix)]
 
     return list_of_phrase_counts
 
 
 def find_phrase_count_in_song_by_artist(data, phrase, song_index, artist_name):
     """
-    Find phrase frequency in a song by only the artist- will include ad libs (lyrics in parenthesis)
+    Find phrase frequency in a song by only the artist- will include ad libs (lyrics in parenthesis). The phrase is
+    matched word for word and has to be on a single line to count
 
     Parameters
     ----------
@@ -975,13 +1486,12 @@ def find_phrase_count_in_song_by_artist(data, phrase, song_index, artist_name):
         int representing how often the phrase was found
     """
     phrase_count = 0
-    phrase = phrase.lower()
-    string_of_words = get_only_artist_lyrics_in_song(data, song_index, artist_name)
+    phrase_words = normalize_search_term(phrase).split()
+    string_of_words = get_artist_lyrics(data, song_index, artist_name)
     if string_of_words is not None:
-        string_of_words = string_of_words.lower()
-        string_of_words = remove_punctuation(string_of_words)
-        list_of_matches = re.findall(r'\b' + phrase + r'\b', string_of_words)
-        phrase_count = len(list_of_matches)
+        string_of_words = normalize_lyrics(string_of_words)
+        tokens, line_offsets = split_lines_into_tokens(string_of_words)
+        phrase_count = count_phrase_in_tokens(tokens, line_offsets, phrase_words)
 
     return phrase_count
 
@@ -1015,26 +1525,37 @@ def find_song_where_keyword_is_said_the_most(data, keyword, bad_song_indices):
                 print('[' + str(i) + ']', bad_song_indices[i])
         return ''
 
+    song_counts = None
+    if isinstance(data, LyricCorpus):  # Look up every song's count in the index instead of counting each song
+        song_counts = data.get_inverted_index().get_song_counts(normalize_search_term(keyword))
+
     there_is_a_tie = False
     list_of_ties = []
-    highest_count = find_keyword_count_in_song(data, keyword, 0)
+    if song_counts is not None:
+        highest_count = song_counts.get(0, 0)
+    else:
+        highest_count = find_keyword_count_in_song(data, keyword, 0)
     if highest_count != 0:
         title_of_highest_count = data['songs'][0]['title']
     else:
         title_of_highest_count = ''
+    bad_songs = set(bad_song_indices)
     for i in range(len(data['songs'])):  # Loop through all the songs
         # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-        if i in set(bad_song_indices):
+        if i in bad_songs:
             continue
-        current_count = find_keyword_count_in_song(data, keyword, i)
+        if song_counts is not None:
+            current_count = song_counts.get(i, 0)
+        else:
+            current_count = find_keyword_count_in_song(data, keyword, i)
         if current_count > highest_count:
             highest_count = current_count
-            title_of_highest_count = data['songs'][i]['title'].replace('\u200b', '')
+            title_of_highest_count = clean_title(data['songs'][i]['title'])
             there_is_a_tie = False
             list_of_ties = []
         elif current_count == highest_count:
             there_is_a_tie = True
-            list_of_ties.append(data['songs'][i]['title'].replace('\u200b', ''))
+            list_of_ties.append(clean_title(data['songs'][i]['title']))
             pass
 
     list_of_info = [highest_count, title_of_highest_count]
@@ -1077,19 +1598,27 @@ def find_song_where_phrase_is_said_the_most(data, phrase, bad_song_indices):
                 print('[' + str(i) + ']', bad_song_indices[i])
         return ''
 
+    song_counts = None
+    if isinstance(data, LyricCorpus):  # Look up every song's count in the index instead of counting each song
+        song_counts = data.get_inverted_index().get_phrase_song_counts(normalize_search_term(phrase).split())
+
     highest_count = find_keyword_count_in_song(data, phrase, 0)
     if highest_count != 0:
         title_of_highest_count = data['songs'][0]['title']
     else:
         title_of_highest_count = ''
+    bad_songs = set(bad_song_indices)
     for i in range(len(data['songs'])):  # Loop through all the songs
         # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-        if i in set(bad_song_indices):
+        if i in bad_songs:
             continue
-        current_count = find_phrase_count_in_song(data, phrase, i)
+        if song_counts is not None:
+            current_count = song_counts.get(i, 0)
+        else:
+            current_count = find_phrase_count_in_song(data, phrase, i)
         if current_count > highest_count:
             highest_count = current_count
-            title_of_highest_count = data['songs'][i]['title'].replace('\u200b', '')
+            title_of_highest_count = clean_title(data['songs'][i]['title'])
 
     list_of_info = [highest_count, title_of_highest_count]
 
@@ -1119,22 +1648,17 @@ def find_all_word_counts_in_song(data, song_index, convert_to_list=False, counts
     """
     if counts is None:
         counts = Counter()
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    if lyrics is not None:
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        lyrics = lyrics.split()
-        counts = counts + Counter(lyrics)
+    counts = counts + get_word_counts(data, song_index)
 
     if convert_to_list:
         return list(counts.items())
     return counts
 
 
-def find_all_word_counts_in_all_songs(data, cumulative_counts, bad_song_indices):
+def find_all_word_counts_in_all_songs(data, cumulative_counts, bad_song_indices, workers=1):
     """
-    Counts how often every word occurs cumulatively in every song in data
+    Counts how often every word occurs cumulatively in every song in data. If data is a LyricCorpus, the corpus' word
+    count matrix is used and workers is ignored
 
     Parameters
     -------
@@ -1145,6 +1669,8 @@ def find_all_word_counts_in_all_songs(data, cumulative_counts, bad_song_indices)
 
     bad_song_indices : list
         list of song indices to skip
+    workers : int
+        number of processes to count with, None to use every cpu. See map_songs
 
     Returns
     -------
@@ -1169,11 +1695,12 @@ def find_all_word_counts_in_all_songs(data, cumulative_counts, bad_song_indices)
                 print('[' + str(i) + ']', bad_song_indices[i])
         return Counter()
 
-    for i in range(len(data['songs'])):  # loop through all the songs
-        # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-        if i in set(bad_song_indices):
-            continue
-        cumulative_counts = find_all_word_counts_in_song(data, i, counts=cumulative_counts)
+    if isinstance(data, LyricCorpus):  # Sum the corpus' song x word count matrix instead of adding up every song
+        cumulative_counts = cumulative_counts + data.get_word_count_matrix().get_total_counts(bad_song_indices)
+    else:
+        bad_songs = set(bad_song_indices)
+        song_indices = [i for i in range(len(data['songs'])) if i not in bad_songs]
+        cumulative_counts = cumulative_counts + map_songs(data, get_word_counts, song_indices, add_counters, workers)
 
     print("The total counts are: ", cumulative_counts)
 
@@ -1200,13 +1727,7 @@ def find_most_word_counts_in_song(data, song_index, counts, words_to_omit):
     counts : Counter
         Counter Object that will hold every word and how often it occurs
     """
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    if lyrics is not None:
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        lyrics = lyrics.split()
-        counts = counts + Counter(lyrics)
+    counts = counts + get_word_counts(data, song_index)
 
     for word in words_to_omit:
         if word in counts:
@@ -1234,11 +1755,23 @@ def find_most_word_counts_in_all_songs(data, cumulative_counts, bad_song_indices
     cumulative_counts : Counter
         cumulative Counter Object that will hold every word and how often it occurs
     """
-    for i in range(len(data['songs'])):  # loop through all the songs
-        # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-        if i in set(bad_song_indices):
-            continue
-        cumulative_counts = find_all_word_counts_in_song(data, i, cumulative_counts)
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return Counter()
+
+    if isinstance(data, LyricCorpus):  # Sum the corpus' song x word count matrix instead of adding up every song
+        cumulative_counts = cumulative_counts + data.get_word_count_matrix().get_total_counts(bad_song_indices)
+    else:
+        for i in range(len(data['songs'])):  # loop through all the songs
+            # if current song is an empty string, don't bother trying to analyze the song and continue to next song
+            if i in set(bad_song_indices):
+                continue
+            cumulative_counts = find_all_word_counts_in_song(data, i, counts=cumulative_counts)
 
     for word in words_to_omit:
         if word in cumulative_counts:
@@ -1266,12 +1799,8 @@ def find_all_word_counts_in_song_by_artist(data, song_index, counts, artist_name
     counts : Counter
         Counter Object that will hold every word and how often it occurs
     """
-    list_of_each_lyric = get_only_artist_lyrics_in_song(data, song_index, artist_name)
-    if list_of_each_lyric is not None:
-        list_of_each_lyric = list_of_each_lyric.lower()
-        list_of_each_lyric = remove_punctuation(list_of_each_lyric)
-        list_of_each_lyric = list_of_each_lyric.split()
-        counts = counts + Counter(list_of_each_lyric)
+    list_of_each_lyric = get_artist_tokens(data, song_index, artist_name)
+    counts = counts + Counter(list_of_each_lyric)
     return counts
 
 
@@ -1295,6 +1824,18 @@ def find_all_word_counts_in_all_songs_by_artist(data, cumulative_counts, bad_son
     cumulative_counts : Counter
         Counter Object that will hold every word and how often it occurs
     """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return Counter()
+
+    if isinstance(data, LyricCorpus):  # Sum the artist's song x word count matrix instead of adding up every song
+        return cumulative_counts + data.get_word_count_matrix(artist_name).get_total_counts(bad_song_indices)
+
     for i in range(len(data['songs'])):  # loop through all the songs
         if i in set(bad_song_indices):
             continue
@@ -1302,6 +1843,41 @@ def find_all_word_counts_in_all_songs_by_artist(data, cumulative_counts, bad_son
     return cumulative_counts
 
 
+def find_top_words_in_all_songs(data, bad_song_indices, top_k=10, words_to_omit=()):
+    """
+    Finds the most common words in every song in data
+
+    Parameters
+    -------
+    data : json or LyricCorpus
+        the json where the Genius data is stored in, or a LyricCorpus built from it
+    bad_song_indices : list
+        list of song indices to not count words in
+    top_k : int
+        number of words to return
+    words_to_omit : list
+        list of words to not include in result
+
+    Returns
+    -------
+    list
+        list of tuples of (word, count), most common first, or empty list if bad_song_indices has invalid values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return []
+
+    if isinstance(data, LyricCorpus):  # Rank the totals of the corpus' song x word count matrix
+        return data.get_word_count_matrix().get_top_words(top_k, bad_song_indices, words_to_omit)
+    counts = find_most_word_counts_in_all_songs(data, Counter(), bad_song_indices, words_to_omit)
+    return counts.most_common(top_k)
+
+
 # Find list of songs containing the keyword or phrase
 def get_list_of_songs_with_keyword(data, keyword, bad_song_indices):
     """
@@ -1322,11 +1898,16 @@ def get_list_of_songs_with_keyword(data, keyword, bad_song_indices):
         list of songs the keyword appears in
     """
     list_of_songs = []
+    if isinstance(data, LyricCorpus):  # Only look at the songs the keyword appears in
+        for i in data.get_inverted_index().get_song_indices(normalize_search_term(keyword), bad_song_indices):
+            list_of_songs.append(clean_title(data['songs'][i]['title']))
+        return list_of_songs
+
     for i in range(len(data['songs'])):  # loop through all the songs
         if i in set(bad_song_indices):
             continue
         if find_keyword_count_in_song(data, keyword, i) > 0:
-            list_of_songs.append(data['songs'][i]['title'].replace('\u200b', ''))
+            list_of_songs.append(clean_title(data['songs'][i]['title']))
 
     return list_of_songs
 
@@ -1350,26 +1931,45 @@ def get_list_of_songs_with_phrase(data, phrase, bad_song_indices):
         list of songs the phrase appears in
     """
     list_of_songs = []
-    phrase = phrase.lower()
+    for i in get_list_of_song_indices_with_phrase(data, phrase, bad_song_indices):
+        song_title = data['songs'][i]['title']
+        list_of_songs.append(clean_title(song_title))
+
+    return list_of_songs
+
+
+def get_list_of_song_indices_with_phrase(data, phrase, bad_song_indices):
+    """
+    Get list of indices of songs that have at least 1 occurrence of the phrase
+
+    Parameters
+    -------
+    data : json
+        the json where the Genius data is stored in
+    phrase : str
+        the phrase to find songs it appears in
+    bad_song_indices : list
+        list of song indices to not look in
+
+    Returns
+    -------
+    list_of_song_indices : list
+        list of indices of songs the phrase appears in, in order
+    """
+    phrase_words = normalize_search_term(phrase).split()
+    if isinstance(data, LyricCorpus):  # Only look at the songs the phrase's words appear in
+        return list(data.get_inverted_index().get_phrase_song_counts(phrase_words, bad_song_indices))
+
+    list_of_song_indices = []
     for i in range(len(data['songs'])):  # loop through all the songs
         # if current song is an empty string, don't bother trying to analyze the song and continue to next song
         if i in set(bad_song_indices):
             continue
-        lyrics = data['songs'][i]['lyrics']
-        lyrics = remove_headers_from_lyrics(lyrics)
-        song_title = data['songs'][i]['title']
-        if lyrics is not None:
-            lyrics = lyrics.lower()
-            lyrics = remove_punctuation(lyrics)
-            # This catches weird bug where spaces werent actually spaces
-            lyrics = lyrics.replace('\u2005', ' ')
-            list_of_matches = re.findall(r'\b' + phrase + r'\b', lyrics)
-            phrase_count = len(list_of_matches)
-            if phrase_count > 0:
-                # This replace catches weird bug where \u200b was showing up in print(list_of_songs) entries
-                list_of_songs.append(song_title.replace('\u200b', ''))
+        tokens, line_offsets = get_song_tokens_with_lines(data, i)
+        if count_phrase_in_tokens(tokens, line_offsets, phrase_words) > 0:
+            list_of_song_indices.append(i)
 
-    return list_of_songs
+    return list_of_song_indices
 
 
 def get_list_of_songs_without_phrase(data, phrase, bad_song_indices):
@@ -1391,20 +1991,15 @@ def get_list_of_songs_without_phrase(data, phrase, bad_song_indices):
         list of songs that do not contain the given phrase
 
     """
-    list_of_all_songs = []
-    list_of_songs_with_phrase = get_list_of_songs_with_phrase(data, phrase, bad_song_indices)
+    songs_with_phrase = set(get_list_of_song_indices_with_phrase(data, phrase, bad_song_indices))
+    bad_songs = set(bad_song_indices)
     list_of_songs_without_phrase = []
     for i in range(len(data['songs'])):
-        if i in set(bad_song_indices):
+        if i in bad_songs or i in songs_with_phrase:
             continue
         current_song_title = data['songs'][i]['title']
-        current_song_title = current_song_title.replace('\u200b', '')
-        list_of_all_songs.append(current_song_title)
-    for i in range(len(list_of_all_songs)):
-        if list_of_all_songs[i] in list_of_songs_with_phrase:
-            continue
-        else:
-            list_of_songs_without_phrase.append(list_of_all_songs[i])
+        current_song_title = clean_title(current_song_title)
+        list_of_songs_without_phrase.append(current_song_title)
 
     return list_of_songs_without_phrase
 
@@ -1430,16 +2025,14 @@ def get_list_of_songs_with_keyword_by_artist(data, keyword, bad_song_indices, ar
         list of songs that contain the keyword by the artist
     """
     list_of_songs = []
+    keyword = normalize_search_term(keyword)
     for i in range(len(data['songs'])):  # loop through all the songs
         # if current song is an empty string, don't bother trying to analyze the song and continue to next song
         if i in set(bad_song_indices):
             continue
-        lyrics = get_only_artist_lyrics_in_song(data, i, artist_name)
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        lyrics = lyrics.split()
+        lyrics = get_artist_tokens(data, i, artist_name)
         if keyword in lyrics:
-            list_of_songs.append(data['songs'][i]['title'].replace('\u200b', ''))
+            list_of_songs.append(clean_title(data['songs'][i]['title']))
 
     return list_of_songs
 
@@ -1469,13 +2062,8 @@ def get_list_of_songs_with_phrase_by_artist(data, phrase, bad_song_indices, arti
         # if current song is an empty string, don't bother trying to analyze the song and continue to next song
         if i in set(bad_song_indices):
             continue
-        lyrics = get_only_artist_lyrics_in_song(data, i, artist_name)
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        list_of_matches = re.findall(r'\b' + phrase + r'\b', lyrics)
-        phrase_count = len(list_of_matches)
-        if phrase_count > 0:
-            list_of_songs.append(data['songs'][i]['title'].replace('\u200b', ''))
+        if find_phrase_count_in_song_by_artist(data, phrase, i, artist_name) > 0:
+            list_of_songs.append(clean_title(data['songs'][i]['title']))
 
     return list_of_songs
 
@@ -1486,15 +2074,8 @@ def filter_count_object(counts, part_of_speech):
     Removes words that don't fall under the part_of_speech from a Counter Object
     """
 
-    if part_of_speech == 'noun':
-        from nltk.corpus import wordnet as wn  # this takes some time, so we only load it if we call this function
-        good_words = {x.name().split('.', 1)[0] for x in wn.all_synsets('n')}
-    elif part_of_speech == 'verb':
-        from nltk.corpus import wordnet as wn  # this takes some time, so we only load it if we call this function
-        good_words = {x.name().split('.', 1)[0] for x in wn.all_synsets('v')}
-    elif part_of_speech == 'adjective':
-        from nltk.corpus import wordnet as wn  # this takes some time, so we only load it if we call this function
-        good_words = {x.name().split('.', 1)[0] for x in wn.all_synsets('a')}
+    if part_of_speech in {'noun', 'verb', 'adjective'}:
+        good_words = get_wordnet_words(part_of_speech)  # Loaded from the lexicon file once per run
     else:
         print("Invalid part of speech input")
         return counts
@@ -1522,39 +2103,162 @@ def custom_white_list_count_object(counts, white_list):
     return counts
 
 
+def find_common_ngrams_between_songs(data, song_index1, song_index2, n=2, return_counts=False):
+    """
+    Finds every n word phrase that is in both songs. Each song's phrases are counted once into a hash table, so this
+    takes time linear in the length of the songs. If data is a LyricCorpus, the counts are kept for later calls.
+
+    Parameters
+    ----------
+    data : json
+        json with song info
+    song_index1 : int
+        index of the first song
+    song_index2 : int
+        index of the second song
+    n : int
+        number of words in each phrase, optional param
+    return_counts : bool
+        if True, also return how often each common phrase appears in each song, optional param
+
+    Returns
+    -------
+    set or dict
+        set of the common phrases, or if return_counts is True, a dictionary of common phrase to a tuple of
+        (count in song 1, count in song 2)
+    """
+    if n < 1:
+        print("n must be at least 1")
+        return {} if return_counts else set()
+    if isinstance(data, LyricCorpus):  # The counts are only read here, so the corpus' own counts aren't copied
+        counts1 = data.get_ngram_counts(song_index1, n)
+        counts2 = data.get_ngram_counts(song_index2, n)
+    else:
+        counts1 = get_ngram_counts(data, song_index1, n)
+        counts2 = get_ngram_counts(data, song_index2, n)
+    # Only the smaller song's phrases have to be looked up in the other song
+    smaller_counts, larger_counts = (counts1, counts2) if len(counts1) <= len(counts2) else (counts2, counts1)
+    common_ngrams = [ngram for ngram in smaller_counts if ngram in larger_counts]
+
+    if return_counts:
+        return {' '.join(ngram): (counts1[ngram], counts2[ngram]) for ngram in common_ngrams}
+    return {' '.join(ngram) for ngram in common_ngrams}
+
+
+def get_song_similarity_index(data, shingle_size=3, num_perm=128, num_bands=32):
+    """
+    Builds the MinHash/LSH index of every song's lyrics, see SongSimilarityIndex. If data is a LyricCorpus, the index
+    is only built once and kept for later calls
+
+    Parameters
+    ----------
+    data : json
+        json with song info
+    shingle_size : int
+        number of words in each shingle, optional param
+    num_perm : int
+        length of every MinHash signature, optional param
+    num_bands : int
+        number of LSH bands, optional param. num_perm has to be a multiple of it. More bands finds less similar songs
+        but gives more candidates to check
+
+    Returns
+    -------
+    SongSimilarityIndex
+        the index, where song numbers are song indices
+    """
+    if isinstance(data, LyricCorpus):
+        return data.get_similarity_index(shingle_size, num_perm, num_bands)
+    list_of_token_lists = [get_song_tokens(data, i) for i in range(len(data['songs']))]
+    return SongSimilarityIndex(list_of_token_lists, shingle_size, num_perm, num_bands)
+
+
+def find_most_similar_songs(data, song_index, bad_song_indices, top_k=5, shingle_size=3):
+    """
+    Finds the songs that share the most lyrics with a song, using the estimated Jaccard similarity of their word
+    shingles. Only songs that share an LSH bucket with the song are compared, so most songs are never looked at
+
+    Parameters
+    ----------
+    data : json
+        json with song info
+    song_index : int
+        index of the song to find similar songs for
+    bad_song_indices : list
+        list of song indices to leave out of the results
+    top_k : int
+        number of songs to return, optional param
+    shingle_size : int
+        number of words in each shingle, optional param
+
+    Returns
+    -------
+    list
+        list of tuples of (song_index, title, estimated similarity), most similar first. Returns an empty list if
+        song_index or bad_song_indices has invalid values
+    """
+    if not is_valid_indices_list(data, [song_index]):
+        print("Invalid song_index")
+        return []
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return []
+
+    similarity_index = get_song_similarity_index(data, shingle_size)
+    similar_songs = similarity_index.find_similar_songs(song_index, top_k, bad_song_indices)
+    return [(i, clean_title(data['songs'][i]['title']), similarity) for i, similarity in similar_songs]
+
+
+def find_similar_song_pairs(data, bad_song_indices, threshold=0.5, shingle_size=3):
+    """
+    Finds every pair of songs whose estimated Jaccard similarity is at least threshold, without comparing every pair
+    of songs. Pairs much less similar than about 0.4 are unlikely to share an LSH bucket and may be missed
+
+    Parameters
+    ----------
+    data : json
+        json with song info
+    bad_song_indices : list
+        list of song indices to leave out of the results
+    threshold : float
+        smallest estimated similarity to include, optional param
+    shingle_size : int
+        number of words in each shingle, optional param
+
+    Returns
+    -------
+    list
+        list of tuples of (song_index1, song_index2, estimated similarity), most similar first. Returns an empty list
+        if bad_song_indices has invalid values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return []
+
+    similarity_index = get_song_similarity_index(data, shingle_size)
+    return similarity_index.find_similar_pairs(threshold, bad_song_indices)
+
+
 def find_common_two_word_phrases_in_two_songs(data, song_index1, song_index2):
     """Get list of two word common phrases among both songs"""
-    string1 = data['songs'][song_index1]['lyrics'].lower()
-    string1 = remove_headers_from_lyrics(string1)
-    string1 = remove_punctuation(string1)
-    string1 = string1.replace('\n', ' ')
-    string2 = data['songs'][song_index2]['lyrics'].lower()
-    string2 = remove_headers_from_lyrics(string2)
-    string2 = remove_punctuation(string2)
-    string2 = string2.replace('\n', ' ')
-    list1 = string1.split()
-    list2 = string2.split()
-    common_phrases = set()
-
-    for i in range(len(list1) - 1):  # Loop through each 2 word phrase in song 1
-        first_phrase = list1[i] + ' ' + list1[i + 1]
-        for j in range(len(list2) - 1):  # loop through each 2 word phrase in song 2
-            second_phrase = list2[j] + ' ' + list2[j + 1]
-            if first_phrase == second_phrase:
-                common_phrases.add(first_phrase)
-
-    return common_phrases
+    return find_common_ngrams_between_songs(data, song_index1, song_index2, 2)
 
 
 def get_two_word_phrases_in_song(data, song_index):
     """
     Return list of all two word phrases from the song. No duplicates
     """
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    lyrics = lyrics.lower()
-    lyrics = remove_punctuation(lyrics)
-    lyrics = lyrics.split()
+    lyrics = get_song_tokens(data, song_index)
     list_of_phrases = []
     for i in range(len(lyrics) - 1):
         phrase = lyrics[i] + " " + lyrics[i + 1]
@@ -1570,11 +2274,7 @@ def get_two_word_phrases_in_song_with_duplicates(data, song_index):
     """
     Return list of all two word phrases from the song
     """
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    lyrics = lyrics.lower()
-    lyrics = remove_punctuation(lyrics)
-    lyrics = lyrics.split()
+    lyrics = get_song_tokens(data, song_index)
     list_of_phrases = []
     for i in range(len(lyrics) - 1):
         phrase = lyrics[i] + " " + lyrics[i + 1]
@@ -1624,27 +2324,65 @@ def get_list_of_most_common_two_word_phrases_in_all_songs(data, bad_song_indices
         Counter object of all two word phrases in the songs
     """
 
-    initial_song = 0
-    song_count = 0
-    for i in range(len(data['songs'])):
-        if i not in set(bad_song_indices):
-            initial_song = i
-            break
-    # Initial Cumulative list is just set to first song
-    cumulative_list_of_phrases = get_two_word_phrases_in_song(data, initial_song)
-
-    for i in range(initial_song + 1, len(data['songs'])):  # Loop through all the songs
-        if i not in set(bad_song_indices):
-            song_count = song_count + 1
-            current_song = get_two_word_phrases_in_song(data, i)
-            cumulative_list_of_phrases.extend(current_song)
-    counts = Counter(cumulative_list_of_phrases)
+    bad_songs = set(bad_song_indices)
+    counts = Counter()
+    for i in range(len(data['songs'])):  # Loop through all the songs
+        if i not in bad_songs:
+            counts.update(get_two_word_phrases_in_song(data, i))
     return counts
 
 
-def find_most_repeated_phrases_of_any_length_in_song(data, song_index):
+def find_most_repeated_phrases_in_all_songs(data, bad_song_indices, min_length=2, max_length=None, min_count=2,
+                                            min_songs=1, top_k=None, sort_by='count'):
+    """
+    Finds the most repeated phrases of any length across every song. Uses one suffix array over every song's words,
+    so phrases that aren't repeated are never built, and counts how many different songs each phrase is in.
+
+    Parameters
+    ----------
+    data : json
+        json with song info
+    bad_song_indices : list
+        list of song indices to ignore
+    min_length : int
+        shortest phrase (in words) to include, optional param
+    max_length : int
+        longest phrase (in words) to include, optional param
+    min_count : int
+        fewest times a phrase has to appear in total to be included, optional param
+    min_songs : int
+        fewest songs a phrase has to appear in to be included, optional param
+    top_k : int
+        if given, only the top_k phrases are kept, optional param
+    sort_by : str
+        'count' to sort by total count, 'songs' to sort by number of songs, 'length' to sort longest first, optional
+        param
+
+    Returns
+    -------
+    list
+        list of tuples of (phrase, total_count, number_of_songs). Returns an empty list if bad_song_indices has invalid
+        values
+    """
+    if not is_valid_indices_list(data, bad_song_indices):
+        print("Invalid Values in bad_song_indices, please remove them:\n")
+        for i in range(len(bad_song_indices)):
+            if not isinstance(bad_song_indices[i], int):
+                print('[' + str(i) + ']', bad_song_indices[i])
+            elif bad_song_indices[i] < 0 or bad_song_indices[i] > len(data['songs']) - 1:
+                print('[' + str(i) + ']', bad_song_indices[i])
+        return []
+
+    bad_songs = set(bad_song_indices)
+    list_of_token_lists = [get_song_tokens(data, i) for i in range(len(data['songs'])) if i not in bad_songs]
+    return find_repeated_phrases_in_songs(list_of_token_lists, min_length, max_length, min_count, min_songs, top_k,
+                                          sort_by)
+
+
+def find_most_repeated_phrases_of_any_length_in_song(data, song_index, min_length=1, min_count=1, top_k=None):
     """
-    Will scan through a song's lyrics and try to find the most repeated phrases.
+    Will scan through a song's lyrics and try to find the most repeated phrases. Uses a suffix array of the song's
+    words, so phrases that aren't repeated are never built.
 
     Parameters
     ----------
@@ -1652,35 +2390,21 @@ def find_most_repeated_phrases_of_any_length_in_song(data, song_index):
         json with song info
     song_index : int
         the song index of the song we want to find the repeated phrases for
+    min_length : int
+        shortest phrase (in words) to include, optional param
+    min_count : int
+        fewest times a phrase has to appear to be included, optional param. Every phrase in the song is included by
+        default, use 2 to only keep repeated phrases
+    top_k : int
+        if given, only the top_k most repeated phrases are kept, optional param
 
     Returns
     -------
     phrase_counts : Counter
-        Counter object of all phrases of any length in the song
+        Counter object of phrases of any length in the song and their counts
     """
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    lyrics = lyrics.lower()
-    lyrics = remove_punctuation(lyrics)
-    lyrics = lyrics.split()
-
-    list_of_all_phrases = []
-
-    for phrase_length in range(1, len(lyrics) + 1):
-        first_word_index = 0
-        last_word_index = phrase_length - 1
-        for j in range(last_word_index, len(lyrics)):
-            current_phrase_list = lyrics[first_word_index:first_word_index + phrase_length]
-            current_phrase = ""
-            for i, word in enumerate(current_phrase_list):
-                if i is len(current_phrase_list) - 1:
-                    current_phrase += str(word)
-                else:
-                    current_phrase += str(word) + " "
-            list_of_all_phrases.append(current_phrase)
-            first_word_index = first_word_index + 1
-            last_word_index = last_word_index + 1
-    phrases_counts = Counter(list_of_all_phrases)
+    lyrics = get_song_tokens(data, song_index)
+    phrases_counts = find_repeated_phrases_in_tokens(lyrics, min_length, min_count, top_k)
 
     return phrases_counts
 
@@ -1792,6 +2516,7 @@ def analyze_song(data, song_index):
     song_info.append(find_total_unique_words_in_song(data, song_index))
     song_info.append(find_uniqueness_percent_of_song(data, song_index))
     song_info.append(find_all_word_counts_in_song(data, song_index, Counter()).most_common(5))
+    # The song is only tagged by spacy once, the ADJ and ADV counts reuse the tags
     song_info.append(find_pos_counts_in_song(data, song_index, 'NOUN').most_common(5))
 
     # repeated adjectives
@@ -1898,18 +2623,12 @@ def find_substring_count_in_song(data, substring, song_index):
     int
         an int with how often the substring appears in the song
     """
-    substring = substring.lower()
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
-    if lyrics is not None:
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        lyrics = lyrics.replace('\u200b', '')  # Catch weird bug where \u200b was showing up in some keywords
-
+    substring = normalize_search_term(substring)
+    lyrics = get_cleaned_lyrics(data, song_index)
     return lyrics.count(substring)
 
 
-def find_substring_count_in_all_songs(data, substring, bad_song_indices):
+def find_substring_count_in_all_songs(data, substring, bad_song_indices, workers=1):
     """
     Will go through the entire list of songs (in data) and count how many times the substring appears in total
 
@@ -1921,6 +2640,8 @@ def find_substring_count_in_all_songs(data, substring, bad_song_indices):
         the substring to count in all the songs in data
     bad_song_indices : list
         list of song indices to print their titles
+    workers : int
+        number of processes to count with, None to use every cpu. See map_songs
 
     Returns
     -------
@@ -1937,13 +2658,11 @@ def find_substring_count_in_all_songs(data, substring, bad_song_indices):
                 print('[' + str(i) + ']', bad_song_indices[i])
         return 0
 
-    substring = substring.lower()
-    substring_count = 0
-    for i in range(len(data['songs'])):  # Loop through every song in data
-        # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-        if i in set(bad_song_indices):
-            continue
-        substring_count = substring_count + find_substring_count_in_song(data, substring, i)
+    substring = normalize_search_term(substring)
+    bad_songs = set(bad_song_indices)
+    song_indices = [i for i in range(len(data['songs'])) if i not in bad_songs]
+    substring_count = map_songs(data, partial(find_substring_count_in_song, substring=substring), song_indices,
+                                add_numbers, workers)
     return substring_count
 
 
@@ -1986,12 +2705,12 @@ def find_song_where_substring_is_said_the_most(data, substring, bad_song_indices
         current_count = find_substring_count_in_song(data, substring, i)
         if current_count > highest_count:
             highest_count = current_count
-            title_of_highest_count = data['songs'][i]['title'].replace('\u200b', '')
+            title_of_highest_count = clean_title(data['songs'][i]['title'])
             there_is_a_tie = False
             list_of_ties = []
         elif current_count == highest_count:
             there_is_a_tie = True
-            list_of_ties.append(data['songs'][i]['title'].replace('\u200b', ''))
+            list_of_ties.append(clean_title(data['songs'][i]['title']))
             pass
 
     list_of_info = [highest_count, title_of_highest_count]
@@ -2018,13 +2737,9 @@ def get_list_of_lyric_lines_containing_keyword_in_song(data, song_index, keyword
         list of lines in the song's lyrics containing the keyword
     """
     list_of_lines_containing_keyword = []
-    keyword = keyword.lower()
-    lyrics = data['songs'][song_index]['lyrics']
-    lyrics = remove_headers_from_lyrics(lyrics)
+    keyword = normalize_search_term(keyword)
+    lyrics = get_cleaned_lyrics(data, song_index)
     if lyrics is not None:
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        lyrics = lyrics.replace('\u200b', '')  # Catch weird bug where \u200b was showing up in some keywords
         lyrics = lyrics + "\n"  # add an extra \n to the end of the lyrics to aid in the next steps
         lyrics = repr(lyrics)
         current_index = 0
@@ -2091,7 +2806,7 @@ def get_list_of_lyric_lines_containing_keyword_in_song(data, song_index, keyword
     return list_of_lines_containing_keyword
 
 
-def get_list_of_lyric_lines_containing_keyword_in_all_songs(data, keyword, bad_song_indices):
+def get_list_of_lyric_lines_containing_keyword_in_all_songs(data, keyword, bad_song_indices, workers=1):
     """
     Get a list of song lines that contain the given keyword in all songs. Will only add a line if the keyword is the
     whole word and not if it is part of a bigger word (e.g "the" in "other" will not add the line to the list)
@@ -2104,6 +2819,8 @@ def get_list_of_lyric_lines_containing_keyword_in_all_songs(data, keyword, bad_s
         substring to check in each song
     bad_song_indices : list
         list of song indices to print their titles
+    workers : int
+        number of processes to search with, None to use every cpu. See map_songs
 
     Returns
     -------
@@ -2121,12 +2838,10 @@ def get_list_of_lyric_lines_containing_keyword_in_all_songs(data, keyword, bad_s
                 print('[' + str(i) + ']', bad_song_indices[i])
         return []
 
-    for i in range(len(data['songs'])):  # loop through all the songs
-        # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-        if i in set(bad_song_indices):
-            continue
-        x = get_list_of_lyric_lines_containing_keyword_in_song(data, i, keyword)
-        list_of_lines_containing_keyword = list_of_lines_containing_keyword + x
+    bad_songs = set(bad_song_indices)
+    song_indices = [i for i in range(len(data['songs'])) if i not in bad_songs]
+    find_lines = partial(get_list_of_lyric_lines_containing_keyword_in_song, keyword=keyword)
+    list_of_lines_containing_keyword = map_songs(data, find_lines, song_indices, concatenate_lists, workers)
 
     # remove empty lists from list
     list_of_lines_containing_keyword = [ele for ele in list_of_lines_containing_keyword if ele != []]
@@ -2155,12 +2870,10 @@ def get_list_of_lyric_lines_containing_keyword_in_song_by_artist(data, song_inde
         list of lines in the song's lyrics containing the keyword by artist
     """
     list_of_lines_containing_keyword = []
-    keyword = keyword.lower()
-    lyrics = get_only_artist_lyrics_in_song(data, song_index, artist_name)
+    keyword = normalize_search_term(keyword)
+    lyrics = get_artist_lyrics(data, song_index, artist_name)
     if lyrics is not None:
-        lyrics = lyrics.lower()
-        lyrics = remove_punctuation(lyrics)
-        lyrics = lyrics.replace('\u200b', '')  # Catch weird bug where \u200b was showing up in some keywords
+        lyrics = normalize_lyrics(lyrics)
         lyrics = lyrics + "\n"  # add an extra \n to the end of the lyrics to aid in the next steps
         lyrics = repr(lyrics)
         current_index = 0
@@ -2227,7 +2940,8 @@ def get_list_of_lyric_lines_containing_keyword_in_song_by_artist(data, song_inde
     return list_of_lines_containing_keyword
 
 
-def get_list_of_lyric_lines_containing_keyword_in_all_songs_by_artist(data, keyword, bad_song_indices, artist_name):
+def get_list_of_lyric_lines_containing_keyword_in_all_songs_by_artist(data, keyword, bad_song_indices, artist_name,
+                                                                      workers=1):
     """
     Get a list of song lines that contain the given keyword in all songs. Will only add a line if the keyword is the
     whole word and not if it is part of a bigger word (e.g "the" in "other" will not add the line to the list)
@@ -2242,6 +2956,8 @@ def get_list_of_lyric_lines_containing_keyword_in_all_songs_by_artist(data, keyw
         list of song indices to print their titles
     artist_name : str
         name of artist to only check lyrics from
+    workers : int
+        number of processes to search with, None to use every cpu. See map_songs
 
     Returns
     -------
@@ -2259,12 +2975,11 @@ def get_list_of_lyric_lines_containing_keyword_in_all_songs_by_artist(data, keyw
                 print('[' + str(i) + ']', bad_song_indices[i])
         return []
 
-    for i in range(len(data['songs'])):  # loop through all the songs
-        # if current song is an empty string, don't bother trying to analyze the song and continue to next song
-        if i in set(bad_song_indices):
-            continue
-        x = get_list_of_lyric_lines_containing_keyword_in_song_by_artist(data, i, keyword, artist_name)
-        list_of_lines_containing_keyword = list_of_lines_containing_keyword + x
+    bad_songs = set(bad_song_indices)
+    song_indices = [i for i in range(len(data['songs'])) if i not in bad_songs]
+    find_lines = partial(get_list_of_lyric_lines_containing_keyword_in_song_by_artist, keyword=keyword,
+                         artist_name=artist_name)
+    list_of_lines_containing_keyword = map_songs(data, find_lines, song_indices, concatenate_lists, workers)
 
     # remove empty lists from list
     list_of_lines_containing_keyword = [ele for ele in list_of_lines_containing_keyword if ele != []]
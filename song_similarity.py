@@ -0,0 +1,239 @@
+# MinHash signatures and locality sensitive hashing, used to find songs that share lyrics without comparing every pair
+# of songs
+import random
+import zlib
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def get_shingle_hashes(tokens, shingle_size=3):
+    """
+    Hashes every shingle (run of shingle_size words) in tokens. crc32 is used instead of hash() so the values are the
+    same on every run
+
+    Parameters
+    ----------
+    tokens : list
+        list of words
+    shingle_size : int
+        number of words in each shingle
+
+    Returns
+    -------
+    set
+        set of 32 bit shingle hashes. Songs shorter than shingle_size have a single shingle of every word
+    """
+    if len(tokens) < shingle_size:
+        shingles = [tokens] if tokens else []
+    else:
+        shingles = [tokens[i:i + shingle_size] for i in range(len(tokens) - shingle_size + 1)]
+    return {zlib.crc32(' '.join(shingle).encode('utf-8')) for shingle in shingles}
+
+
+def estimate_jaccard_similarity(signature1, signature2):
+    """
+    Estimates the Jaccard similarity of two shingle sets from their MinHash signatures, which is the fraction of
+    positions where the signatures agree
+    """
+    if not signature1 or len(signature1) != len(signature2):
+        return 0.0
+    return sum(1 for value1, value2 in zip(signature1, signature2) if value1 == value2) / len(signature1)
+
+
+class MinHasher:
+    """
+    Builds MinHash signatures. Each of the num_perm hash functions is h(x) = (a * x + b) mod p for a random a and b,
+    and a signature is the smallest value of each hash function over a set of shingle hashes
+
+    Parameters
+    ----------
+    num_perm : int
+        number of hash functions, so the length of every signature
+    seed : int
+        seed for picking the hash functions, signatures are only comparable if they use the same seed
+    """
+
+    def __init__(self, num_perm=128, seed=1):
+        generator = random.Random(seed)
+        self.num_perm = num_perm
+        self.hash_functions = [(generator.randrange(1, MERSENNE_PRIME), generator.randrange(0, MERSENNE_PRIME))
+                               for i in range(num_perm)]
+
+    def get_signature(self, shingle_hashes):
+        """
+        Returns the MinHash signature of a set of shingle hashes as a tuple of num_perm ints, or None if the set is
+        empty
+        """
+        if not shingle_hashes:
+            return None
+        return tuple(min((a * x + b) % MERSENNE_PRIME for x in shingle_hashes) & MAX_HASH
+                     for a, b in self.hash_functions)
+
+
+class LSHIndex:
+    """
+    Splits every signature into num_bands bands of rows_per_band values and puts the song into one bucket per band.
+    Two songs are candidates if they share any bucket, which happens with high probability when their Jaccard
+    similarity is above about (1 / num_bands) ** (1 / rows_per_band)
+
+    Parameters
+    ----------
+    num_bands : int
+        number of bands each signature is split into
+    rows_per_band : int
+        number of signature values in each band
+    """
+
+    def __init__(self, num_bands, rows_per_band):
+        self.num_bands = num_bands
+        self.rows_per_band = rows_per_band
+        self.buckets = {}
+
+    def get_band_keys(self, signature):
+        """
+        Returns the bucket key of every band of the signature
+        """
+        rows = self.rows_per_band
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.num_bands)]
+
+    def add(self, key, signature):
+        """
+        Adds a song's signature to the index under key
+        """
+        for band_key in self.get_band_keys(signature):
+            if band_key in self.buckets:
+                self.buckets[band_key].append(key)
+            else:
+                self.buckets[band_key] = [key]
+
+    def get_candidates(self, signature):
+        """
+        Returns the set of keys that share at least one bucket with the signature
+        """
+        candidates = set()
+        for band_key in self.get_band_keys(signature):
+            candidates.update(self.buckets.get(band_key, []))
+        return candidates
+
+    def get_candidate_pairs(self):
+        """
+        Returns the set of (key1, key2) pairs with key1 < key2 that share at least one bucket
+        """
+        candidate_pairs = set()
+        for keys in self.buckets.values():
+            for i in range(len(keys)):
+                for j in range(i + 1, len(keys)):
+                    candidate_pairs.add((keys[i], keys[j]) if keys[i] < keys[j] else (keys[j], keys[i]))
+        return candidate_pairs
+
+
+class SongSimilarityIndex:
+    """
+    MinHash signatures of every song's word shingles, with an LSH index over them. Queries only compare a song with
+    the songs it shares a bucket with, instead of with every song
+
+    Parameters
+    ----------
+    list_of_token_lists : list
+        list of songs, where each song is the list of its words. Songs are referred to by their index in this list
+    shingle_size : int
+        number of words in each shingle
+    num_perm : int
+        length of every MinHash signature
+    num_bands : int
+        number of LSH bands, between 1 and num_perm. num_perm has to be a multiple of it, so every signature value is
+        in exactly one band
+    seed : int
+        seed for picking the MinHash hash functions
+    """
+
+    def __init__(self, list_of_token_lists, shingle_size=3, num_perm=128, num_bands=32, seed=1):
+        if not 1 <= num_bands <= num_perm or num_perm % num_bands != 0:
+            raise ValueError("num_bands has to be between 1 and num_perm and divide it evenly, got num_perm=" +
+                             str(num_perm) + " and num_bands=" + str(num_bands))
+        self.shingle_size = shingle_size
+        self.minhasher = MinHasher(num_perm, seed)
+        self.lsh_index = LSHIndex(num_bands, num_perm // num_bands)
+        self.signatures = []
+        for song_number, tokens in enumerate(list_of_token_lists):
+            signature = self.minhasher.get_signature(get_shingle_hashes(tokens, shingle_size))
+            self.signatures.append(signature)
+            if signature is not None:  # Songs without lyrics aren't similar to anything
+                self.lsh_index.add(song_number, signature)
+
+    def check_song_number(self, song_number):
+        """
+        Raises a ValueError if song_number isn't the number of a song in the index
+        """
+        if not isinstance(song_number, int) or not 0 <= song_number < len(self.signatures):
+            raise ValueError("song number " + repr(song_number) + " is not between 0 and " +
+                             str(len(self.signatures) - 1))
+
+    def get_similarity(self, song_number1, song_number2):
+        """
+        Returns the estimated Jaccard similarity of two songs' shingles
+        """
+        self.check_song_number(song_number1)
+        self.check_song_number(song_number2)
+        signature1 = self.signatures[song_number1]
+        signature2 = self.signatures[song_number2]
+        if signature1 is None or signature2 is None:
+            return 0.0
+        return estimate_jaccard_similarity(signature1, signature2)
+
+    def find_similar_songs(self, song_number, top_k=5, excluded_song_numbers=()):
+        """
+        Finds the songs most similar to song_number among the songs it shares an LSH bucket with
+
+        Parameters
+        ----------
+        song_number : int
+            the song to find similar songs for
+        top_k : int
+            number of songs to return
+        excluded_song_numbers : iterable
+            songs to leave out of the results
+
+        Returns
+        -------
+        list
+            list of tuples of (song_number, estimated similarity), most similar first
+        """
+        self.check_song_number(song_number)
+        signature = self.signatures[song_number]
+        if signature is None:
+            return []
+        excluded = set(excluded_song_numbers)
+        excluded.add(song_number)
+        similar_songs = [(candidate, self.get_similarity(song_number, candidate))
+                         for candidate in self.lsh_index.get_candidates(signature) if candidate not in excluded]
+        similar_songs.sort(key=lambda similar_song: (-similar_song[1], similar_song[0]))
+        return similar_songs[:top_k]
+
+    def find_similar_pairs(self, threshold=0.5, excluded_song_numbers=()):
+        """
+        Finds every pair of songs sharing an LSH bucket whose estimated similarity is at least threshold
+
+        Parameters
+        ----------
+        threshold : float
+            smallest estimated similarity to include
+        excluded_song_numbers : iterable
+            songs to leave out of the results
+
+        Returns
+        -------
+        list
+            list of tuples of (song_number1, song_number2, estimated similarity), most similar first
+        """
+        excluded = set(excluded_song_numbers)
+        similar_pairs = []
+        for song_number1, song_number2 in self.lsh_index.get_candidate_pairs():
+            if song_number1 in excluded or song_number2 in excluded:
+                continue
+            similarity = self.get_similarity(song_number1, song_number2)
+            if similarity >= threshold:
+                similar_pairs.append((song_number1, song_number2, similarity))
+        similar_pairs.sort(key=lambda similar_pair: (-similar_pair[2], similar_pair[0], similar_pair[1]))
+        return similar_pairs
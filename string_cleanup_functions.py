@@ -1,5 +1,63 @@
 # Functions that aid in cleaning up strings
 # Not meant to be used or accessed by user
+import re
+from lyric_segments import find_artist_segments, join_artist_segments
+
+# A header is everything from a '[' to the next ']', e.g. [Verse 1: Khalid]. The group is the text inside the brackets
+HEADER_PATTERN = re.compile(r'\[([^\]]*)\]')
+
+PUNCTUATION = '''!()-[]{};:"\,<>./?@#$%^&*_~'''
+# Characters that take up no space, which sometimes show up inside words and titles retrieved from Genius
+ZERO_WIDTH_CHARACTERS = '\u200b\u200c\u200d\u2060\ufeff'
+# Space characters other than ' ' that show up in lyrics
+ODD_SPACE_CHARACTERS = '\u00a0\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u202f\u205f\u3000'
+SMART_QUOTES = {'\u2018': "'", '\u2019': "'", '\u02bc': "'", '\u201c': '"', '\u201d': '"'}
+
+
+class Normalizer:
+    """
+    Cleans up text with a single str.translate call, using a table that is only built once. Zero width characters are
+    always removed and odd space characters always become normal spaces
+
+    Parameters
+    ----------
+    lowercase : bool
+        if True, the text is lowercased as well
+    remove_punctuation : bool
+        if True, the characters in PUNCTUATION are removed
+    keep_apostrophes : bool
+        if False, apostrophes are removed along with the rest of the punctuation (so "don't" becomes "dont")
+    replace_smart_quotes : bool
+        if True, curly quotes (e.g. \u2019) are treated as the straight quote they stand for
+    """
+
+    def __init__(self, lowercase=True, remove_punctuation=True, keep_apostrophes=True, replace_smart_quotes=True):
+        self.lowercase = lowercase
+        table = dict.fromkeys(map(ord, ZERO_WIDTH_CHARACTERS))
+        table.update(dict.fromkeys(map(ord, ODD_SPACE_CHARACTERS), ' '))
+        removed_characters = ''
+        if remove_punctuation:
+            removed_characters = PUNCTUATION if keep_apostrophes else PUNCTUATION + "'"
+        if replace_smart_quotes:
+            for quote, replacement in SMART_QUOTES.items():
+                table[ord(quote)] = None if replacement in removed_characters else replacement
+        table.update(dict.fromkeys(map(ord, removed_characters)))
+        self.table = table
+
+    def normalize(self, text):
+        """
+        Returns the cleaned up text
+        """
+        if self.lowercase:
+            text = text.lower()
+        return text.translate(self.table)
+
+
+LYRIC_NORMALIZER = Normalizer()
+CASED_LYRIC_NORMALIZER = Normalizer(lowercase=False)
+SEARCH_TERM_NORMALIZER = Normalizer(remove_punctuation=False)
+TITLE_NORMALIZER = Normalizer(lowercase=False, remove_punctuation=False, replace_smart_quotes=False)
+
 
 def remove_duplicate_valid_indices(list_of_song_indices):
     """
@@ -23,7 +81,8 @@ def remove_duplicate_valid_indices(list_of_song_indices):
 
 def remove_punctuation(string):
     """
-    Removes punctuation from a string
+    Removes punctuation from a string. Zero width characters are removed, odd spaces (e.g. \u2005) are turned into
+    normal spaces and curly quotes into straight ones as well, all in one pass
 
     Parameters
     -------
@@ -35,19 +94,69 @@ def remove_punctuation(string):
     string
         the string without punctuation
     """
-    punc = '''!()-[]{};:"\,<>./?@#$%^&*_~'''
-    # punc = '''!()-[]'{};:"\,<>./?@#$%^&*_~''' #Uncomment this to remove apostrophes as well
-    for ele in string:
-        if ele in set(punc):
-            string = string.replace(ele, "")
-    return string
+    return CASED_LYRIC_NORMALIZER.normalize(string)
+
+
+def normalize_lyrics(string):
+    """
+    Lowercases a string and removes punctuation the same way remove_punctuation does. Lyrics, keywords and phrases are
+    all cleaned with this so they can be compared with each other
+
+    Parameters
+    -------
+    string : str
+        the string to clean
+
+    Returns
+    -------
+    string
+        the lowercase string without punctuation
+    """
+    return LYRIC_NORMALIZER.normalize(string)
+
+
+def normalize_search_term(string):
+    """
+    Cleans a keyword, phrase or substring to search lyrics for. It is lowercased and its curly quotes, zero width
+    characters and odd spaces are cleaned up like normalize_lyrics does, but its punctuation is kept so it still has
+    to match the lyrics word for word
+
+    Parameters
+    -------
+    string : str
+        the keyword, phrase or substring
+
+    Returns
+    -------
+    string
+        the cleaned search term
+    """
+    return SEARCH_TERM_NORMALIZER.normalize(string)
+
+
+def clean_title(title):
+    """
+    Removes zero width characters (e.g. \u200b) from a song title, and turns odd spaces into normal spaces. The rest of
+    the title is kept as it is
+
+    Parameters
+    -------
+    title : str
+        the song title to clean
+
+    Returns
+    -------
+    string
+        the cleaned title
+    """
+    return TITLE_NORMALIZER.normalize(title)
 
 
 def remove_unneeded_headers_and_footers(lyrics):
     """
     Gets lyrics without the unnessarry "[Song Name] Lyrics" at the start and the [number]Embed at the end.
     This has only started popping up in retrieved lyrics recently and hopefully will be fixed by LyricsGenius
-    soon.
+    soon. Only the start and the end of the lyrics are looked at, so this doesn't copy the lyrics more than once
 
     Parameters
     -------
@@ -59,29 +168,15 @@ def remove_unneeded_headers_and_footers(lyrics):
     string
         the string without the unnecessary headers and footers
     """
+    end_of_header = lyrics.find(' Lyrics[')
+    if end_of_header == -1:
+        return lyrics
 
-    # Remove header first
-    if " Lyrics[" in lyrics:
-        start_of_header = 0
-        end_of_header = lyrics.find(' Lyrics[', start_of_header, len(lyrics))
-        header_to_remove = lyrics[start_of_header:end_of_header + 7]
-        lyrics = lyrics.replace(header_to_remove, '')
-
-        # Now remove footer
-        start_of_footer = len(lyrics) - 6
-        end_of_footer = len(lyrics)
-        char_is_digit = True
-        while char_is_digit:
-            current_char = lyrics[start_of_footer]
-            if current_char.isdigit():
-                char_is_digit = True
-                start_of_footer = start_of_footer - 1
-            else:
-                char_is_digit = False
-                start_of_footer = start_of_footer + 1
-        footer_to_remove = lyrics[start_of_footer:end_of_footer]
-        lyrics = lyrics.replace(footer_to_remove, '')
-    return lyrics
+    # The header is everything up to ' Lyrics', and the footer is the last 5 characters ('Embed') and the digits before
+    start_of_footer = len(lyrics) - 5
+    while start_of_footer > end_of_header + 7 and lyrics[start_of_footer - 1].isdigit():
+        start_of_footer = start_of_footer - 1
+    return lyrics[end_of_header + 7:start_of_footer]
 
 
 def remove_headers_from_lyrics(lyrics):
@@ -99,14 +194,7 @@ def remove_headers_from_lyrics(lyrics):
     string
         the string without the headers
     """
-    lyrics = remove_unneeded_headers_and_footers(lyrics)
-    index_pointer = 0
-    while '[' in lyrics:
-        start_of_header = lyrics.find('[', index_pointer, len(lyrics))
-        end_of_header = lyrics.find(']', start_of_header, len(lyrics))
-        header_to_remove = lyrics[start_of_header:end_of_header + 1]
-        lyrics = lyrics.replace(header_to_remove, '')
-    return lyrics
+    return HEADER_PATTERN.sub('', remove_unneeded_headers_and_footers(lyrics))
 
 
 def get_only_artist_lyrics_in_song(data, song_index, artist_name):
@@ -128,20 +216,15 @@ def get_only_artist_lyrics_in_song(data, song_index, artist_name):
         the string of lyrics only from the specified artist
     """
     lyrics_only_from_artist = ''
-    index_pointer = 0
     original_lyrics = data['songs'][song_index]['lyrics']
+    artist_segments = find_artist_segments(original_lyrics, artist_name)
 
     # If there are no other features on the song, headers will not say artist name
-    if ': ' + artist_name not in original_lyrics:
+    if not artist_segments:
         # If artist name does not match Genius song owner, return error because user inputted an invalid artist name
         if artist_name == data['songs'][song_index]['artist']:
-            while '[' in original_lyrics:  # While lyrics still have headers in them
-                start_of_header = original_lyrics.find('[', index_pointer, len(original_lyrics))
-                end_of_header = original_lyrics.find(']', start_of_header, len(original_lyrics))
-                header_to_remove = original_lyrics[start_of_header:end_of_header + 1]
-                original_lyrics = original_lyrics.replace(header_to_remove, '')
-                if '[' not in original_lyrics:  # if no more headers to remove
-                    lyrics_only_from_artist = original_lyrics
+            if '[' in original_lyrics:  # Only lyrics that have headers in them are kept
+                lyrics_only_from_artist = HEADER_PATTERN.sub('', original_lyrics)
 
         else:
             if song_index < 0:
@@ -154,15 +237,7 @@ def get_only_artist_lyrics_in_song(data, song_index, artist_name):
                 pass
 
     else:  # The song has 1 or more features
-        while ': ' + artist_name in original_lyrics[index_pointer:len(original_lyrics)]:
-            start_of_verse = original_lyrics.find((': ' + artist_name), index_pointer, len(original_lyrics)) + len(
-                artist_name) + 4  # logic to skip the header and get right to lyrics
-            end_of_verse = original_lyrics.find('\n\n', start_of_verse, len(original_lyrics))
-            if end_of_verse == -1:  # If verse is last in the whole song, \n\n wont be found
-                end_of_verse = len(original_lyrics)
-            verse = original_lyrics[start_of_verse:end_of_verse]
-            index_pointer = end_of_verse
-            lyrics_only_from_artist = lyrics_only_from_artist + '\n' + verse
+        lyrics_only_from_artist = join_artist_segments(original_lyrics, artist_segments)
 
     return lyrics_only_from_artist
 
@@ -1,11 +1,47 @@
 from song_function_definitions import *
+from song_similarity import MinHasher, estimate_jaccard_similarity
+from lyric_segments import find_artist_segments, join_artist_segments
+from lyric_loader import LyricsFileReader, get_song_record
+import lyric_corpus
+from binary_corpus import MappedCorpusSong
+from vocabulary import Vocabulary
+import vocabulary
+from word_count_matrix import WordCountMatrix
+import word_count_matrix
+from ragged_tokens import concatenate_token_ids, find_max_song
+import ragged_tokens
+from song_executor import split_into_chunks
+from shared_corpus import create_shared_corpus, SharedLyricCorpus
+import pos_tagging
+from wordnet_lexicon import write_wordnet_lexicon, load_wordnet_lexicon
+import importlib.util
+import sys
+import tempfile
+import types
 import unittest
+from unittest import mock
 
 unittest.TestLoader.sortTestMethodsUsing = None
 
 # Lyrics_Khalid_all.json is testing input
 with open('Lyrics_Khalid_all.json') as json_file:
     data = json.load(json_file)
+corpus = LyricCorpus(data)
+
+
+class FakeSpacyPipeline:
+    """
+    Stands in for a spacy pipeline so tagging can be tested without spacy. Every word is tagged as a NOUN, and every
+    text given to pipe is kept in parsed_texts
+    """
+
+    def __init__(self):
+        self.parsed_texts = []
+
+    def pipe(self, texts, batch_size=64):
+        for text in texts:
+            self.parsed_texts.append(text)
+            yield [types.SimpleNamespace(text=word, pos_='NOUN', lemma_=word.lower()) for word in text.split()]
 
 
 class TestPrintFunctions(unittest.TestCase):
@@ -152,6 +188,13 @@ class TestHelperFunctions(unittest.TestCase):
         self.assertEqual(remove_punctuation('I\'ve been !on" t;:he lo@?<.>w, I been tak[]ing m%$y ti-me'),
                          'I\'ve been on the low I been taking my time')
 
+    def test_normalizer(self):
+        self.assertEqual(normalize_lyrics('Don\u2019t\u2005STOP\u200b, \u201cnow\u201d'), "don't stop now")
+        self.assertEqual(Normalizer(keep_apostrophes=False).normalize("Don\u2019t Let's"), 'dont lets')
+        self.assertEqual(normalize_search_term('My time.*'), 'my time.*')
+        self.assertEqual(clean_title('Why Don\u2019t You\u200b Come On'), 'Why Don\u2019t You Come On')
+        self.assertEqual(find_keyword_count_in_song(data, 'don\u2019t', 0), find_keyword_count_in_song(data, "don't", 0))
+
     def test_remove_headers_from_lyrics(self):
         lyrics = "[Pre-Chorus: Logic]\nI've been on the low, I been taking my time\nI feel like I'm out of my mind\nIt feel like my life ain't mine (Who can relate? Woo)\nI've been on the low, I been taking my time\nI feel like I'm out of my mind\nIt feel like my life ain't mine\n\n[Chorus: Logic]\nI don't wanna be alive, I don't wanna be alive"
         self.assertEqual(remove_headers_from_lyrics(lyrics),
@@ -160,6 +203,14 @@ class TestHelperFunctions(unittest.TestCase):
                          'Lyrics1\nLyrics2\nGoodbye World!')
         lyrics = ""
         self.assertEqual(remove_headers_from_lyrics(lyrics), "")
+        self.assertEqual(remove_headers_from_lyrics('[Intro]Unclosed [header'), 'Unclosed [header')
+
+    def test_remove_unneeded_headers_and_footers(self):
+        self.assertEqual(remove_unneeded_headers_and_footers('Talk Lyrics[Verse 1]\nCan we just talk?12Embed'),
+                         '[Verse 1]\nCan we just talk?')
+        self.assertEqual(remove_unneeded_headers_and_footers('Talk Lyrics[Verse 1]\nCan we just talk?Embed'),
+                         '[Verse 1]\nCan we just talk?')
+        self.assertEqual(remove_unneeded_headers_and_footers('[Verse 1]\nCan we just talk?'), '[Verse 1]\nCan we just talk?')
 
     def test_get_only_artist_lyrics_in_song(self):
         self.assertEqual(get_only_artist_lyrics_in_song(data, 0, 'Khalid'),
@@ -211,6 +262,23 @@ class TestHelperFunctions(unittest.TestCase):
         self.assertEqual(find_uniqueness_percent_of_song_by_artist(data, 0, 'Khalid'), 52.3810)
         self.assertEqual(find_uniqueness_percent_of_song_by_artist(data, 1, 'Khalid'), 27.0677)
 
+    def test_wordnet_lexicon_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'wordnet_lexicon.json')
+            lexicon = {'noun': {'dog', 'cat'}, 'verb': {'run'}, 'adjective': set()}
+            write_wordnet_lexicon(lexicon, path)
+            loaded_lexicon = load_wordnet_lexicon(path)
+            self.assertEqual(loaded_lexicon, {'noun': frozenset({'dog', 'cat'}), 'verb': frozenset({'run'}),
+                                              'adjective': frozenset()})
+        counts = Counter({'dog': 2})
+        self.assertIs(filter_count_object(counts, 'pronoun'), counts)
+
+    @unittest.skipUnless(importlib.util.find_spec('nltk'), 'nltk is not installed')
+    def test_filter_count_object(self):
+        counts = filter_count_object(Counter({'dog': 2, 'the': 5, 'run': 1}), 'noun')
+        self.assertEqual(counts['dog'], 2)
+        self.assertNotIn('the', counts)
+
 
 class TestCSVFunctions(unittest.TestCase):
     # TODO
@@ -269,6 +337,73 @@ class TestKeywordFunctions(unittest.TestCase):
         # TODO
         self.assertEqual(find_keyword_counts_in_all_songs_by_artist(data, ["snow", "more"], [], "Khalid"), [('snow', 2), ('more', 43)])
 
+    def test_find_keyword_count_matrix(self):
+        matrix = find_keyword_count_matrix(data, ['alive', 'Love', 'salmon'], [1])
+        self.assertEqual(len(matrix), 3)
+        self.assertEqual(len(matrix[0]), 148)
+        self.assertEqual(matrix[0][0], 13)
+        self.assertEqual(sum(matrix[1]), 606)
+        self.assertEqual(matrix[1][1], 0)
+        self.assertEqual(sum(matrix[2]), 0)
+        self.assertEqual(find_keyword_count_matrix(corpus, ['alive', 'Love', 'salmon'], [1]), matrix)
+        self.assertEqual(find_keyword_count_matrix(data, ['alive'], [-1]), [])
+
+    def test_find_keyword_count_matrix_by_artist(self):
+        matrix = find_keyword_count_matrix_by_artist(data, ['alive', 'snow'], [], 'Khalid')
+        self.assertEqual(sum(matrix[0]), 50)
+        self.assertEqual(sum(matrix[1]), 2)
+        self.assertEqual(matrix[0][0], 1)
+
+    @unittest.skipUnless(importlib.util.find_spec('spacy'), 'spacy is not installed')
+    def test_annotate_songs(self):
+        list_of_pos_tags = annotate_songs(data, list(range(2, 148)))
+        self.assertEqual(sorted(list_of_pos_tags), [0, 1])
+        nouns = Counter(text for text, pos, lemma in list_of_pos_tags[1] if pos == 'NOUN')
+        self.assertEqual(find_pos_counts_in_song(data, 1, 'NOUN'), nouns)
+        self.assertIs(get_pos_tags_in_song(corpus, 1), list_of_pos_tags[1])
+
+    def test_find_pos_counts_in_all_songs_invalid_input(self):
+        self.assertEqual(find_pos_counts_in_all_songs(data, 'NOUNS', []), Counter())
+        self.assertEqual(find_pos_counts_in_all_songs(data, 'NOUN', [-1]), Counter())
+        self.assertEqual(find_pos_counts_in_all_songs_by_artist(data, 'NOUN', ['Seven'], 'Khalid'), Counter())
+
+    @unittest.skipUnless(importlib.util.find_spec('spacy'), 'spacy is not installed')
+    def test_find_pos_counts_in_all_songs(self):
+        bad_song_indices = list(range(4, 148))
+        counts = Counter()
+        for i in range(4):
+            counts.update(find_pos_counts_in_song(data, i, 'NOUN'))
+        clear_pos_tag_cache()
+        self.assertEqual(find_pos_counts_in_all_songs(data, 'NOUN', bad_song_indices, workers=2, batch_size=1),
+                         counts)
+
+    @unittest.skipUnless(importlib.util.find_spec('spacy'), 'spacy is not installed')
+    def test_find_pos_counts_in_all_songs_workers(self):
+        bad_song_indices = [0] + list(range(6, 148))
+        clear_pos_tag_cache()
+        counts = find_pos_counts_in_all_songs(data, 'NOUN', bad_song_indices)
+        self.assertEqual(counts, sum((find_pos_counts_in_song(data, i, 'NOUN') for i in range(1, 6)), Counter()))
+        clear_pos_tag_cache()
+        self.assertEqual(find_pos_counts_in_all_songs(data, 'NOUN', bad_song_indices, workers=2, batch_size=1), counts)
+        clear_pos_tag_cache()
+        self.assertEqual(find_pos_counts_in_all_songs_by_artist(data, 'NOUN', bad_song_indices, 'Khalid', workers=2,
+                                                                batch_size=1),
+                         find_pos_counts_in_all_songs_by_artist(data, 'NOUN', bad_song_indices, 'Khalid', workers=1))
+
+    def test_pos_tag_disk_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pos_tags = (('Young', 'ADJ', 'young'), ('dumb', 'ADJ', 'dumb'), ('\n', 'SPACE', '\n'))
+            key = PosTagDiskCache.get_key('Young dumb\n', 'spacy-3.7/en_core_web_sm-3.7.1')
+            self.assertNotEqual(key, PosTagDiskCache.get_key('Young dumb\n', 'spacy-3.7/en_core_web_sm-3.8.0'))
+            cache = PosTagDiskCache(os.path.join(directory, 'pos_tags.sqlite'))
+            cache.put_many([(key, pos_tags)])
+            cache.close()
+            cache = PosTagDiskCache(os.path.join(directory, 'pos_tags.sqlite'))  # Still there after reopening
+            self.assertEqual(cache.get(key), pos_tags)
+            self.assertEqual(cache.get('missing'), None)
+            self.assertEqual(len(cache), 1)
+            cache.close()
+
     def test_find_noun_counts_in_all_songs(self):
         # TODO
         self.assertEqual(True, True)
@@ -278,12 +413,24 @@ class TestKeywordFunctions(unittest.TestCase):
         self.assertEqual(True, True)
 
     def test_find_keyword_counts_and_compact_variants_in_all_songs(self):
-        # TODO
-        self.assertEqual(True, True)
+        list_of_list_of_words = [['love', 'loving', 'loved'], ['young', 'younger'], ['zzz']]
+        counts = Counter({'young': 1})
+        x = find_keyword_counts_and_compact_variants_in_all_songs(data, counts, list_of_list_of_words, [3, 4])
+        self.assertEqual(x, {'love': 623, 'young': 121, 'zzz': 0})
+        self.assertEqual(counts, Counter({'young': 1}))
+        x, song_counts = find_keyword_counts_and_compact_variants_in_all_songs(corpus, Counter(), list_of_list_of_words,
+                                                                               [3, 4], return_song_counts=True)
+        self.assertEqual(x['young'], 120)
+        self.assertEqual(song_counts['young'][:5], [0, 38, 0, 0, 0])
+        self.assertEqual(sum(song_counts['love']), x['love'])
 
     def test_find_keyword_counts_and_compact_variants_in_all_songs_by_artist(self):
-        # TODO
-        self.assertEqual(True, True)
+        list_of_list_of_words = [['love', 'loving', 'loved'], ['young', 'younger'], ['zzz']]
+        x = find_keyword_counts_and_compact_variants_in_all_songs_by_artist(data, Counter(), list_of_list_of_words,
+                                                                            [3, 4], 'Khalid')
+        self.assertEqual(x['young'], 94)
+        self.assertEqual(find_variant_count_matrix_by_artist(corpus, list_of_list_of_words, [3, 4], 'Khalid')[1][1], 38)
+        self.assertEqual(find_variant_count_matrix(data, list_of_list_of_words, [-1]), [])
 
     def test_find_song_where_keyword_is_said_the_most(self):
         self.assertEqual(find_song_where_keyword_is_said_the_most(data, 'alive', []), [21, 'Keep Me'])
@@ -308,6 +455,11 @@ class TestKeywordFunctions(unittest.TestCase):
     def test_get_list_of_lyric_lines_containing_keyword_in_all_songs_by_artist(self):
         self.assertEqual(get_list_of_lyric_lines_containing_keyword_in_all_songs_by_artist(data, "underwater", [], "Alessia Cara"), ["it's the very first breath when your head's been drowning underwater", "when your head's been drowning underwater"])
 
+    def test_get_list_of_songs_with_keyword_by_artist(self):
+        songs = get_list_of_songs_with_keyword_by_artist(data, 'young', [], 'Khalid')
+        self.assertEqual(len(songs), 7)
+        self.assertEqual(get_list_of_songs_with_keyword_by_artist(data, 'Young', [], 'Khalid'), songs)
+
 
 class TestPhraseFunctions(unittest.TestCase):
 
@@ -315,6 +467,10 @@ class TestPhraseFunctions(unittest.TestCase):
         self.assertEqual(find_phrase_count_in_song(data, 'my time', 0), 6)
         self.assertEqual(find_phrase_count_in_song(data, 'Chorus: Logic', 0), 0)
         self.assertEqual(find_phrase_count_in_song(data, 'And let me tell you why', 0), 1)
+        self.assertEqual(find_phrase_count_in_song(data, 'my time.*', 0), 0)
+        self.assertEqual(find_phrase_count_in_song(data, '(who can', 0), 0)
+        # Phrase has to be matched word for word, "and i" is not in "and it's"
+        self.assertEqual(find_phrase_count_in_song(data, 'and i', 0), 1)
 
     def test_find_phrase_count_in_all_songs(self):
         self.assertEqual(find_phrase_count_in_all_songs(data, 'my time', []), 16)
@@ -324,9 +480,42 @@ class TestPhraseFunctions(unittest.TestCase):
         self.assertEqual(find_phrase_counts_in_song(data, ['my time', 'on the low', 'who can relate'], 0),
                          [('my time', 6), ('on the low', 6), ('who can relate', 3)])
 
+    def test_find_phrase_count_matrix(self):
+        matrix = find_phrase_count_matrix(data, ['my time', 'on the low', 'who can relate'], [])
+        self.assertEqual([row[0] for row in matrix], [6, 6, 3])
+        self.assertEqual(sum(matrix[0]), 16)
+        self.assertEqual(find_phrase_count_matrix(corpus, ['my time', 'on the low', 'who can relate'], []), matrix)
+        self.assertEqual(find_phrase_counts_in_all_songs(data, ['my time', 'My Time'], [0]), [('my time', 10),
+                                                                                              ('My Time', 10)])
+
+    def test_phrase_matcher(self):
+        matcher = PhraseMatcher(['la la', 'la', 'la la la', 'da'])
+        self.assertEqual(matcher.count_in_tokens(['la', 'la', 'la', 'da', 'la'], [0, 5]), [1, 4, 1, 1])
+        # Phrases can't go across lines
+        self.assertEqual(matcher.count_in_tokens(['la', 'la', 'la', 'la'], [0, 1, 4]), [1, 4, 1, 0])
+
     def test_find_song_where_phrase_is_said_the_most(self):
         self.assertEqual(find_song_where_phrase_is_said_the_most(data, 'i love you', []), [2, 'I Be On The Way'])
 
+    def test_find_common_ngrams_between_songs(self):
+        self.assertEqual(find_common_two_word_phrases_in_two_songs(data, 0, 1), {'i know', 'in the', 'to give'})
+        x = find_common_ngrams_between_songs(corpus, 0, 1, 2, return_counts=True)
+        self.assertEqual(x, {'i know': (7, 1), 'in the': (3, 2), 'to give': (1, 3)})
+        self.assertEqual(find_common_ngrams_between_songs(data, 0, 2, 3, True), {"i don't wanna": (12, 1)})
+        self.assertEqual(find_common_ngrams_between_songs(data, 0, 1, 0), set())
+        ngram_counts = get_ngram_counts(corpus, 0, 2)
+        ngram_counts.clear()
+        self.assertEqual(get_ngram_counts(corpus, 0, 2), get_ngram_counts(data, 0, 2))
+        self.assertEqual(find_common_ngrams_between_songs(corpus, 0, 1, 2, return_counts=True), x)
+
+    def test_common_two_word_phrases_skip_title_header(self):
+        # The "<Title> Lyrics" header and the "<number>Embed" footer are not part of the lyrics, so they aren't compared
+        header_data = {'name': 'Khalid', 'songs': [
+            dict(data['songs'][0], lyrics='Location Lyrics[Chorus]\nSend me your location\n12Embed'),
+            dict(data['songs'][1], lyrics='Location Lyrics[Verse]\nyour location now\n3Embed')]}
+        self.assertEqual(find_common_two_word_phrases_in_two_songs(header_data, 0, 1), {'your location'})
+        self.assertEqual(find_common_two_word_phrases_in_two_songs(LyricCorpus(header_data), 0, 1), {'your location'})
+
     def test_get_two_word_phrases_in_song(self):
         list_of_phrases = get_two_word_phrases_in_song(data, 0)
         print(len(list_of_phrases))
@@ -338,6 +527,451 @@ class TestPhraseFunctions(unittest.TestCase):
     def test_find_most_repeated_phrases_of_any_length_in_song(self):
         x = find_most_repeated_phrases_of_any_length_in_song(data, 0)
         self.assertEqual(x.most_common(1), [('i', 50)])
+        self.assertEqual(min(x.values()), 1)
+        x = find_most_repeated_phrases_of_any_length_in_song(data, 0, min_count=2)
+        self.assertEqual(min(x.values()), 2)
+        x = find_most_repeated_phrases_of_any_length_in_song(corpus, 1, min_length=2, top_k=3)
+        self.assertEqual(x.most_common(), [('young dumb', 29), ('dumb and', 12), ('and broke', 12)])
+        x = find_most_repeated_phrases_of_any_length_in_song(data, 1, min_count=1)
+        self.assertEqual(sum(x.values()), 266 * 267 // 2)
+
+    def test_find_repeated_phrases_in_tokens(self):
+        x = find_repeated_phrases_in_tokens(['la', 'la', 'la', 'da', 'la', 'la'], min_count=1)
+        self.assertEqual(x['la'], 5)
+        self.assertEqual(x['la la'], 3)
+        self.assertEqual(x['la la la'], 1)
+        self.assertEqual(x['la la la da la la'], 1)
+        self.assertEqual(len(x), 15)
+        self.assertEqual(find_repeated_phrases_in_tokens([]), Counter())
+
+    def test_find_most_repeated_phrases_in_all_songs(self):
+        x = find_most_repeated_phrases_in_all_songs(data, [], min_length=3, top_k=3)
+        self.assertEqual(x, [('you you you', 106, 7), ('love love love', 101, 15), ('do do do', 97, 5)])
+        x = find_most_repeated_phrases_in_all_songs(data, [], min_length=3, top_k=2, sort_by='songs')
+        self.assertEqual(x, [('the one i', 20, 20), ('the only one', 47, 19)])
+        self.assertEqual(find_most_repeated_phrases_in_all_songs(corpus, [], min_length=3, top_k=3),
+                         find_most_repeated_phrases_in_all_songs(data, [], min_length=3, top_k=3))
+        self.assertEqual(find_most_repeated_phrases_in_all_songs(data, [-1]), [])
+
+    def test_find_repeated_phrases_in_songs(self):
+        # Phrases can't go across songs, 'da la' only appears once
+        x = find_repeated_phrases_in_songs([['la', 'la', 'da'], ['la', 'da', 'la']], min_length=1)
+        self.assertEqual(x, [('la', 4, 2), ('da', 2, 2), ('la da', 2, 2)])
+
+
+class TestLyricCorpus(unittest.TestCase):
+
+    def test_corpus_can_be_indexed_like_json(self):
+        self.assertEqual(corpus['songs'][1]['title'], 'Young Dumb & Broke')
+        self.assertEqual(len(corpus), 148)
+        self.assertEqual(is_valid_indices_list(corpus, [0, 147]), True)
+
+    def test_corpus_song_tokens_and_lines(self):
+        song = corpus.songs[0]
+        self.assertEqual(len(song.tokens), 542)
+        self.assertEqual(song.get_lines()[1],
+                         ['i\'ve', 'been', 'on', 'the', 'low', 'i', 'been', 'taking', 'my', 'time'])
+        self.assertEqual(song.line_offsets[-1], len(song.tokens))
+
+    def test_corpus_gives_same_results_as_json(self):
+        self.assertEqual(find_total_words_in_song(corpus, 0), 542)
+        self.assertEqual(find_total_unique_words_in_song(corpus, 1), 72)
+        self.assertEqual(find_keyword_count_in_all_songs(corpus, 'love', [1]), 606)
+        self.assertEqual(find_phrase_count_in_all_songs(corpus, 'my time', []), 16)
+        self.assertEqual(find_keyword_count_in_all_songs_by_artist(corpus, 'alive', [], 'Khalid'), 50)
+        self.assertEqual(get_list_of_lyric_lines_containing_keyword_in_all_songs(corpus, 'wind', []),
+                         get_list_of_lyric_lines_containing_keyword_in_all_songs(data, 'wind', []))
+        self.assertEqual(get_two_word_phrases_in_song(corpus, 0), get_two_word_phrases_in_song(data, 0))
+
+    def test_corpus_totals_by_artist_match_json(self):
+        for i in range(len(data['songs'])):
+            self.assertEqual(find_total_words_in_song_by_artist(corpus, i, 'Khalid'),
+                             find_total_words_in_song_by_artist(data, i, 'Khalid'))
+            self.assertEqual(find_total_unique_words_in_song_by_artist(corpus, i, 'Khalid'),
+                             find_total_unique_words_in_song_by_artist(data, i, 'Khalid'))
+        # The Guest's section runs into the [Chorus: Guest] header, which still has to be removed before counting
+        song = dict(data['songs'][0],
+                    lyrics='[Verse 1: Guest]\nhello there\n[Chorus: Guest]\nla la\n\n[Verse 2: Khalid]\nyo')
+        guest_data = {'name': 'Khalid', 'songs': [song]}
+        guest_corpus = LyricCorpus(guest_data)
+        self.assertEqual(find_total_words_in_song_by_artist(guest_corpus, 0, 'Guest'), 4)
+        self.assertEqual(find_total_words_in_song_by_artist(guest_data, 0, 'Guest'), 4)
+        self.assertEqual(find_total_unique_words_in_song_by_artist(guest_corpus, 0, 'Guest'), 3)
+        self.assertEqual(find_total_unique_words_in_song_by_artist(guest_corpus, 0, 'Khalid'), 1)
+
+    def test_refresh_only_cleans_changed_songs(self):
+        old_data = {'name': 'Khalid', 'songs': data['songs'][:4]}
+        refreshed_corpus = LyricCorpus(old_data)
+        self.assertEqual(find_total_words_in_song(refreshed_corpus, 2), find_total_words_in_song(data, 2))
+        changed_song = dict(data['songs'][1], lyrics=data['songs'][1]['lyrics'] + '\nyoung young')
+        added_song = dict(data['songs'][5])
+        new_data = {'name': 'Khalid', 'songs': [data['songs'][2], changed_song, added_song, data['songs'][0]]}
+        unchanged_songs = [refreshed_corpus.songs[2], refreshed_corpus.songs[0]]
+        with mock.patch.object(lyric_corpus, 'CorpusSong', wraps=CorpusSong) as corpus_song:
+            report = refreshed_corpus.refresh(new_data)
+        self.assertEqual([call.args[0] for call in corpus_song.call_args_list],
+                         [changed_song['lyrics'], added_song['lyrics']])
+        self.assertEqual(report, {'added': [added_song['id']], 'changed': [changed_song['id']],
+                                  'removed': [data['songs'][3]['id']], 'unchanged': 2})
+        self.assertIs(refreshed_corpus.songs[0], unchanged_songs[0])
+        self.assertIs(refreshed_corpus.songs[3], unchanged_songs[1])
+        rebuilt_corpus = LyricCorpus(new_data)
+        for i in range(4):
+            self.assertEqual(refreshed_corpus.songs[i].tokens, rebuilt_corpus.songs[i].tokens)
+        self.assertEqual(find_total_words_in_song(refreshed_corpus, 0), find_total_words_in_song(data, 2))
+        self.assertEqual(find_keyword_count_in_all_songs(refreshed_corpus, 'young', []),
+                         find_keyword_count_in_all_songs(new_data, 'young', []))
+        self.assertEqual(refreshed_corpus.refresh(new_data)['unchanged'], 4)
+
+
+class TestInvertedIndex(unittest.TestCase):
+
+    def test_postings(self):
+        index = corpus.get_inverted_index()
+        postings = index.get_postings('alive')
+        self.assertEqual(postings[0][0], 0)
+        self.assertEqual(postings[0][1], 13)
+        self.assertEqual(len(postings[0][2]), 13)
+        self.assertEqual(corpus.songs[0].tokens[postings[0][2][0]], 'alive')
+        self.assertEqual(index.get_postings('computerrandomword'), [])
+
+    def test_keyword_functions_use_index(self):
+        self.assertEqual(find_keyword_count_in_all_songs(corpus, 'Love', []), 611)
+        self.assertEqual(find_keyword_count_in_all_songs(corpus, 'love', [-1, 0, 1, "Eminem", 25]), 0)
+        self.assertEqual(find_song_where_keyword_is_said_the_most(corpus, 'alive', []), [21, 'Keep Me'])
+        self.assertEqual(find_song_where_keyword_is_said_the_most(corpus, 'salmon', []), [0, ''])
+        self.assertEqual(get_list_of_songs_with_keyword(corpus, 'snow', [0]),
+                         get_list_of_songs_with_keyword(data, 'snow', [0]))
+
+    def test_phrase_functions_use_index(self):
+        self.assertEqual(find_phrase_count_in_all_songs(corpus, 'my time', []), 16)
+        self.assertEqual(find_phrase_count_in_all_songs(corpus, 'My Time', [0]), 10)
+        self.assertEqual(corpus.get_inverted_index().get_phrase_song_counts(['on', 'the', 'low'])[0], 6)
+        self.assertEqual(find_song_where_phrase_is_said_the_most(corpus, 'i love you', []), [2, 'I Be On The Way'])
+        self.assertEqual(get_list_of_songs_with_phrase(corpus, 'who can relate', []),
+                         get_list_of_songs_with_phrase(data, 'who can relate', []))
+        self.assertEqual(get_list_of_songs_without_phrase(corpus, 'my time', [5]),
+                         get_list_of_songs_without_phrase(data, 'my time', [5]))
+
+
+class TestSongSimilarity(unittest.TestCase):
+
+    def test_find_most_similar_songs(self):
+        x = find_most_similar_songs(corpus, 125, [], top_k=3)
+        self.assertEqual([song[:2] for song in x], [(141, 'Ocean (Cazztek Remix)'), (142, 'Ocean (MYRNE Remix)'),
+                                                    (138, 'Ocean (VAN DUO Remix)')])
+        self.assertEqual(x[0][2], 1.0)
+        x = find_most_similar_songs(corpus, 125, [141], top_k=1)
+        self.assertEqual(x[0][0], 142)
+        self.assertEqual(find_most_similar_songs(corpus, 125, [-1]), [])
+        self.assertEqual(find_most_similar_songs(corpus, -1, []), [])
+        self.assertEqual(find_most_similar_songs(corpus, 148, []), [])
+        copy_data = {'name': 'Khalid', 'songs': [data['songs'][0], dict(data['songs'][0], title='\u200biMissMe')]}
+        self.assertEqual(find_most_similar_songs(LyricCorpus(copy_data), 0, [], top_k=1), [(1, 'iMissMe', 1.0)])
+
+    def test_find_similar_song_pairs(self):
+        x = find_similar_song_pairs(corpus, [], 0.5)
+        self.assertEqual(x[0], (51, 100, 1.0))
+        self.assertEqual(len(x), 133)
+        self.assertTrue(all(similarity >= 0.5 for song_index1, song_index2, similarity in x))
+        self.assertEqual(find_similar_song_pairs(data, [51], 0.5)[0], (125, 141, 1.0))
+
+    def test_similarity_index_invalid_input(self):
+        list_of_token_lists = [corpus.songs[i].tokens for i in range(3)]
+        self.assertRaises(ValueError, SongSimilarityIndex, list_of_token_lists, num_perm=128, num_bands=0)
+        self.assertRaises(ValueError, SongSimilarityIndex, list_of_token_lists, num_perm=128, num_bands=129)
+        self.assertRaises(ValueError, SongSimilarityIndex, list_of_token_lists, num_perm=128, num_bands=30)
+        similarity_index = SongSimilarityIndex(list_of_token_lists, num_perm=64, num_bands=16)
+        self.assertRaises(ValueError, similarity_index.find_similar_songs, -1)
+        self.assertRaises(ValueError, similarity_index.get_similarity, 0, 3)
+
+    def test_minhash_estimate(self):
+        minhasher = MinHasher(num_perm=256)
+        signature1 = minhasher.get_signature(set(range(100)))
+        signature2 = minhasher.get_signature(set(range(50, 150)))
+        self.assertAlmostEqual(estimate_jaccard_similarity(signature1, signature2), 1 / 3, delta=0.1)
+        self.assertEqual(minhasher.get_signature(set()), None)
+
+
+class TestPosTagging(unittest.TestCase):
+
+    def setUp(self):
+        self.pipeline = FakeSpacyPipeline()
+        self.load = mock.Mock(return_value=self.pipeline)
+        for patcher in (mock.patch.dict(sys.modules, {'spacy': types.SimpleNamespace(load=self.load)}),
+                        mock.patch.object(pos_tagging, '_nlp', None),
+                        mock.patch.object(pos_tagging, '_model_version', 'spacy-0.0/fake-0.0'),
+                        mock.patch.object(pos_tagging, '_disk_cache', None),
+                        mock.patch.dict(pos_tagging._pos_tag_cache, clear=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_pipeline_is_loaded_once_and_each_song_is_parsed_once(self):
+        analyze_song(data, 0)
+        analyze_song(data, 1)
+        self.assertEqual(find_pos_counts_in_song(data, 1, 'NOUN'), Counter(get_cased_lyrics(data, 1).split()))
+        self.assertEqual(get_pos_tags_in_song(corpus, 1), get_pos_tags_in_song(data, 1))
+        self.assertEqual(self.load.call_count, 1)
+        self.assertEqual(self.pipeline.parsed_texts, [get_cased_lyrics(data, 0), get_cased_lyrics(data, 1)])
+
+    def test_disk_cache_only_tags_new_texts(self):
+        texts = ['Young dumb\n', 'Young dumb broke\n', 'High school kids\n']
+        with tempfile.TemporaryDirectory() as directory:
+            use_pos_tag_cache_file(os.path.join(directory, 'pos_tags.sqlite'))
+            self.addCleanup(use_pos_tag_cache_file, None)
+            list_of_pos_tags = annotate_texts(texts)
+            self.assertEqual(self.pipeline.parsed_texts, texts)
+
+            # A new run, with nothing kept in memory
+            clear_pos_tag_cache()
+            pos_tagging._nlp = None
+            self.load.reset_mock()
+            self.pipeline.parsed_texts.clear()
+            self.assertEqual(annotate_texts(texts), list_of_pos_tags)
+            self.assertEqual(self.load.call_count, 0)
+            self.assertEqual(self.pipeline.parsed_texts, [])
+
+            clear_pos_tag_cache()
+            changed_texts = texts[:2] + ['High school kid\n']
+            self.assertEqual(annotate_texts(changed_texts)[:2], list_of_pos_tags[:2])
+            self.assertEqual(self.load.call_count, 1)
+            self.assertEqual(self.pipeline.parsed_texts, ['High school kid\n'])
+            use_pos_tag_cache_file(None)
+
+
+class TestLyricSegments(unittest.TestCase):
+
+    def test_find_artist_segments(self):
+        lyrics = '[Verse 1: Khalid]\nhey there\n\n[Chorus: Normani]\nhi you\n\n[Verse 2: Khalid]\nme'
+        segments = find_artist_segments(lyrics, 'Khalid')
+        self.assertEqual([lyrics[start:end] for start, end in segments], ['hey there', 'me'])
+        self.assertEqual(join_artist_segments(lyrics, segments), '\nhey there\nme')
+        self.assertEqual(find_artist_segments(lyrics, 'Eminem'), [])
+
+    def test_get_artist_tokens(self):
+        self.assertEqual(get_artist_tokens(data, 0, 'Alessia Cara'),
+                         normalize_lyrics(get_only_artist_lyrics_in_song(data, 0, 'Alessia Cara')).split())
+        self.assertEqual(get_artist_tokens(data, 0, 'Eminem'), [])
+        self.assertEqual([corpus.get_artist_tokens(i, 'Khalid') for i in range(len(corpus.songs))],
+                         [get_artist_tokens(data, i, 'Khalid') for i in range(len(data['songs']))])
+
+
+class TestLyricLoader(unittest.TestCase):
+
+    def test_load_lyrics_file(self):
+        loaded = load_lyrics_file('Lyrics_Khalid_all.json')
+        self.assertEqual(loaded['name'], 'Khalid')
+        self.assertEqual(loaded['songs'], [get_song_record(song) for song in data['songs']])
+        self.assertEqual(get_list_of_artists_in_song(loaded, 0), get_list_of_artists_in_song(data, 0))
+        self.assertEqual(get_list_of_artists_in_json(loaded, []), get_list_of_artists_in_json(data, []))
+        self.assertEqual(find_keyword_count_in_all_songs(loaded, 'love', [1]), 606)
+
+    def test_reader_with_small_reads(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = directory + '/songs.json'
+            with open(path, 'w', encoding='utf-8') as json_file:
+                json.dump({'name': 'A', 'songs': [{'title': 'x', 'lyrics': 'a\u2019b', 'media': [1]}], 'id': 12345},
+                          json_file)
+            reader = LyricsFileReader(path, read_size=3)
+            self.assertEqual(list(reader.iterate_songs()), [{'title': 'x', 'lyrics': 'a\u2019b'}])
+            self.assertEqual(reader.artist, {'name': 'A', 'id': 12345})
+
+    def test_load_lyric_corpus(self):
+        loaded_corpus = load_lyric_corpus('Lyrics_Khalid_all.json')
+        self.assertEqual(len(loaded_corpus), 148)
+        self.assertEqual(find_keyword_count_in_all_songs_by_artist(loaded_corpus, 'alive', [], 'Khalid'), 50)
+        self.assertEqual(get_list_of_artists_in_json(loaded_corpus, []), get_list_of_artists_in_json(data, []))
+
+
+class TestBinaryCorpus(unittest.TestCase):
+
+    def open_khalid_corpus(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = directory.name + '/khalid.lyrc'
+        self.assertEqual(convert_json_to_binary_corpus('Lyrics_Khalid_all.json', path), 148)
+        mapped_corpus = open_binary_corpus(path)
+        self.addCleanup(mapped_corpus.close)
+        return mapped_corpus
+
+    def test_binary_corpus_gives_same_results_as_json(self):
+        mapped_corpus = self.open_khalid_corpus()
+        self.assertEqual(mapped_corpus['name'], 'Khalid')
+        self.assertEqual(mapped_corpus['songs'][1]['title'], 'Young Dumb & Broke')
+        self.assertEqual(mapped_corpus['songs'][1]['lyrics'], data['songs'][1]['lyrics'])
+        self.assertEqual(mapped_corpus.songs[0].tokens, corpus.songs[0].tokens)
+        self.assertEqual(mapped_corpus.songs[0].line_offsets, corpus.songs[0].line_offsets)
+        self.assertEqual(find_keyword_count_in_all_songs(mapped_corpus, 'love', [1]), 606)
+        self.assertEqual(find_phrase_count_in_all_songs(mapped_corpus, 'my time', []), 16)
+        self.assertEqual(get_two_word_phrases_in_song(mapped_corpus, 0), get_two_word_phrases_in_song(data, 0))
+        self.assertEqual(find_total_unique_words_in_all_songs(mapped_corpus, [2]),
+                         find_total_unique_words_in_all_songs(data, [2]))
+        self.assertEqual(get_list_of_artists_in_song(mapped_corpus, 0), get_list_of_artists_in_song(data, 0))
+
+    def test_close_while_word_ids_are_still_used(self):
+        mapped_corpus = self.open_khalid_corpus()
+        token_ids = mapped_corpus.songs[1].token_ids
+        ragged = mapped_corpus.get_ragged_token_array()
+        song_lengths = ragged.get_song_lengths()
+        mapped_corpus.close()
+        self.assertEqual(mapped_corpus.vocabulary.decode(token_ids), corpus.songs[1].tokens)
+        self.assertEqual(list(ragged.get_song_token_ids(1)), list(token_ids))
+        self.assertEqual(ragged.get_song_lengths(), song_lengths)
+
+    def test_refresh_mapped_corpus(self):
+        mapped_corpus = self.open_khalid_corpus()
+        changed_song = dict(data['songs'][1], lyrics=data['songs'][1]['lyrics'] + '\nyoung young')
+        new_data = {'name': 'Khalid', 'songs': [data['songs'][0], changed_song] + data['songs'][3:]}
+        with mock.patch.object(lyric_corpus, 'CorpusSong', wraps=CorpusSong) as corpus_song:
+            report = mapped_corpus.refresh(new_data)
+        self.assertEqual(corpus_song.call_count, 1)
+        self.assertEqual(report, {'added': [], 'changed': [changed_song['id']], 'removed': [data['songs'][2]['id']],
+                                  'unchanged': 146})
+        self.assertIsInstance(mapped_corpus.songs[2], MappedCorpusSong)
+        self.assertEqual(mapped_corpus.songs[2].tokens, corpus.songs[3].tokens)
+        self.assertEqual(find_keyword_count_in_all_songs(mapped_corpus, 'young', []),
+                         find_keyword_count_in_all_songs(new_data, 'young', []))
+        self.assertEqual(find_total_words_in_all_songs(mapped_corpus, []), find_total_words_in_all_songs(new_data, []))
+
+    def test_open_binary_corpus_invalid_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = directory + '/not_a_corpus.lyrc'
+            with open(path, 'wb') as corpus_file:
+                corpus_file.write(b'\0' * 200)
+            self.assertRaises(ValueError, open_binary_corpus, path)
+
+
+class TestVocabulary(unittest.TestCase):
+
+    def test_encode_and_decode(self):
+        words = Vocabulary(['young'])
+        token_ids = words.encode(['dumb', 'young', 'dumb', 'broke'])
+        self.assertEqual(list(token_ids), [1, 0, 1, 2])
+        self.assertEqual(token_ids.typecode, 'I')
+        self.assertEqual(words.decode(token_ids), ['dumb', 'young', 'dumb', 'broke'])
+        self.assertEqual(words.get_id('broke'), 2)
+        self.assertEqual(words.get_id('old'), None)
+
+    def test_get_word_counts(self):
+        words = Vocabulary()
+        list_of_token_ids = [words.encode(['b', 'a', 'b']), words.encode([]), words.encode(['c', 'a'])]
+        expected = [('b', 2), ('a', 2), ('c', 1)]
+        self.assertEqual(list(words.get_word_counts(list_of_token_ids).items()), expected)
+        with mock.patch.object(vocabulary, 'numpy', None):
+            self.assertEqual(list(words.get_word_counts(list_of_token_ids).items()), expected)
+        self.assertEqual(words.get_word_counts([]), Counter())
+
+    def test_corpus_word_counts_match_json(self):
+        self.assertEqual(list(get_word_counts(corpus, 1).items()), list(get_word_counts(data, 1).items()))
+        self.assertEqual(find_all_word_counts_in_all_songs(corpus, Counter(), [3, 4]).most_common(20),
+                         find_all_word_counts_in_all_songs(data, Counter(), [3, 4]).most_common(20))
+
+
+class TestWordCountMatrix(unittest.TestCase):
+
+    def test_totals_and_top_words(self):
+        words = Vocabulary()
+        list_of_token_ids = [words.encode(['b', 'a', 'b']), words.encode([]), words.encode(['c', 'a', 'c'])]
+        for numpy_module in (word_count_matrix.numpy, None):
+            with mock.patch.object(word_count_matrix, 'numpy', numpy_module):
+                matrix = WordCountMatrix(list_of_token_ids, words)
+                self.assertEqual(len(matrix), 3)
+                self.assertEqual(list(matrix.get_song_counts(0).items()), [('b', 2), ('a', 1)])
+                self.assertEqual(list(matrix.get_total_counts().items()), [('b', 2), ('a', 2), ('c', 2)])
+                self.assertEqual(list(matrix.get_total_counts([0]).items()), [('c', 2), ('a', 1)])
+                self.assertEqual(matrix.get_total_counts([0, 1, 2]), Counter())
+                self.assertEqual(matrix.get_top_words(2, words_to_omit=['b', 'z']), [('a', 2), ('c', 2)])
+
+    def test_corpus_matrix_matches_json(self):
+        self.assertEqual(list(find_most_word_counts_in_all_songs(corpus, Counter(), [3, 4], ['i']).items()),
+                         list(find_most_word_counts_in_all_songs(data, Counter(), [3, 4], ['i']).items()))
+        self.assertEqual(find_most_word_counts_in_all_songs(corpus, Counter(), ['Seven'], ['the']),
+                         find_most_word_counts_in_all_songs(data, Counter(), ['Seven'], ['the']))
+        self.assertEqual(find_all_word_counts_in_all_songs_by_artist(corpus, Counter(), ['Seven'], 'Khalid'),
+                         find_all_word_counts_in_all_songs_by_artist(data, Counter(), ['Seven'], 'Khalid'))
+        self.assertEqual(corpus.get_word_count_matrix().get_total_counts(['Seven', -1, 148]),
+                         corpus.get_word_count_matrix().get_total_counts())
+        self.assertEqual(find_top_words_in_all_songs(corpus, [3, 4], 15, ['the', 'i']),
+                         find_top_words_in_all_songs(data, [3, 4], 15, ['the', 'i']))
+        artist_counts = find_all_word_counts_in_all_songs_by_artist(corpus, Counter(), [3, 4], "Khalid")
+        self.assertEqual(list(artist_counts.items()),
+                         list(find_all_word_counts_in_all_songs_by_artist(data, Counter(), [3, 4], "Khalid").items()))
+
+
+class TestRaggedTokenArray(unittest.TestCase):
+
+    def test_per_song_reductions(self):
+        words = Vocabulary()
+        list_of_token_ids = [words.encode(['b', 'a', 'b']), words.encode([]), words.encode(['c', 'b', 'c', 'c'])]
+        for numpy_module in (ragged_tokens.numpy, None):
+            with mock.patch.object(ragged_tokens, 'numpy', numpy_module):
+                ragged = concatenate_token_ids(list_of_token_ids)
+                self.assertEqual(len(ragged), 3)
+                self.assertEqual(list(ragged.get_song_token_ids(2)), list(list_of_token_ids[2]))
+                self.assertEqual(ragged.get_song_lengths(), [3, 0, 4])
+                self.assertEqual(ragged.get_distinct_counts(), [2, 0, 2])
+                self.assertEqual(ragged.get_token_counts(words.get_id('b')), [2, 0, 1])
+                self.assertEqual(ragged.get_token_counts(None), [0, 0, 0])
+                self.assertEqual(find_max_song([3, 0, 4], [2]), (0, 3))
+                self.assertEqual(find_max_song([3, 3, 1]), (0, 3))
+                self.assertEqual(find_max_song([3, 0], [0, 1]), (None, 0))
+
+    def test_corpus_reductions_match_json(self):
+        self.assertEqual(find_total_words_in_all_songs(corpus, [3, 4]), find_total_words_in_all_songs(data, [3, 4]))
+        self.assertEqual(find_total_unique_words_in_all_songs(corpus, [3, 4]),
+                         find_total_unique_words_in_all_songs(data, [3, 4]))
+        self.assertEqual(find_keyword_count_in_every_song(corpus, "Young", [3, 4]),
+                         find_keyword_count_in_every_song(data, "Young", [3, 4]))
+        self.assertEqual(find_song_with_the_most_words(corpus, [3, 4], unique=True),
+                         find_song_with_the_most_words(data, [3, 4], unique=True))
+        self.assertEqual(find_total_words_in_all_songs(corpus, ['x']), [])
+
+
+class TestSongExecutor(unittest.TestCase):
+
+    def test_split_into_chunks(self):
+        self.assertEqual(split_into_chunks([0, 2, 3, 5, 6], 3), [[0, 2], [3, 5], [6]])
+        self.assertEqual(split_into_chunks([1], 4), [[1]])
+        self.assertEqual(split_into_chunks([], 4), [[]])
+
+    def test_workers_give_same_results(self):
+        self.assertEqual(find_keyword_count_in_all_songs(data, "love", [1], workers=2),
+                         find_keyword_count_in_all_songs(data, "love", [1]))
+        self.assertEqual(find_phrase_count_in_all_songs(data, "my time", [], workers=2), 16)
+        self.assertEqual(find_substring_count_in_all_songs(data, "ove", [3, 4], workers=2),
+                         find_substring_count_in_all_songs(data, "ove", [3, 4]))
+        self.assertEqual(list(find_all_word_counts_in_all_songs(data, Counter(), [3, 4], workers=2).items()),
+                         list(find_all_word_counts_in_all_songs(data, Counter(), [3, 4]).items()))
+        self.assertEqual(get_list_of_lyric_lines_containing_keyword_in_all_songs(data, "young", [], workers=3),
+                         get_list_of_lyric_lines_containing_keyword_in_all_songs(data, "young", []))
+
+    def test_workers_attach_to_shared_corpus(self):
+        self.assertEqual(find_substring_count_in_all_songs(corpus, "ove", [3, 4], workers=2),
+                         find_substring_count_in_all_songs(data, "ove", [3, 4]))
+        self.assertEqual(get_list_of_lyric_lines_containing_keyword_in_all_songs(corpus, "young", [], workers=2),
+                         get_list_of_lyric_lines_containing_keyword_in_all_songs(data, "young", []))
+
+    def test_shared_corpus(self):
+        shared_memory = create_shared_corpus(corpus)
+        shared_corpus = SharedLyricCorpus(shared_memory.name)
+        self.assertEqual(len(shared_corpus), len(corpus))
+        self.assertEqual(shared_corpus['songs'][1]['title'], 'Young Dumb & Broke')
+        self.assertEqual(shared_corpus.songs[1].tokens, corpus.songs[1].tokens)
+        self.assertEqual(find_keyword_count_in_all_songs(shared_corpus, 'love', [1]), 606)
+        shared_corpus.close()
+        shared_memory.close()
+        shared_memory.unlink()
+
+    def test_shared_corpus_from_json(self):
+        shared_memory = create_shared_corpus(data)
+        self.addCleanup(shared_memory.unlink)
+        self.addCleanup(shared_memory.close)
+        shared_corpus = SharedLyricCorpus(shared_memory.name)
+        self.addCleanup(shared_corpus.close)
+        self.assertEqual(shared_corpus['songs'][1]['lyrics'], data['songs'][1]['lyrics'])
+        self.assertEqual([song.tokens for song in shared_corpus.songs], [song.tokens for song in corpus.songs])
+        self.assertEqual(find_substring_count_in_all_songs(shared_corpus, "ove", [3, 4]),
+                         find_substring_count_in_all_songs(data, "ove", [3, 4]))
 
 
 if __name__ == '__main__':
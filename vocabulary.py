@@ -0,0 +1,106 @@
+# Interns every word in a corpus as an int id, so songs can be kept as compact arrays of ids instead of lists of
+# strings, and words are counted as ints and only turned back into strings for the result
+from array import array
+from collections import Counter
+from itertools import chain
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, ids are counted with Counter without it
+    numpy = None
+
+
+class Vocabulary:
+    """
+    Maps every word to an int id, in the order the words were first added
+
+    Parameters
+    ----------
+    words : iterable
+        words to start with, given the ids 0, 1, 2... in order. The words must all be different
+
+    Attributes
+    ----------
+    words : list
+        the word of every id
+    ids : dict
+        dictionary of word to id
+    """
+
+    def __init__(self, words=()):
+        self.words = list(words)
+        self.ids = {word: word_id for word_id, word in enumerate(self.words)}
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.ids
+
+    def get_id(self, word):
+        """
+        Returns the id of word, or None if it isn't in the vocabulary
+        """
+        return self.ids.get(word)
+
+    def encode(self, tokens):
+        """
+        Returns an array('I') of the id of every word in tokens, adding the words that aren't in the vocabulary yet
+        """
+        ids = self.ids
+        for word in dict.fromkeys(tokens):
+            if word not in ids:
+                ids[word] = len(self.words)
+                self.words.append(word)
+        return array('I', map(ids.__getitem__, tokens))
+
+    def decode(self, token_ids):
+        """
+        Returns the list of words of token_ids. The same string object is used for every occurrence of a word
+        """
+        return list(map(self.words.__getitem__, token_ids))
+
+    def count_ids(self, list_of_token_ids):
+        """
+        Counts every id in a list of id sequences
+
+        Parameters
+        ----------
+        list_of_token_ids : list
+            list of array('I'), memoryview or numpy arrays of ids
+
+        Returns
+        -------
+        list
+            list of tuples of (id, count) for every id that appears, in the order the ids first appear
+        """
+        if numpy is not None:
+            list_of_token_ids = [numpy.asarray(token_ids, dtype=numpy.int64) for token_ids in list_of_token_ids]
+            if not list_of_token_ids:
+                return []
+            all_token_ids = numpy.concatenate(list_of_token_ids)
+            if not len(all_token_ids):
+                return []
+            counts = numpy.bincount(all_token_ids)
+            unique_ids, first_positions = numpy.unique(all_token_ids, return_index=True)
+            ordered_ids = unique_ids[numpy.argsort(first_positions, kind='stable')].tolist()
+            return list(zip(ordered_ids, counts[ordered_ids].tolist()))
+        return list(Counter(chain.from_iterable(list_of_token_ids)).items())
+
+    def get_word_counts(self, list_of_token_ids):
+        """
+        Counts every word in a list of id sequences, only turning the ids into words once every id has been counted
+
+        Parameters
+        ----------
+        list_of_token_ids : list
+            list of array('I'), memoryview or numpy arrays of ids
+
+        Returns
+        -------
+        Counter
+            Counter object of words and how often they appear, in the order the words first appear (the same as
+            Counter of the words themselves)
+        """
+        words = self.words
+        return Counter({words[token_id]: count for token_id, count in self.count_ids(list_of_token_ids)})
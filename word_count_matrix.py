@@ -0,0 +1,141 @@
+# Sparse song x word count matrix of a corpus, so totals over any set of songs are sums over arrays instead of adding
+# up a Counter for every song
+from array import array
+from collections import Counter
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, the matrix is kept in arrays and summed with Counter without it
+    numpy = None
+
+
+class WordCountMatrix:
+    """
+    Counts of every word in every song, stored CSR style: the counts of song i are counts[indptr[i]:indptr[i + 1]] and
+    the words they are for are word_ids[indptr[i]:indptr[i + 1]]. Within a song, words are in the order they first
+    appear, so totals come out in the same order as adding up a Counter of every song
+
+    Parameters
+    ----------
+    list_of_token_ids : list
+        the word ids of every song, in song order
+    vocabulary : Vocabulary
+        the vocabulary the word ids are from
+    """
+
+    def __init__(self, list_of_token_ids, vocabulary):
+        self.vocabulary = vocabulary
+        indptr = array('q', [0])
+        word_ids = array('I')
+        counts = array('I')
+        for token_ids in list_of_token_ids:
+            song_counts = Counter(token_ids)
+            word_ids.extend(song_counts.keys())
+            counts.extend(song_counts.values())
+            indptr.append(len(word_ids))
+        if numpy is not None:
+            indptr = numpy.frombuffer(indptr, dtype=numpy.int64)
+            word_ids = numpy.frombuffer(word_ids, dtype=numpy.uint32).astype(numpy.int64)
+            counts = numpy.frombuffer(counts, dtype=numpy.uint32).astype(numpy.int64)
+        self.indptr = indptr
+        self.word_ids = word_ids
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def get_song_id_counts(self, song_index):
+        """
+        Returns the list of (word id, count) tuples of a song, in the order the words first appear in it
+        """
+        start = self.indptr[song_index]
+        end = self.indptr[song_index + 1]
+        return list(zip(self.word_ids[start:end].tolist(), self.counts[start:end].tolist()))
+
+    def get_song_counts(self, song_index):
+        """
+        Returns a Counter of every word in a song
+        """
+        words = self.vocabulary.words
+        return Counter({words[word_id]: count for word_id, count in self.get_song_id_counts(song_index)})
+
+    def get_total_id_counts(self, excluded_song_indices=()):
+        """
+        Adds up the counts of every song that isn't excluded
+
+        Parameters
+        ----------
+        excluded_song_indices : iterable
+            songs to leave out of the totals. Entries that aren't indices of songs in the matrix are ignored
+
+        Returns
+        -------
+        tuple
+            the list of word ids in the order they first appear in the songs, and the list of their total counts
+        """
+        if numpy is None:
+            excluded = set(excluded_song_indices)
+            totals = {}
+            for song_index in range(len(self)):
+                if song_index in excluded:
+                    continue
+                for word_id, count in self.get_song_id_counts(song_index):
+                    totals[word_id] = totals.get(word_id, 0) + count
+            return list(totals.keys()), list(totals.values())
+
+        song_is_included = numpy.ones(len(self), dtype=bool)
+        excluded = [song_index for song_index in excluded_song_indices
+                    if isinstance(song_index, int) and 0 <= song_index < len(self)]
+        song_is_included[excluded] = False
+        entry_is_included = numpy.repeat(song_is_included, numpy.diff(self.indptr))
+        word_ids = self.word_ids[entry_is_included]
+        if not len(word_ids):
+            return [], []
+        totals = numpy.bincount(word_ids, weights=self.counts[entry_is_included]).astype(numpy.int64)
+        unique_word_ids, first_positions = numpy.unique(word_ids, return_index=True)
+        ordered_word_ids = unique_word_ids[numpy.argsort(first_positions, kind='stable')]
+        return ordered_word_ids.tolist(), totals[ordered_word_ids].tolist()
+
+    def get_total_counts(self, excluded_song_indices=()):
+        """
+        Returns a Counter of every word in every song that isn't excluded, the same as adding up a Counter of every
+        song
+        """
+        words = self.vocabulary.words
+        word_ids, totals = self.get_total_id_counts(excluded_song_indices)
+        return Counter({words[word_id]: total for word_id, total in zip(word_ids, totals)})
+
+    def get_top_words(self, top_k, excluded_song_indices=(), words_to_omit=()):
+        """
+        Finds the most common words in every song that isn't excluded
+
+        Parameters
+        ----------
+        top_k : int
+            number of words to return
+        excluded_song_indices : iterable
+            songs to leave out of the totals
+        words_to_omit : iterable
+            words to leave out of the result
+
+        Returns
+        -------
+        list
+            list of tuples of (word, total count), the same as Counter.most_common(top_k) of get_total_counts
+        """
+        words = self.vocabulary.words
+        word_ids, totals = self.get_total_id_counts(excluded_song_indices)
+        omitted_word_ids = {self.vocabulary.get_id(word) for word in words_to_omit}
+        if numpy is None:
+            counts = Counter({words[word_id]: total for word_id, total in zip(word_ids, totals)
+                              if word_id not in omitted_word_ids})
+            return counts.most_common(top_k)
+
+        word_ids = numpy.array(word_ids, dtype=numpy.int64)
+        totals = numpy.array(totals, dtype=numpy.int64)
+        if omitted_word_ids - {None}:
+            is_kept = ~numpy.isin(word_ids, list(omitted_word_ids - {None}))
+            word_ids = word_ids[is_kept]
+            totals = totals[is_kept]
+        order = numpy.argsort(-totals, kind='stable')[:top_k]
+        return [(words[word_id], total) for word_id, total in zip(word_ids[order].tolist(), totals[order].tolist())]
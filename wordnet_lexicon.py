@@ -0,0 +1,90 @@
+# Sets of WordNet nouns, verbs and adjectives, saved to a file once so nltk's wordnet doesn't have to be loaded and
+# walked every time a Counter is filtered. Run this file to (re)build the lexicon file
+import json
+import os
+
+WORDNET_LEXICON_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wordnet_lexicon.json')
+WORDNET_POS_CODES = {'noun': 'n', 'verb': 'v', 'adjective': 'a'}
+
+_wordnet_lexicon = None
+
+
+def build_wordnet_lexicon(path=WORDNET_LEXICON_FILE):
+    """
+    Gets the set of words for every part of speech from nltk's wordnet and saves them to path. A word is the name of a
+    synset without its pos and number (e.g. 'dog' for 'dog.n.01')
+
+    Parameters
+    ----------
+    path : str
+        the file to save the lexicon to, optional param
+
+    Returns
+    -------
+    dict
+        dictionary of part of speech ('noun', 'verb' or 'adjective') to frozenset of words
+    """
+    from nltk.corpus import wordnet as wn  # this takes some time, so only load it when building the file
+    lexicon = {part_of_speech: frozenset(x.name().split('.', 1)[0] for x in wn.all_synsets(pos_code))
+               for part_of_speech, pos_code in WORDNET_POS_CODES.items()}
+    write_wordnet_lexicon(lexicon, path)
+    return lexicon
+
+
+def write_wordnet_lexicon(lexicon, path):
+    """
+    Saves a dictionary of part of speech to set of words as json, with every set stored as a sorted list
+    """
+    with open(path, 'w', encoding='utf-8') as lexicon_file:
+        json.dump({part_of_speech: sorted(words) for part_of_speech, words in lexicon.items()}, lexicon_file,
+                  ensure_ascii=False, separators=(',', ':'))
+
+
+def load_wordnet_lexicon(path):
+    """
+    Loads a lexicon saved by write_wordnet_lexicon
+
+    Parameters
+    ----------
+    path : str
+        the file the lexicon was saved to
+
+    Returns
+    -------
+    dict
+        dictionary of part of speech to frozenset of words
+    """
+    with open(path, encoding='utf-8') as lexicon_file:
+        return {part_of_speech: frozenset(words) for part_of_speech, words in json.load(lexicon_file).items()}
+
+
+def get_wordnet_words(part_of_speech):
+    """
+    Returns the frozenset of WordNet words for 'noun', 'verb' or 'adjective'. The lexicon file is loaded the first
+    time this is called and kept for the rest of the run. If the file doesn't exist yet, it is built from nltk's
+    wordnet first
+
+    Parameters
+    ----------
+    part_of_speech : str
+        'noun', 'verb' or 'adjective'
+
+    Returns
+    -------
+    frozenset
+        every word of that part of speech
+    """
+    global _wordnet_lexicon
+    if _wordnet_lexicon is None:
+        if os.path.exists(WORDNET_LEXICON_FILE):
+            _wordnet_lexicon = load_wordnet_lexicon(WORDNET_LEXICON_FILE)
+        else:
+            _wordnet_lexicon = build_wordnet_lexicon(WORDNET_LEXICON_FILE)
+    return _wordnet_lexicon[part_of_speech]
+
+
+if __name__ == '__main__':
+    built_lexicon = build_wordnet_lexicon()
+    for built_part_of_speech, built_words in built_lexicon.items():
+        print(built_part_of_speech + ':', len(built_words), 'words')
+    print('Saved to', WORDNET_LEXICON_FILE)